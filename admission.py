@@ -0,0 +1,184 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Optional
+
+import llm
+import metrics
+from ratelimit import TokenBucket
+
+# Each user may ask this many questions per minute, with bursts of up to USER_BURST
+USER_RATE = float(os.getenv("ADMISSION_USER_RATE", "4"))
+USER_BURST = float(os.getenv("ADMISSION_USER_BURST", "3"))
+# Each server may ask this many questions per minute, with bursts of up to GUILD_BURST
+GUILD_RATE = float(os.getenv("ADMISSION_GUILD_RATE", "30"))
+GUILD_BURST = float(os.getenv("ADMISSION_GUILD_BURST", "10"))
+# Number of admitted requests answered at the same time, shared fairly between servers
+CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", str(llm.MAX_CONCURRENCY)))
+# Seconds a request waits for follow-up messages from the same user before it is queued
+COALESCE_WINDOW = float(os.getenv("ADMISSION_COALESCE_WINDOW", "0.5"))
+# Most messages, and characters in total, merged into one waiting request; a message past
+# either is admitted as a new request, subject to the rate limits
+MAX_MERGED_PROMPTS = int(os.getenv("ADMISSION_MAX_MERGED_PROMPTS", "5"))
+MAX_MERGED_CHARS = int(os.getenv("ADMISSION_MAX_MERGED_CHARS", "2000"))
+# Maximum number of rate limit buckets kept per kind; the least recently used are dropped
+MAX_BUCKETS = int(os.getenv("ADMISSION_MAX_BUCKETS", "10000"))
+
+
+class RateLimited(Exception):
+    """Raised when a user or server is over its rate limit."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class _Request:
+    __slots__ = ("guild_id", "prompts", "length", "ready")
+
+    def __init__(self, guild_id: int, prompt: str):
+        self.guild_id = guild_id
+        self.prompts = [prompt]
+        self.length = len(prompt)
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def can_merge(self, prompt: str) -> bool:
+        return len(self.prompts) < MAX_MERGED_PROMPTS and self.length + 1 + len(prompt) <= MAX_MERGED_CHARS
+
+
+_user_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+_guild_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+# Requests still open to coalescing, keyed by (channel_id, user_id)
+_pending: dict[tuple[int, int], _Request] = {}
+# Waiting requests per server, in round-robin order
+_queues: OrderedDict[int, deque[_Request]] = OrderedDict()
+_running = 0
+
+
+def _get_bucket(buckets: OrderedDict[int, TokenBucket], key: int, capacity: float, per_minute: float, now: float) -> TokenBucket:
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = TokenBucket(capacity, per_minute / 60, now)
+        while len(buckets) > MAX_BUCKETS:
+            buckets.popitem(last=False)
+    else:
+        buckets.move_to_end(key)
+        bucket.refill(now)
+    return bucket
+
+
+def _take_tokens(guild_id: int, user_id: int) -> None:
+    """Take a token from both the user's and the server's bucket, or neither."""
+    now = time.monotonic()
+    user_bucket = _get_bucket(_user_buckets, user_id, USER_BURST, USER_RATE, now)
+    guild_bucket = _get_bucket(_guild_buckets, guild_id, GUILD_BURST, GUILD_RATE, now)
+    retry_after = max(user_bucket.wait_time(), guild_bucket.wait_time())
+    if retry_after > 0:
+        raise RateLimited(retry_after)
+    user_bucket.tokens -= 1
+    guild_bucket.tokens -= 1
+
+
+def _dispatch() -> None:
+    """Start waiting requests while slots are free, taking one server at a time in turn."""
+    global _running
+    while _running < CONCURRENCY and _queues:
+        guild_id, queue = next(iter(_queues.items()))
+        request = queue.popleft()
+        if queue:
+            # The server goes to the back of the line for its next request
+            _queues.move_to_end(guild_id)
+        else:
+            del _queues[guild_id]
+        if request.ready.done():
+            # Its caller was cancelled and is about to remove it
+            continue
+        _running += 1
+        request.ready.set_result(None)
+
+
+def _dequeue(request: _Request) -> None:
+    queue = _queues.get(request.guild_id)
+    if queue is not None and request in queue:
+        queue.remove(request)
+        if not queue:
+            del _queues[request.guild_id]
+
+
+def queue_depth() -> int:
+    """Return the number of admitted requests waiting for a slot."""
+    return sum(len(queue) for queue in _queues.values())
+
+
+async def submit(
+    guild_id: Optional[int],
+    channel_id: int,
+    user_id: int,
+    prompt: str,
+    answer: Callable[[str], Awaitable[str]],
+) -> Optional[str]:
+    """
+    Answer a question once it is admitted and its server's turn comes up.
+
+    A question from a user who already has one waiting in the same channel is
+    merged into the waiting one instead of being answered separately, up to
+    MAX_MERGED_PROMPTS questions and MAX_MERGED_CHARS characters. Servers
+    take turns for the CONCURRENCY answer slots, so one busy server can't
+    starve the others.
+
+    Args:
+        guild_id: The server the question was asked in, None for DMs
+        channel_id: The channel the question was asked in
+        user_id: The user who asked
+        prompt: The question
+        answer: Called with the (possibly merged) question to produce the answer
+
+    Returns:
+        The answer, or None if the question was merged into an earlier one,
+        whose answer covers it
+
+    Raises:
+        RateLimited: If the user or server is over its rate limit
+    """
+    global _running
+    key = (channel_id, user_id)
+    if (waiting := _pending.get(key)) is not None and waiting.can_merge(prompt):
+        waiting.prompts.append(prompt)
+        waiting.length += 1 + len(prompt)
+        metrics.increment("admission", "result", "coalesced")
+        return None
+
+    # DMs share one lane in the scheduler, but each user still has their own limit
+    guild_id = guild_id or 0
+    try:
+        _take_tokens(guild_id, user_id)
+    except RateLimited:
+        metrics.increment("admission", "result", "limited")
+        raise
+    metrics.increment("admission", "result", "admitted")
+
+    request = _Request(guild_id, prompt)
+    _pending[key] = request
+    try:
+        if COALESCE_WINDOW > 0:
+            await asyncio.sleep(COALESCE_WINDOW)
+        _queues.setdefault(guild_id, deque()).append(request)
+        _dispatch()
+        await request.ready
+    except BaseException:
+        _dequeue(request)
+        if request.ready.done() and not request.ready.cancelled():
+            # Cancelled after being given a slot: hand the slot on
+            _running -= 1
+            _dispatch()
+        raise
+    finally:
+        if _pending.get(key) is request:
+            del _pending[key]
+
+    try:
+        return await answer("\n".join(request.prompts))
+    finally:
+        _running -= 1
+        _dispatch()
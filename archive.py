@@ -0,0 +1,186 @@
+"""
+Archive old bot_messages rows to compressed files and delete them from the database.
+
+Rows are written as gzipped JSON lines, one file per server and month:
+    {ARCHIVE_DIR}/{guild_id}/{YYYY-MM}.jsonl.gz
+
+Usage:
+    python archive.py --days 180        # archive rows older than 180 days
+"""
+
+from dotenv import load_dotenv
+
+# Load .env before the modules below read their settings from the environment
+load_dotenv()
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+from sqlalchemy.engine import Row
+
+import metrics
+from database import close_db, delete_bot_messages, init_db, stream_bot_messages
+
+# Directory archived rows are written to. It must be persistent storage: a Heroku dyno's
+# filesystem is wiped on every restart, and archives written there are lost along with the
+# rows deleted from the database. The daily maintenance job only archives when it is set.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR") or "archive"
+ARCHIVE_DIR_CONFIGURED = bool(os.getenv("ARCHIVE_DIR"))
+# Rows older than this many days are archived by the daily maintenance job; 0 disables it.
+# Needs ARCHIVE_DIR to be set as well.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS") or 0)
+# Rows read from the database at a time
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", "5000"))
+# Rows deleted per transaction once archived
+ARCHIVE_DELETE_BATCH = int(os.getenv("ARCHIVE_DELETE_BATCH", "1000"))
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes, which are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def archive_path(directory: Path, guild_id: int, month: str) -> Path:
+    """Return the archive file for a server's rows from one month, e.g. "2026-10"."""
+    return directory / str(guild_id) / f"{month}.jsonl.gz"
+
+
+def _to_record(row: Row) -> dict:
+    return {
+        "id": str(row.id),
+        "guild_id": row.guild_id,
+        "guild_name": row.guild_name,
+        "channel_id": row.channel_id,
+        "channel_name": row.channel_name,
+        "user_id": row.user_id,
+        "user_name": row.user_name,
+        "user_display_name": row.user_display_name,
+        "user_message": row.user_message,
+        "bot_response": row.bot_response,
+        "action_type": row.action_type.value,
+        "created_at": _utc(row.created_at).isoformat(),
+        "updated_at": _utc(row.updated_at).isoformat() if row.updated_at else None,
+    }
+
+
+def _write_chunk(directory: Path, rows: list[Row]) -> None:
+    """Append a chunk of rows to the archive files of their servers and months."""
+    groups: dict[tuple[int, str], list[str]] = {}
+    for row in rows:
+        key = (row.guild_id, _utc(row.created_at).strftime("%Y-%m"))
+        groups.setdefault(key, []).append(json.dumps(_to_record(row), ensure_ascii=False))
+
+    for (guild_id, month), lines in groups.items():
+        path = archive_path(directory, guild_id, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Each chunk is appended as its own gzip member; readers see one continuous file
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+async def archive_bot_messages(before: datetime, directory: Optional[str] = None) -> int:
+    """
+    Move bot_messages rows created before a time from the database to archive files.
+
+    Rows are streamed in chunks of ARCHIVE_CHUNK_SIZE. Each chunk is written
+    and synced to disk before its rows are deleted, so a row is never deleted
+    without being archived. If a run is interrupted between the two, the next
+    run archives that chunk again; duplicates share their id.
+
+    Args:
+        before: Archive rows created before this time
+        directory: Directory to write to, defaults to ARCHIVE_DIR
+
+    Returns:
+        The number of rows archived and deleted
+    """
+    directory = Path(directory or ARCHIVE_DIR)
+    archived = 0
+    with metrics.timed("archive_bot_messages"):
+        chunks = stream_bot_messages(before, ARCHIVE_CHUNK_SIZE)
+        try:
+            async for rows in chunks:
+                try:
+                    # File writes are blocking, so keep them off the event loop
+                    await asyncio.to_thread(_write_chunk, directory, rows)
+                except OSError as e:
+                    print(f"Error writing bot message archive, stopping: {e}")
+                    break
+                deleted = await delete_bot_messages(rows, ARCHIVE_DELETE_BATCH)
+                archived += deleted
+                if deleted < len(rows):
+                    print("Error deleting archived bot messages, stopping")
+                    break
+        finally:
+            await chunks.aclose()
+    if archived:
+        print(f"Archived {archived} bot messages created before {before.isoformat()} to {directory}")
+    return archived
+
+
+def load_archive(
+    directory: Optional[str] = None,
+    guild_id: Optional[int] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Iterator[dict]:
+    """
+    Read archived rows back, one at a time, for offline analysis.
+
+    Files are read lazily line by line, so memory use doesn't grow with the
+    archive. Only files that can hold matching rows are opened.
+
+    Args:
+        directory: Archive directory, defaults to ARCHIVE_DIR
+        guild_id: Only rows from this server
+        start: Only rows from this month onwards
+        end: Only rows from before this month
+
+    Yields:
+        Rows as dicts, with created_at and updated_at parsed back to datetimes
+    """
+    directory = Path(directory or ARCHIVE_DIR)
+    if not directory.is_dir():
+        return
+    guild_dirs = [directory / str(guild_id)] if guild_id is not None else sorted(directory.iterdir())
+    first = start.strftime("%Y-%m") if start else None
+    last = end.strftime("%Y-%m") if end else None
+
+    for guild_dir in guild_dirs:
+        if not guild_dir.is_dir():
+            continue
+        for path in sorted(guild_dir.glob("*.jsonl.gz")):
+            month = path.name.removesuffix(".jsonl.gz")
+            if (first and month < first) or (last and month >= last):
+                continue
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    record["created_at"] = datetime.fromisoformat(record["created_at"])
+                    if record["updated_at"]:
+                        record["updated_at"] = datetime.fromisoformat(record["updated_at"])
+                    yield record
+
+
+async def _main(days: int, directory: Optional[str]) -> None:
+    await init_db()
+    try:
+        await archive_bot_messages(datetime.now(timezone.utc) - timedelta(days=days), directory)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old bot_messages rows to compressed files")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS or 180, help="archive rows older than this")
+    parser.add_argument("--dir", help=f"archive directory (default {ARCHIVE_DIR})")
+    args = parser.parse_args()
+    asyncio.run(_main(args.days, args.dir))
@@ -0,0 +1,152 @@
+"""
+Backfill game scores from the history of a channel.
+
+Usage:
+    python backfill.py CHANNEL_ID [CHANNEL_ID ...]
+
+Also available to server admins as the /backfill_scores command.
+"""
+
+from dotenv import load_dotenv
+
+# Load .env before the modules below read their settings from the environment
+load_dotenv()
+
+import argparse
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+import metrics
+from database import close_db, get_backfill_checkpoint, init_db, record_backfilled_scores
+from game_scores import parse_game_score_message
+
+# Messages processed per batch; each batch's scores and checkpoint are saved in one transaction
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "500"))
+# Seconds to wait after each page of history, on top of discord.py's own rate limit handling,
+# so a long backfill leaves room for the bot's other requests
+BACKFILL_PAGE_DELAY = float(os.getenv("BACKFILL_PAGE_DELAY", "0.5"))
+# Messages per history request, Discord's maximum
+HISTORY_PAGE_SIZE = 100
+
+
+class BackfillResult:
+    """Progress of a channel's backfill."""
+    __slots__ = ("messages_scanned", "scores_recorded", "completed")
+
+    def __init__(self):
+        self.messages_scanned = 0
+        self.scores_recorded = 0
+        self.completed = False
+
+
+# Channels with a backfill running in this process
+_running: set[int] = set()
+
+
+def is_running(channel_id: int) -> bool:
+    return channel_id in _running
+
+
+async def backfill_channel(
+    channel: discord.TextChannel,
+    on_progress: Optional[Callable[[BackfillResult], Awaitable[None]]] = None,
+) -> Optional[BackfillResult]:
+    """
+    Record the game scores shared in a channel's history.
+
+    History is read oldest first, from where an earlier backfill of the channel
+    stopped up to when this one started; newer messages are recorded as they
+    arrive. Only one batch of BACKFILL_BATCH_SIZE messages is held in memory at
+    a time, and progress is checkpointed after every batch, so even a long
+    history can be backfilled in one run, and an interrupted run resumes.
+
+    Args:
+        channel: The channel to backfill
+        on_progress: Called with the progress after every batch
+
+    Returns:
+        The progress of this run, None if the channel is already being backfilled
+    """
+    if channel.id in _running:
+        return None
+    _running.add(channel.id)
+    result = BackfillResult()
+    try:
+        checkpoint = await get_backfill_checkpoint(channel.id)
+        after = discord.Object(checkpoint.last_message_id) if checkpoint else None
+        before = discord.Object(discord.utils.time_snowflake(discord.utils.utcnow()))
+
+        scores = []
+        scanned = 0
+        last_message_id = None
+
+        async def flush(completed: bool) -> bool:
+            nonlocal scores, scanned
+            with metrics.timed("backfill_batch"):
+                recorded = await record_backfilled_scores(
+                    guild_id=channel.guild.id,
+                    channel_id=channel.id,
+                    scores=scores,
+                    last_message_id=last_message_id,
+                    messages_scanned=scanned,
+                    completed=completed,
+                )
+            if recorded is None:
+                return False
+            result.messages_scanned += scanned
+            result.scores_recorded += recorded
+            result.completed = completed
+            scores = []
+            scanned = 0
+            if on_progress is not None:
+                await on_progress(result)
+            return True
+
+        async for message in channel.history(limit=None, after=after, before=before, oldest_first=True):
+            scanned += 1
+            last_message_id = message.id
+            if not message.author.bot:
+                score = parse_game_score_message(message.content)
+                if score is not None:
+                    scores.append((message.author.id, message.id, message.created_at, score))
+            if scanned >= BACKFILL_BATCH_SIZE and not await flush(completed=False):
+                return result
+            if (result.messages_scanned + scanned) % HISTORY_PAGE_SIZE == 0 and BACKFILL_PAGE_DELAY > 0:
+                await asyncio.sleep(BACKFILL_PAGE_DELAY)
+
+        if last_message_id is None:
+            # Nothing new since the last backfill
+            last_message_id = checkpoint.last_message_id if checkpoint else before.id
+        await flush(completed=True)
+        return result
+    finally:
+        _running.discard(channel.id)
+
+
+async def _main(channel_ids: list[int]) -> None:
+    client = discord.Client(intents=discord.Intents(guilds=True, messages=True, message_content=True))
+
+    async def print_progress(result: BackfillResult) -> None:
+        print(f"  {result.messages_scanned} messages scanned, {result.scores_recorded} scores recorded")
+
+    await init_db()
+    try:
+        async with client:
+            await client.login(os.getenv("DISCORD_TOKEN"))
+            for channel_id in channel_ids:
+                channel = await client.fetch_channel(channel_id)
+                print(f"Backfilling #{channel.name} in {channel.guild.name}")
+                result = await backfill_channel(channel, print_progress)
+                print("  Done" if result.completed else "  Stopped early, run again to resume")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill game scores from the history of channels")
+    parser.add_argument("channel_ids", type=int, nargs="+", help="channels to backfill")
+    args = parser.parse_args()
+    asyncio.run(_main(args.channel_ids))
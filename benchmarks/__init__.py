@@ -0,0 +1,5 @@
+"""
+Benchmark package.
+
+This package contains reproducible performance benchmarks for the bot.
+"""
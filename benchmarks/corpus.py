@@ -0,0 +1,128 @@
+import random
+from typing import Callable
+
+# Discord's message length limit (with Nitro); no message can be longer than this
+MAX_MESSAGE_LENGTH = 4000
+
+WORDLE_CELLS = "⬛⬜🟨🟩"
+CONNECTIONS_CELLS = "🟨🟩🟦🟪"
+STRANDS_CELLS = "🔵🟡"
+EMOJIS = "😂🔥💀🙏✨😭👀🎉🟥🟧🟫⬛⬜🟨🟩🟦🟪🔵🟡💡"
+WORDS = (
+    "the", "wordle", "was", "hard", "today", "did", "anyone", "get", "connections",
+    "i", "think", "strands", "theme", "is", "so", "dumb", "lol", "what", "are", "we",
+    "doing", "for", "dinner", "game", "night", "tomorrow", "puzzle", "streak", "broke",
+)
+
+
+def _wordle_share(rng: random.Random) -> str:
+    score = rng.choice("123456X")
+    rows = 6 if score == "X" else int(score)
+    grid = "\n".join(
+        "".join(rng.choice(WORDLE_CELLS) for _ in range(5)) for _ in range(rows - 1)
+    )
+    last = "🟩" * 5 if score != "X" else "".join(rng.choice(WORDLE_CELLS) for _ in range(5))
+    number = rng.randint(1, 1999)
+    puzzle = f"{number // 1000},{number % 1000:03d}" if number >= 1000 else str(number)
+    hard = rng.choice(("", "*"))
+    return f"Wordle {puzzle} {score}/6{hard}\n\n{grid}\n{last}".replace("\n\n\n", "\n\n")
+
+
+def _connections_share(rng: random.Random) -> str:
+    rows = []
+    for _ in range(rng.randint(4, 6)):
+        if rng.random() < 0.7:
+            rows.append(rng.choice(CONNECTIONS_CELLS) * 4)
+        else:
+            rows.append("".join(rng.choice(CONNECTIONS_CELLS) for _ in range(4)))
+    return f"Connections\nPuzzle #{rng.randint(1, 999)}\n" + "\n".join(rows)
+
+
+def _strands_share(rng: random.Random) -> str:
+    cells = ["🔵"] * rng.randint(5, 8) + ["🟡"]
+    rng.shuffle(cells)
+    rows = ["".join(cells[i:i + 4]) for i in range(0, len(cells), 4)]
+    theme = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))).capitalize()
+    return f"Strands #{rng.randint(1, 999)}\n“{theme}”\n" + "\n".join(rows)
+
+
+def _chatter(rng: random.Random) -> str:
+    length = rng.choice((20, 80, 300, 1500, MAX_MESSAGE_LENGTH))
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def _emoji_heavy(rng: random.Random) -> str:
+    length = rng.choice((10, 200, 1000, MAX_MESSAGE_LENGTH // 2))
+    return "".join(
+        rng.choice(EMOJIS) if rng.random() < 0.8 else rng.choice(" \n") for _ in range(length)
+    )
+
+
+def _near_miss(rng: random.Random) -> str:
+    return rng.choice((
+        f"Wordle {rng.randint(1, 1999)} 7/6",
+        f"wordle {rng.randint(1, 1999)}",
+        f"Wordle {rng.randint(1, 1999)} 3/7",
+        f"Connections #{rng.randint(1, 999)}\n🟨🟨🟨\n🟩🟩🟩🟩",
+        f"Connections #{rng.randint(1, 999)} " + "🟥" * 16,
+        f"Strands #{rng.randint(1, 999)}\n“Unclosed theme\n🔵🔵🔵🟡",
+        f"Strands #{rng.randint(1, 999)}\n“Two spangrams”\n🔵🟡🔵🟡",
+        "I played wordle, connections and strands today but won't share",
+    ))
+
+
+def _pathological(rng: random.Random) -> str:
+    def fill(unit: str, prefix: str = "") -> str:
+        return (prefix + unit * MAX_MESSAGE_LENGTH)[:MAX_MESSAGE_LENGTH]
+
+    return rng.choice((
+        fill("🔵", "Strands #1 “x” "),
+        fill("🔵 \n", "Strands #1\n“x”\n"),
+        fill("🔵🔵🔵🔵\n", "Strands #1 “x” ") + "🟡🟡",
+        fill("strands 1 “aaaaa"),
+        fill("Strands #1 "),
+        fill("🟨", "Connections #1 "),
+        fill("🟨🟨🟨 ", "Connections #1 "),
+        fill("connections 1 "),
+        fill("connections puzzle "),
+        fill("wordle 1 "),
+        fill("1", "wordle "),
+        fill("wordle 1,1 "),
+        fill(" ", "wordle"),
+        fill("\n"),
+    ))
+
+
+CATEGORIES: dict[str, Callable[[random.Random], str]] = {
+    "wordle_share": _wordle_share,
+    "connections_share": _connections_share,
+    "strands_share": _strands_share,
+    "chatter": _chatter,
+    "emoji_heavy": _emoji_heavy,
+    "near_miss": _near_miss,
+    "pathological": _pathological,
+}
+
+
+def generate_corpus(size_per_category: int = 200, seed: int = 1497) -> dict[str, list[str]]:
+    """
+    Generate a reproducible benchmark corpus of chat messages.
+
+    Args:
+        size_per_category: Number of messages generated for each category
+        seed: Seed for the random generator, so every run sees the same corpus
+
+    Returns:
+        Mapping of category name to its list of messages
+    """
+    rng = random.Random(seed)
+    return {
+        name: [generator(rng)[:MAX_MESSAGE_LENGTH] for _ in range(size_per_category)]
+        for name, generator in CATEGORIES.items()
+    }
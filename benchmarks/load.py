@@ -0,0 +1,408 @@
+"""
+Load test the bot's message and slash command handlers offline.
+
+Synthetic messages and interactions arrive at a configurable rate and go
+through the real on_message and command handlers, with fake Discord objects,
+a stub LLM and a temporary SQLite database. Nothing connects to Discord.
+
+Usage:
+    python -m benchmarks.load                               # 50 events/s for 10 s
+    python -m benchmarks.load --rate 500 --duration 30      # a game-day spike
+    python -m benchmarks.load --mix wordle=1,mention=1      # only these events
+    python -m benchmarks.load --json results.json           # also save the results
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import discord
+from discord import app_commands
+
+from benchmarks.corpus import CATEGORIES
+
+# Share of each kind of event in the generated traffic
+DEFAULT_MIX = {
+    "wordle": 0.35,
+    "connections": 0.1,
+    "strands": 0.1,
+    "chatter": 0.25,
+    "mention": 0.1,
+    "gif": 0.04,
+    "stats": 0.04,
+    "show_prompt": 0.02,
+}
+
+STUB_ANSWER = "Great question! The answer is definitely 42, no further questions please."
+
+# Action types logged while handling the current event
+_actions: contextvars.ContextVar[list] = contextvars.ContextVar("actions")
+
+
+class FakeUser:
+    __slots__ = ("id", "name", "display_name", "mention")
+
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+        self.display_name = name.capitalize()
+        self.mention = f"<@{user_id}>"
+
+
+class FakeGuild:
+    __slots__ = ("id", "name")
+
+    def __init__(self, guild_id: int, name: str):
+        self.id = guild_id
+        self.name = name
+
+
+class FakeMessage:
+    """A message as seen by on_message, or one the bot sent."""
+    __slots__ = ("id", "author", "channel", "guild", "content", "clean_content", "mentions")
+
+    def __init__(self, author: FakeUser, channel: "FakeChannel", content: str, mentions: list[FakeUser]):
+        self.id = next_snowflake()
+        self.author = author
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.clean_content = content
+        self.mentions = mentions
+
+    async def edit(self, content: Optional[str] = None, **kwargs) -> "FakeMessage":
+        await self.channel.api_call()
+        self.content = content
+        return self
+
+
+class FakeChannel:
+    """A text channel whose sends take a fixed Discord API latency."""
+    __slots__ = ("id", "name", "guild", "mention", "bot_user", "send_latency", "sent")
+
+    def __init__(self, channel_id: int, name: str, guild: FakeGuild, bot_user: FakeUser, send_latency: float):
+        self.id = channel_id
+        self.name = name
+        self.guild = guild
+        self.mention = f"<#{channel_id}>"
+        self.bot_user = bot_user
+        self.send_latency = send_latency
+        self.sent = 0
+
+    async def api_call(self) -> None:
+        if self.send_latency > 0:
+            await asyncio.sleep(self.send_latency)
+        self.sent += 1
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        await self.api_call()
+        return FakeMessage(self.bot_user, self, content or "", [])
+
+
+class FakeInteractionResponse:
+    __slots__ = ("channel", "done")
+
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def send_message(self, content: Optional[str] = None, **kwargs) -> None:
+        await self.channel.api_call()
+        self.done = True
+
+    async def defer(self, **kwargs) -> None:
+        await self.channel.api_call()
+        self.done = True
+
+
+class FakeFollowup:
+    __slots__ = ("channel",)
+
+    def __init__(self, channel: FakeChannel):
+        self.channel = channel
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> FakeMessage:
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeInteraction:
+    """A slash command invocation, as seen by a command's callback."""
+    __slots__ = ("user", "channel", "guild", "response", "followup")
+
+    def __init__(self, user: FakeUser, channel: FakeChannel):
+        self.user = user
+        self.channel = channel
+        self.guild = channel.guild
+        self.response = FakeInteractionResponse(channel)
+        self.followup = FakeFollowup(channel)
+
+
+_last_snowflake = 0
+
+
+def next_snowflake() -> int:
+    """Return a unique, increasing snowflake for the current time, like Discord message ids."""
+    global _last_snowflake
+    # Messages within the same millisecond are told apart by the snowflake's low bits
+    _last_snowflake = max(discord.utils.time_snowflake(discord.utils.utcnow()), _last_snowflake + 1)
+    return _last_snowflake
+
+
+def install_stub_llm(latency: float, pieces: int = 8) -> None:
+    """
+    Replace the xAI calls under llm.py with stubs that wait instead of calling the API.
+
+    The concurrency cap, queue and timeouts in llm.py stay in place.
+
+    Args:
+        latency: Seconds a completion takes, spread evenly over its pieces when streamed
+        pieces: Number of pieces a streamed completion is split into
+    """
+    import llm
+
+    async def sample(system_prompt, prompt, model, history=()):
+        await asyncio.sleep(latency)
+        return STUB_ANSWER
+
+    async def stream(system_prompt, prompt, model, history=()):
+        words = STUB_ANSWER.split(" ")
+        size = -(-len(words) // pieces)
+        for start in range(0, len(words), size):
+            await asyncio.sleep(latency / pieces)
+            yield " ".join(words[start:start + size]) + " "
+
+    llm._sample = sample
+    llm._stream = stream
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Parse an event mix like "wordle=3,mention=1" into normalized weights."""
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown event {name!r}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("The event mix needs a positive weight")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, max(0, round(q * len(values)) - 1))]
+
+
+class Traffic:
+    """Generates synthetic events against a set of fake guilds, channels and users."""
+
+    def __init__(self, main, guilds: int, users: int, send_latency: float, seed: int):
+        self.main = main
+        self.rng = random.Random(seed)
+        self.bot_user = FakeUser(1, "cheripit")
+        self.channels = [
+            FakeChannel(1000 + index, "general", FakeGuild(100 + index, f"guild {index}"), self.bot_user, send_latency)
+            for index in range(guilds)
+        ]
+        self.users = [FakeUser(10_000 + index, f"user{index}") for index in range(users)]
+        self.handlers: dict[str, Callable[[], Callable[[], Awaitable[None]]]] = {
+            "wordle": lambda: self.message(CATEGORIES["wordle_share"](self.rng)),
+            "connections": lambda: self.message(CATEGORIES["connections_share"](self.rng)),
+            "strands": lambda: self.message(CATEGORIES["strands_share"](self.rng)),
+            "chatter": lambda: self.message(
+                CATEGORIES[self.rng.choice(("chatter", "emoji_heavy", "near_miss"))](self.rng)
+            ),
+            "mention": lambda: self.message(
+                f"{self.bot_user.mention} what should I play tonight?", mentions=[self.bot_user]
+            ),
+            "gif": lambda: self.command("gif"),
+            "stats": lambda: self.command(
+                "stats", game=app_commands.Choice(name="Wordle", value="wordle"),
+            ),
+            "show_prompt": lambda: self.command("show_prompt"),
+        }
+
+    def message(self, content: str, mentions: Optional[list[FakeUser]] = None) -> Callable[[], Awaitable[None]]:
+        message = FakeMessage(self.rng.choice(self.users), self.rng.choice(self.channels), content, mentions or [])
+        return lambda: self.main.on_message(message)
+
+    def command(self, name: str, **options) -> Callable[[], Awaitable[None]]:
+        callback = self.main.discord_client.tree.get_command(name).callback
+        interaction = FakeInteraction(self.rng.choice(self.users), self.rng.choice(self.channels))
+        return lambda: callback(interaction, **options)
+
+    def next_event(self, mix: dict[str, float]) -> tuple[str, Callable[[], Awaitable[None]]]:
+        kind = self.rng.choices(list(mix), weights=list(mix.values()))[0]
+        return kind, self.handlers[kind]()
+
+
+async def run_load(
+    rate: float,
+    duration: float,
+    mix: dict[str, float],
+    llm_latency: float = 1.0,
+    send_latency: float = 0.05,
+    guilds: int = 20,
+    users: int = 500,
+    seed: int = 1497,
+    database_url: Optional[str] = None,
+) -> dict[str, dict[str, float]]:
+    """
+    Replay synthetic traffic through the bot's handlers and measure it.
+
+    Events arrive as a Poisson process at the given rate. Each event's latency
+    runs from its arrival to the end of its handler, so time spent waiting for
+    the event loop counts too.
+
+    Args:
+        rate: Events per second
+        duration: Seconds of traffic to generate
+        mix: Share of each kind of event, from parse_mix()
+        llm_latency: Seconds each stub LLM completion takes
+        send_latency: Seconds each fake Discord API call takes
+        guilds: Number of fake servers, with one channel each
+        users: Number of fake users
+        seed: Seed for the random generator, so every run sees the same traffic
+        database_url: Database to use, defaults to a temporary SQLite file
+
+    Returns:
+        Results keyed by the ActionType each event was logged as, or by the
+        event kind in parentheses for events that weren't logged
+    """
+    import database
+    import llm
+    import main
+
+    real_llm = (llm._sample, llm._stream)
+    real_log_message = main.log_message
+    real_database_url = os.environ.get("DATABASE_URL")
+
+    async def log_message(**kwargs) -> bool:
+        _actions.get().append(kwargs["action_type"].value)
+        return await real_log_message(**kwargs)
+
+    latencies: dict[str, list[float]] = {}
+
+    async def handle(kind: str, arrival: float, handler: Callable[[], Awaitable[None]]) -> None:
+        actions = []
+        _actions.set(actions)
+        try:
+            await handler()
+        except Exception as e:
+            print(f"Error handling {kind} event: {e}")
+            actions = ["error"]
+        elapsed = time.perf_counter() - arrival
+        for action in actions or [f"({kind})"]:
+            latencies.setdefault(action, []).append(elapsed)
+
+    install_stub_llm(llm_latency)
+    traffic = Traffic(main, guilds, users, send_latency, seed)
+    # Pretend to be logged in, so mentions of the bot user are recognized
+    main.discord_client._connection.user = traffic.bot_user
+    main.log_message = log_message
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            os.environ["DATABASE_URL"] = database_url or f"sqlite:///{Path(directory) / 'load.db'}"
+            await database.init_db()
+
+            tasks = []
+            start = time.perf_counter()
+            arrival = start
+            while arrival - start < duration:
+                delay = arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                kind, handler = traffic.next_event(mix)
+                tasks.append(asyncio.create_task(handle(kind, arrival, handler)))
+                arrival += traffic.rng.expovariate(rate)
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+            await database.close_db()
+    finally:
+        llm._sample, llm._stream = real_llm
+        main.log_message = real_log_message
+        if real_database_url is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = real_database_url
+
+    results = {}
+    for action, values in sorted(latencies.items()):
+        values.sort()
+        results[action] = {
+            "count": len(values),
+            "throughput": len(values) / elapsed,
+            "p50": percentile(values, 0.5),
+            "p99": percentile(values, 0.99),
+            "max": values[-1],
+        }
+    return results
+
+
+def print_report(results: dict[str, dict[str, float]]) -> None:
+    """Print a per-action throughput and latency table, then the bot's own stage latencies."""
+    import metrics
+
+    print(f"{'action':<22} {'count':>7} {'events/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for action, result in results.items():
+        print(
+            f"{action:<22} {result['count']:>7} {result['throughput']:>9.1f} "
+            f"{result['p50'] * 1000:>9.1f} {result['p99'] * 1000:>9.1f} {result['max'] * 1000:>9.1f}"
+        )
+
+    print(f"\n{'stage':<22} {'count':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for stage, (count, p50, p99) in metrics.stage_summary().items():
+        print(f"{stage:<22} {count:>7} {(p50 or 0) * 1000:>9.1f} {(p99 or 0) * 1000:>9.1f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the bot's handlers offline")
+    parser.add_argument("--rate", type=float, default=50, help="events per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds of traffic")
+    parser.add_argument(
+        "--mix", type=parse_mix, default=DEFAULT_MIX,
+        help=f"event weights, e.g. wordle=3,mention=1 (events: {', '.join(DEFAULT_MIX)})",
+    )
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per stub LLM completion")
+    parser.add_argument("--send-latency", type=float, default=0.05, help="seconds per fake Discord API call")
+    parser.add_argument("--guilds", type=int, default=20, help="number of fake servers")
+    parser.add_argument("--users", type=int, default=500, help="number of fake users")
+    parser.add_argument("--seed", type=int, default=1497, help="random seed for the traffic")
+    parser.add_argument("--database-url", help="database to use instead of a temporary SQLite file")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load(
+        rate=args.rate,
+        duration=args.duration,
+        mix=args.mix,
+        llm_latency=args.llm_latency,
+        send_latency=args.send_latency,
+        guilds=args.guilds,
+        users=args.users,
+        seed=args.seed,
+        database_url=args.database_url,
+    ))
+    print_report(results)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved results to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
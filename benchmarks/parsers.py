@@ -0,0 +1,189 @@
+"""
+Benchmark the game score parsers on a generated corpus.
+
+Usage:
+    python -m benchmarks.parsers                    # print a report
+    python -m benchmarks.parsers --save-baseline    # record the current numbers
+    python -m benchmarks.parsers --check            # exit 1 on regression
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from game_scores import (
+    process_wordle_message,
+    process_connections_message,
+    process_strands_message,
+    process_game_score_message,
+)
+from benchmarks.corpus import generate_corpus
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+PARSERS: dict[str, Callable[[str], Optional[object]]] = {
+    "wordle": process_wordle_message,
+    "connections": process_connections_message,
+    "strands": process_strands_message,
+    "dispatch": process_game_score_message,
+}
+
+# Latencies below this many seconds are treated as noise when comparing worst cases
+LATENCY_SLACK = 0.0002
+
+
+def measure(
+    parse: Callable[[str], Optional[object]], messages: list[str], repeats: int
+) -> tuple[float, float]:
+    """
+    Measure a parser over a list of messages.
+
+    Args:
+        parse: The parser to benchmark
+        messages: Messages to feed the parser
+        repeats: Number of timing rounds; the best round is kept
+
+    Returns:
+        Tuple of (throughput in messages/sec, worst-case latency in seconds)
+    """
+    # Throughput is timed over the whole batch so timer overhead doesn't dominate
+    best_total = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for message in messages:
+            parse(message)
+        best_total = min(best_total, time.perf_counter() - start)
+
+    # Worst case is the slowest message, using each message's best round
+    per_message = [float("inf")] * len(messages)
+    for _ in range(repeats):
+        for i, message in enumerate(messages):
+            start = time.perf_counter()
+            parse(message)
+            per_message[i] = min(per_message[i], time.perf_counter() - start)
+    return len(messages) / best_total, max(per_message)
+
+
+def run(
+    corpus: dict[str, list[str]], repeats: int, only: Optional[set[tuple[str, str]]] = None
+) -> dict[str, dict[str, dict[str, float]]]:
+    """
+    Run every parser over every corpus category.
+
+    Args:
+        corpus: Messages by category, from generate_corpus()
+        repeats: Number of timing rounds per measurement
+        only: If given, only measure these (parser, category) pairs
+
+    Returns:
+        Results by parser and category
+    """
+    results = {}
+    for parser_name, parse in PARSERS.items():
+        results[parser_name] = {}
+        for category, messages in corpus.items():
+            if only is not None and (parser_name, category) not in only:
+                continue
+            throughput, worst = measure(parse, messages, repeats)
+            results[parser_name][category] = {"throughput": throughput, "worst_latency": worst}
+    return results
+
+
+def merge_best(results: dict, retry: dict) -> None:
+    """Keep the better throughput and worst-case latency of two runs in results."""
+    for parser_name, categories in retry.items():
+        for category, result in categories.items():
+            best = results[parser_name][category]
+            best["throughput"] = max(best["throughput"], result["throughput"])
+            best["worst_latency"] = min(best["worst_latency"], result["worst_latency"])
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> dict[tuple[str, str], str]:
+    """
+    Compare results to a baseline.
+
+    A result regresses if its throughput drops below baseline / (1 + tolerance)
+    or its worst-case latency rises above baseline * (1 + tolerance).
+
+    Returns:
+        Description of each regression by (parser, category)
+    """
+    regressions = {}
+    for parser_name, categories in baseline.items():
+        for category, expected in categories.items():
+            actual = results.get(parser_name, {}).get(category)
+            if actual is None:
+                continue
+            problems = []
+            if actual["throughput"] < expected["throughput"] / (1 + tolerance):
+                problems.append(
+                    f"throughput {actual['throughput']:,.0f} msg/s "
+                    f"(baseline {expected['throughput']:,.0f} msg/s)"
+                )
+            if actual["worst_latency"] > expected["worst_latency"] * (1 + tolerance) + LATENCY_SLACK:
+                problems.append(
+                    f"worst latency {actual['worst_latency'] * 1e6:,.1f} µs "
+                    f"(baseline {expected['worst_latency'] * 1e6:,.1f} µs)"
+                )
+            if problems:
+                regressions[(parser_name, category)] = f"{parser_name}/{category}: " + ", ".join(problems)
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    """Print a throughput and worst-case latency table."""
+    print(f"{'parser':<12} {'category':<18} {'msg/s':>12} {'worst µs':>10}")
+    for parser_name, categories in results.items():
+        for category, result in categories.items():
+            print(
+                f"{parser_name:<12} {category:<18} "
+                f"{result['throughput']:>12,.0f} {result['worst_latency'] * 1e6:>10,.1f}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the game score parsers")
+    parser.add_argument("--size", type=int, default=200, help="messages per corpus category")
+    parser.add_argument("--repeats", type=int, default=7, help="timing rounds per measurement")
+    parser.add_argument("--check", action="store_true", help="fail if results regress from the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed relative regression")
+    parser.add_argument("--retries", type=int, default=3, help="re-measurements before a regression counts")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="baseline file")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.size)
+    results = run(corpus, args.repeats)
+
+    regressions = {}
+    if args.check:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = find_regressions(results, baseline, args.tolerance)
+        # Timing noise is common on shared machines, so confirm regressions before failing
+        for _ in range(args.retries):
+            if not regressions:
+                break
+            merge_best(results, run(corpus, args.repeats, only=set(regressions)))
+            regressions = find_regressions(results, baseline, args.tolerance)
+
+    print_report(results)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved baseline to {args.baseline}")
+
+    if args.check:
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions.values():
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
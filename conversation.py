@@ -0,0 +1,128 @@
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+# Messages kept per channel; older ones fall off the end of the ring buffer
+HISTORY_SIZE = int(os.getenv("CONVERSATION_HISTORY_SIZE", "20"))
+# Approximate tokens of history sent along with each Grok question
+TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500"))
+# Longer messages are truncated before they are stored
+MAX_MESSAGE_CHARS = int(os.getenv("CONVERSATION_MAX_MESSAGE_CHARS", "1000"))
+# Channels without a message for this many seconds are forgotten
+IDLE_TTL = float(os.getenv("CONVERSATION_IDLE_TTL", "1800"))
+# Maximum number of channels remembered at once
+MAX_CHANNELS = int(os.getenv("CONVERSATION_MAX_CHANNELS", "5000"))
+
+
+class ChatMessage:
+    """A remembered channel message."""
+    __slots__ = ("message_id", "author", "content", "from_bot", "tokens")
+
+    def __init__(self, message_id: int, author: str, content: str, from_bot: bool):
+        self.message_id = message_id
+        self.author = author
+        self.content = content
+        self.from_bot = from_bot
+        self.tokens = estimate_tokens(content) + (0 if from_bot else estimate_tokens(author))
+
+
+class _ChannelHistory:
+    __slots__ = ("messages", "last_active")
+
+    def __init__(self):
+        self.messages: deque[ChatMessage] = deque(maxlen=HISTORY_SIZE)
+        self.last_active = 0.0
+
+
+# Channel histories in order of last activity, so idle channels are always at the front
+_channels: OrderedDict[int, _ChannelHistory] = OrderedDict()
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens in a text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _evict(now: float) -> None:
+    """Forget idle channels, then the least recently active ones while over MAX_CHANNELS."""
+    while _channels:
+        channel_id, history = next(iter(_channels.items()))
+        if now - history.last_active < IDLE_TTL and len(_channels) <= MAX_CHANNELS:
+            break
+        del _channels[channel_id]
+
+
+def remember(channel_id: int, message_id: int, author: str, content: str, from_bot: bool = False) -> None:
+    """
+    Add a message to a channel's history.
+
+    Args:
+        channel_id: The channel the message was sent in
+        message_id: The message's id, used to order and exclude messages
+        author: Display name of the author
+        content: The message text, truncated to MAX_MESSAGE_CHARS
+        from_bot: Whether the bot itself sent the message
+    """
+    content = content.strip()
+    if not content:
+        return
+    if len(content) > MAX_MESSAGE_CHARS:
+        content = content[:MAX_MESSAGE_CHARS] + "…"
+
+    now = time.monotonic()
+    history = _channels.get(channel_id)
+    if history is None:
+        history = _channels[channel_id] = _ChannelHistory()
+    else:
+        _channels.move_to_end(channel_id)
+    history.messages.append(ChatMessage(message_id, author, content, from_bot))
+    history.last_active = now
+    _evict(now)
+
+
+def recent(channel_id: int, before_id: Optional[int] = None, token_budget: Optional[int] = None) -> list[ChatMessage]:
+    """
+    Get the newest messages of a channel that fit in a token budget.
+
+    Args:
+        channel_id: The channel to get messages for
+        before_id: Only include messages older than this message id
+        token_budget: Maximum estimated tokens, defaults to CONVERSATION_TOKEN_BUDGET
+
+    Returns:
+        Messages in the order they were sent, oldest first
+    """
+    history = _channels.get(channel_id)
+    if history is None or time.monotonic() - history.last_active >= IDLE_TTL:
+        return []
+
+    budget = TOKEN_BUDGET if token_budget is None else token_budget
+    window = []
+    for message in reversed(history.messages):
+        if before_id is not None and message.message_id >= before_id:
+            continue
+        budget -= message.tokens
+        if budget < 0:
+            break
+        window.append(message)
+    window.reverse()
+    return window
+
+
+def as_chat_history(messages: list[ChatMessage]) -> list[tuple[str, str]]:
+    """Convert remembered messages to (role, content) pairs for llm.complete(), naming each user."""
+    return [
+        ("assistant", message.content) if message.from_bot else ("user", f"{message.author}: {message.content}")
+        for message in messages
+    ]
+
+
+def forget(channel_id: int) -> None:
+    """Forget a channel's history."""
+    _channels.pop(channel_id, None)
+
+
+def channel_count() -> int:
+    """Return the number of channels currently remembered."""
+    return len(_channels)
@@ -1,14 +1,35 @@
 import os
 import enum
 import uuid
-from datetime import datetime, timezone
-from typing import Optional
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
 
-from sqlalchemy import BigInteger, Text, Enum, DateTime, event
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    BigInteger, Integer, SmallInteger, Boolean, Text, Enum, Date, DateTime, Index, UniqueConstraint,
+    Uuid, delete, event, func, insert, select,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+import metrics
+from game_scores import GameScore
+
+
+# Range-partition bot_messages by month of created_at. Postgres only, and only
+# takes effect when the table is first created.
+BOT_MESSAGES_PARTITIONED = os.getenv("BOT_MESSAGES_PARTITIONED") == "true"
+# Number of future monthly partitions kept ready ahead of the current month
+BOT_MESSAGES_PARTITIONS_AHEAD = int(os.getenv("BOT_MESSAGES_PARTITIONS_AHEAD", "2"))
+# Monthly partitions older than this many months are dropped by the daily maintenance job,
+# without archiving their rows; 0 keeps them all
+BOT_MESSAGES_RETENTION_MONTHS = int(os.getenv("BOT_MESSAGES_RETENTION_MONTHS") or 0)
+
 
 class ActionType(enum.Enum):
     """Enum for bot message action types."""
@@ -20,6 +41,49 @@ class ActionType(enum.Enum):
     HAMSTERDLE = "hamsterdle"
     SET_PROMPT = "set_prompt"
     SHOW_PROMPT = "show_prompt"
+    PROMPT_HISTORY = "prompt_history"
+    ROLLBACK_PROMPT = "rollback_prompt"
+    BOT_STATS = "bot_stats"
+    SET_LEADERBOARD_CHANNEL = "set_leaderboard_channel"
+    BACKFILL_SCORES = "backfill_scores"
+    STATS = "stats"
+
+
+class GameType(enum.Enum):
+    """Enum for games with recorded scores."""
+    WORDLE = "wordle"
+    CONNECTIONS = "connections"
+    STRANDS = "strands"
+
+
+class StatPeriod(enum.Enum):
+    """Enum for the time windows game stats are rolled up over."""
+    ALL = "all"
+    DAY = "day"
+    WEEK = "week"
+
+
+# Period start used for all-time stats, which have a single window
+ALL_TIME_START = date(1970, 1, 1)
+
+# user_id of the per-server totals row in game_stats
+GUILD_TOTAL_USER_ID = 0
+
+# Distribution bucket for a game without a score, i.e. a lost Wordle
+NO_SCORE_BUCKET = -1
+
+# Day and week stats whose window ended more than this many days ago are deleted by the
+# daily maintenance job; all-time stats are kept
+GAME_STATS_RETENTION_DAYS = int(os.getenv("GAME_STATS_RETENTION_DAYS", "35"))
+
+
+def stat_period_start(period: StatPeriod, day: date) -> date:
+    """Get the first day of the period window containing a day (weeks start on Monday)."""
+    if period is StatPeriod.DAY:
+        return day
+    if period is StatPeriod.WEEK:
+        return day - timedelta(days=day.weekday())
+    return ALL_TIME_START
 
 
 class Base(DeclarativeBase):
@@ -29,9 +93,20 @@ class Base(DeclarativeBase):
 class BotMessage(Base):
     """Model for storing bot message interactions for analytics."""
     __tablename__ = "bot_messages"
+    __table_args__ = (
+        # Per-server history and retention scans
+        Index("ix_bot_messages_guild_created", "guild_id", "created_at"),
+        # Per-server usage of one feature, e.g. mentions over the last week
+        Index("ix_bot_messages_guild_action_created", "guild_id", "action_type", "created_at"),
+        # Per-user history
+        Index("ix_bot_messages_user_created", "user_id", "created_at"),
+        # Global time range scans, e.g. archival of old rows
+        Index("ix_bot_messages_created", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"} if BOT_MESSAGES_PARTITIONED else {},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        Uuid, primary_key=True, default=uuid.uuid4
     )
     guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     guild_name: Mapped[str] = mapped_column(Text, nullable=False)
@@ -45,8 +120,10 @@ class BotMessage(Base):
     action_type: Mapped[ActionType] = mapped_column(
         Enum(ActionType, name="action_type_enum"), nullable=False
     )
+    # Part of the primary key when partitioned, because a partitioned table's key must
+    # include the partition column
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+        DateTime(timezone=True), primary_key=BOT_MESSAGES_PARTITIONED, default=lambda: datetime.now(timezone.utc)
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -60,7 +137,7 @@ class ServerPrompt(Base):
     __tablename__ = "server_prompts"
 
     id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+        Uuid, primary_key=True, default=uuid.uuid4
     )
     guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True)
     guild_name: Mapped[str] = mapped_column(Text, nullable=False)
@@ -78,36 +155,275 @@ class ServerPrompt(Base):
     )
 
 
+class ServerPromptVersion(Base):
+    """Model for the append-only history of every prompt set for a server."""
+    __tablename__ = "server_prompt_versions"
+    __table_args__ = (
+        # Also serves the newest-first history lookup for a server
+        UniqueConstraint("guild_id", "version", name="uq_server_prompt_versions_guild_version"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, default=uuid.uuid4
+    )
+    guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Numbered from 1 within each server
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_name: Mapped[str] = mapped_column(Text, nullable=False)
+    user_display_name: Mapped[str] = mapped_column(Text, nullable=False)
+    system_prompt: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class LeaderboardChannel(Base):
+    """Model for the channel each server gets the daily leaderboard posted in."""
+    __tablename__ = "leaderboard_channels"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, default=uuid.uuid4
+    )
+    guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True)
+    guild_name: Mapped[str] = mapped_column(Text, nullable=False)
+    # NULL when the server turned the leaderboard off
+    channel_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    channel_name: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_name: Mapped[str] = mapped_column(Text, nullable=False)
+    user_display_name: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
+class GameScoreRecord(Base):
+    """Model for storing parsed game scores."""
+    __tablename__ = "game_scores"
+    __table_args__ = (
+        # A user's score for a puzzle is only recorded once per server
+        UniqueConstraint(
+            "guild_id", "user_id", "game", "puzzle_number",
+            name="uq_game_scores_guild_user_game_puzzle",
+        ),
+        # Leaderboards: every score in a server for a game, by puzzle
+        Index("ix_game_scores_guild_game_puzzle", "guild_id", "game", "puzzle_number"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid, primary_key=True, default=uuid.uuid4
+    )
+    guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    channel_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    user_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    message_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    game: Mapped[GameType] = mapped_column(
+        Enum(GameType, name="game_type_enum"), nullable=False
+    )
+    puzzle_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    won: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    guesses: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    mistakes: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    hints: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    grid: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+
+class BackfillCheckpoint(Base):
+    """Model for the progress of a channel's game score backfill, so an interrupted one can resume."""
+    __tablename__ = "backfill_checkpoints"
+
+    channel_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # Newest message already processed; the backfill continues after it
+    last_message_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    messages_scanned: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    scores_recorded: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completed: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
+class BotSetting(Base):
+    """Model for small values the bot keeps between restarts, which the dyno's filesystem doesn't."""
+    __tablename__ = "bot_settings"
+
+    key: Mapped[str] = mapped_column(Text, primary_key=True)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+
+class GameStat(Base):
+    """Model for per-server, per-user game aggregates, updated as each score is recorded."""
+    __tablename__ = "game_stats"
+
+    # Primary key order matches the /stats lookup: one server, game and period window
+    guild_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    game: Mapped[GameType] = mapped_column(
+        Enum(GameType, name="game_type_enum"), primary_key=True
+    )
+    period: Mapped[StatPeriod] = mapped_column(
+        Enum(StatPeriod, name="stat_period_enum"), primary_key=True
+    )
+    period_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    plays: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    wins: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Sum and count of GameScore.score, for the average
+    score_total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    scored_plays: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.plays if self.plays else 0.0
+
+    @property
+    def average_score(self) -> Optional[float]:
+        return self.score_total / self.scored_plays if self.scored_plays else None
+
+
+class GameScoreBucket(Base):
+    """Model for per-server score distributions, updated as each score is recorded."""
+    __tablename__ = "game_score_buckets"
+
+    guild_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    game: Mapped[GameType] = mapped_column(
+        Enum(GameType, name="game_type_enum"), primary_key=True
+    )
+    period: Mapped[StatPeriod] = mapped_column(
+        Enum(StatPeriod, name="stat_period_enum"), primary_key=True
+    )
+    period_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    bucket: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 # Database engine and session factory (initialized lazily)
 _engine = None
 _async_session_factory = None
 
+# Write-behind logging: log_message only enqueues, a background task inserts in batches
+LOG_WRITE_BEHIND = os.getenv("DB_LOG_WRITE_BEHIND", "true") == "true"
+# Maximum number of log records buffered in memory
+LOG_QUEUE_SIZE = int(os.getenv("DB_LOG_QUEUE_SIZE", "10000"))
+# Flush once this many records are buffered...
+LOG_BATCH_SIZE = int(os.getenv("DB_LOG_BATCH_SIZE", "200"))
+# ...or once the oldest buffered record has waited this many seconds
+LOG_FLUSH_INTERVAL = float(os.getenv("DB_LOG_FLUSH_INTERVAL", "2.0"))
+# What to do when the queue is full: "drop_newest", "drop_oldest" or "block"
+LOG_OVERFLOW_POLICY = os.getenv("DB_LOG_OVERFLOW_POLICY", "drop_oldest")
+
+_log_queue: Optional[asyncio.Queue] = None
+_log_flusher: Optional[asyncio.Task] = None
+# Background task creating missing indexes on Postgres after startup
+_index_builder: Optional[asyncio.Task] = None
+_dropped_log_records = 0
+
+# Process-local cache of server prompts keyed by guild_id. A cached None means
+# the guild has no custom prompt, so guilds on the default prompt are covered too.
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", "1024"))
+PROMPT_CACHE_TTL = float(os.getenv("PROMPT_CACHE_TTL", "3600"))
+
+_prompt_cache: OrderedDict[int, tuple[Optional[str], float]] = OrderedDict()
+
+# Process-local copy of the leaderboard_channels table (guild_id -> channel_id),
+# loaded on first use and kept current by set_leaderboard_channel(). None until loaded.
+_leaderboard_channels: Optional[dict[int, int]] = None
+
+
+# Pragmas applied to every SQLite connection. WAL lets readers run alongside the
+# single writer, and synchronous=NORMAL is crash-safe in WAL mode while only
+# syncing at checkpoints instead of on every commit.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": "5000",
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": "-16000",  # KiB, i.e. a 16 MB page cache
+}
+
 
 def _get_database_url() -> str:
-    """Get the database URL, converting to async format if needed."""
+    """
+    Get the database URL, converting to async format if needed.
+    
+    postgresql:// URLs use asyncpg, sqlite:// URLs (e.g. sqlite:///bot.db) use aiosqlite.
+    """
     url = os.getenv("DATABASE_URL", "")
     # Convert postgresql:// to postgresql+asyncpg:// for async driver
     if url.startswith("postgresql://"):
         url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif url.startswith("sqlite://"):
+        url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
     return url
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _create_engine(database_url: str):
+    """Create the async engine, tuning SQLite connections as they are opened."""
+    engine = create_async_engine(database_url, echo=False)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def _upsert(model):
+    """Start an INSERT that supports ON CONFLICT clauses in the engine's dialect."""
+    if _engine is not None and _engine.dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return pg_insert(model)
+
+
 async def init_db() -> None:
     """Initialize the database connection and create tables."""
-    global _engine, _async_session_factory
+    global _engine, _async_session_factory, _leaderboard_channels
     
+    _leaderboard_channels = None
     try:
         database_url = _get_database_url()
         if not database_url:
             print("Warning: DATABASE_URL not set, database features disabled")
             return
         
-        _engine = create_async_engine(database_url, echo=False)
+        _engine = _create_engine(database_url)
         _async_session_factory = async_sessionmaker(_engine, expire_on_commit=False)
         
         # Create tables if they don't exist
         async with _engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await _migrate_enum_types(conn)
+            await _backfill_prompt_versions(conn)
+            if conn.dialect.name != "postgresql":
+                await conn.run_sync(_create_missing_indexes)
+            await _ensure_bot_message_partitions(conn)
+        
+        if _engine.dialect.name == "postgresql":
+            # Building an index on a large existing table takes a while, so don't hold up startup
+            _start_index_builder()
+        if LOG_WRITE_BEHIND:
+            _start_log_flusher()
         
         print("Database initialized successfully")
     except Exception as e:
@@ -116,12 +432,412 @@ async def init_db() -> None:
         _async_session_factory = None
 
 
+async def _migrate_enum_types(conn) -> None:
+    """Add enum members introduced since a Postgres enum type was first created."""
+    if conn.dialect.name != "postgresql":
+        return
+    from sqlalchemy import text
+    
+    enum_types = {
+        column.type.name: column.type
+        for table in Base.metadata.sorted_tables
+        for column in table.columns
+        if isinstance(column.type, Enum)
+    }
+    for name, enum_type in enum_types.items():
+        for label in enum_type.enums:
+            await conn.execute(text(f"ALTER TYPE {name} ADD VALUE IF NOT EXISTS '{label}'"))
+
+
+async def _backfill_prompt_versions(conn) -> None:
+    """Record the current prompt as version 1 for servers whose prompt predates the prompt history."""
+    has_versions = select(ServerPromptVersion.guild_id).where(
+        ServerPromptVersion.guild_id == ServerPrompt.guild_id
+    ).exists()
+    result = await conn.execute(select(ServerPrompt).where(~has_versions))
+    # Ids are generated here, since the model's UUID default isn't available to INSERT ... SELECT
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "guild_id": prompt.guild_id,
+            "version": 1,
+            "user_id": prompt.user_id,
+            "user_name": prompt.user_name,
+            "user_display_name": prompt.user_display_name,
+            "system_prompt": prompt.system_prompt,
+            "created_at": prompt.updated_at or prompt.created_at,
+        }
+        for prompt in result.all()
+    ]
+    if rows:
+        await conn.execute(insert(ServerPromptVersion), rows)
+        print(f"Recorded the existing prompt of {len(rows)} servers as version 1")
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    """Create indexes added to models after their tables were first created."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def _create_missing_indexes_concurrently() -> None:
+    """
+    Create indexes added to models after their tables were first created, on Postgres.
+    
+    Indexes are built with CREATE INDEX CONCURRENTLY outside a transaction, so
+    writes to the table carry on while they build. A partitioned table doesn't
+    support that, so its indexes get a plain CREATE INDEX.
+    Gracefully handles database errors without crashing.
+    """
+    from sqlalchemy import text
+    from sqlalchemy.schema import CreateIndex
+    
+    try:
+        async with _engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            # A concurrent build that was interrupted leaves an invalid index behind,
+            # which IF NOT EXISTS would then skip
+            result = await conn.execute(
+                text("SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE NOT i.indisvalid")
+            )
+            invalid = {name for (name,) in result.all()}
+            partitioned = await _is_bot_messages_partitioned(conn)
+            
+            for table in Base.metadata.sorted_tables:
+                concurrently = not (table is BotMessage.__table__ and partitioned)
+                for index in table.indexes:
+                    if index.name in invalid:
+                        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+                    sql = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+                    if concurrently:
+                        sql = sql.replace("INDEX", "INDEX CONCURRENTLY", 1)
+                    await conn.execute(text(sql))
+    except Exception as e:
+        print(f"Error creating missing indexes: {e}")
+
+
+def _start_index_builder() -> None:
+    global _index_builder
+    if _index_builder is None or _index_builder.done():
+        _index_builder = asyncio.create_task(_create_missing_indexes_concurrently())
+
+
+def _month_start(day: date, months: int = 0) -> date:
+    """Get the first day of the month `months` after the month containing a day."""
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _bot_message_partition_name(month: date) -> str:
+    return f"{BotMessage.__tablename__}_p{month:%Y%m}"
+
+
+async def _is_bot_messages_partitioned(conn) -> bool:
+    from sqlalchemy import text
+    
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ),
+        {"name": BotMessage.__tablename__},
+    )
+    return result.first() is not None
+
+
+async def _ensure_bot_message_partitions(conn) -> None:
+    """Create the monthly bot_messages partitions from this month to a few months ahead."""
+    if conn.dialect.name != "postgresql" or not BOT_MESSAGES_PARTITIONED:
+        return
+    from sqlalchemy import text
+    
+    if not await _is_bot_messages_partitioned(conn):
+        print(
+            "Warning: bot_messages already exists as a regular table, "
+            "monthly partitioning is only applied to a newly created table"
+        )
+        return
+    
+    this_month = _month_start(datetime.now(timezone.utc).date())
+    for months in range(BOT_MESSAGES_PARTITIONS_AHEAD + 1):
+        start = _month_start(this_month, months)
+        end = _month_start(this_month, months + 1)
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {_bot_message_partition_name(start)} "
+                f"PARTITION OF {BotMessage.__tablename__} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+
+
+async def maintain_bot_message_partitions() -> None:
+    """
+    Create upcoming monthly bot_messages partitions, and drop those older than
+    BOT_MESSAGES_RETENTION_MONTHS if it is set; meant to run daily.
+    """
+    if _engine is None:
+        return
+    try:
+        async with _engine.begin() as conn:
+            await _ensure_bot_message_partitions(conn)
+    except Exception as e:
+        print(f"Error maintaining bot_messages partitions: {e}")
+    
+    if BOT_MESSAGES_RETENTION_MONTHS:
+        this_month = _month_start(datetime.now(timezone.utc).date())
+        dropped = await drop_bot_message_partitions(_month_start(this_month, -BOT_MESSAGES_RETENTION_MONTHS))
+        if dropped:
+            print(f"Dropped bot_messages partitions: {', '.join(dropped)}")
+
+
+async def drop_bot_message_partitions(before: date) -> list[str]:
+    """
+    Drop monthly bot_messages partitions that end on or before a date.
+    
+    Dropping a whole partition is far cheaper than deleting its rows.
+    
+    Returns the names of the dropped partitions.
+    Gracefully handles database errors without crashing.
+    """
+    if _engine is None or _engine.dialect.name != "postgresql" or not BOT_MESSAGES_PARTITIONED:
+        return []
+    from sqlalchemy import text
+    
+    prefix = f"{BotMessage.__tablename__}_p"
+    dropped = []
+    try:
+        async with _engine.begin() as conn:
+            result = await conn.execute(
+                text(
+                    "SELECT c.relname FROM pg_inherits i "
+                    "JOIN pg_class c ON c.oid = i.inhrelid "
+                    "JOIN pg_class p ON p.oid = i.inhparent "
+                    "WHERE p.relname = :name"
+                ),
+                {"name": BotMessage.__tablename__},
+            )
+            for (name,) in result.all():
+                suffix = name.removeprefix(prefix)
+                if len(suffix) != 6 or not suffix.isdigit():
+                    continue
+                month = date(int(suffix[:4]), int(suffix[4:]), 1)
+                if _month_start(month, 1) <= before:
+                    await conn.execute(text(f"DROP TABLE {name}"))
+                    dropped.append(name)
+        return dropped
+    except Exception as e:
+        print(f"Error dropping bot_messages partitions: {e}")
+        return []
+
+
+async def stream_bot_messages(before: datetime, chunk_size: int) -> AsyncIterator[list[Row]]:
+    """
+    Stream the bot_messages rows created before a time, oldest first.
+    
+    Rows are read through a server-side cursor, so only one chunk is held in
+    memory at a time. They are plain rows with BotMessage's columns, not
+    tracked ORM objects.
+    
+    Args:
+        before: Only rows created before this time
+        chunk_size: Number of rows per chunk
+    
+    Yields:
+        Lists of at most chunk_size rows
+    
+    Gracefully handles database errors without crashing; the stream just ends early.
+    """
+    session = _get_session()
+    if session is None:
+        return
+    
+    try:
+        async with session:
+            stmt = (
+                select(*BotMessage.__table__.columns)
+                .where(BotMessage.created_at < before)
+                .order_by(BotMessage.created_at, BotMessage.id)
+                .execution_options(yield_per=chunk_size)
+            )
+            result = await session.stream(stmt)
+            async for rows in result.partitions():
+                yield rows
+    except Exception as e:
+        print(f"Error streaming bot messages: {e}")
+        metrics.increment("errors", "stage", "stream_bot_messages")
+
+
+async def delete_bot_messages(rows: list[Row], batch_size: int) -> int:
+    """
+    Delete bot_messages rows by primary key, one batch per transaction.
+    
+    Returns the number of rows deleted, counting only batches that succeeded.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return 0
+    
+    deleted = 0
+    try:
+        async with session:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                result = await session.execute(
+                    delete(BotMessage).where(
+                        BotMessage.id.in_([row.id for row in batch]),
+                        # Lets Postgres skip partitions that can't hold the batch
+                        BotMessage.created_at.between(
+                            min(row.created_at for row in batch), max(row.created_at for row in batch)
+                        ),
+                    )
+                )
+                await session.commit()
+                deleted += result.rowcount
+    except Exception as e:
+        print(f"Error deleting bot messages: {e}")
+        metrics.increment("errors", "stage", "delete_bot_messages")
+    return deleted
+
+
 async def close_db() -> None:
-    """Close the database connection."""
-    global _engine
+    """Flush any buffered log records and close the database connection."""
+    global _engine, _async_session_factory, _leaderboard_channels, _log_queue, _log_flusher, _index_builder
+    if _index_builder is not None:
+        # An interrupted concurrent build is dropped and retried on the next start
+        _index_builder.cancel()
+        try:
+            await _index_builder
+        except asyncio.CancelledError:
+            pass
+        _index_builder = None
+    if _log_flusher is not None:
+        # Wake the flusher with a sentinel; it drains the whole queue before exiting
+        await _log_queue.put(None)
+        await _log_flusher
+        _log_flusher = None
+        _log_queue = None
     if _engine:
         await _engine.dispose()
         _engine = None
+    # Without this, later callers would get sessions on the disposed engine
+    _async_session_factory = None
+    _leaderboard_channels = None
+
+
+def _start_log_flusher() -> None:
+    """Create the log queue and start the background flush task."""
+    global _log_queue, _log_flusher
+    if _log_flusher is not None:
+        return
+    _log_queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+    _log_flusher = asyncio.create_task(_flush_log_queue())
+
+
+def log_queue_depth() -> int:
+    """Return the number of log records waiting to be written."""
+    return _log_queue.qsize() if _log_queue is not None else 0
+
+
+def dropped_log_records() -> int:
+    """Return the number of log records dropped because the queue was full."""
+    return _dropped_log_records
+
+
+def _get_cached_prompt(guild_id: int) -> tuple[bool, Optional[str]]:
+    """Look up a prompt in the cache, returning (hit, prompt)."""
+    entry = _prompt_cache.get(guild_id)
+    if entry is None:
+        return False, None
+    prompt, expires_at = entry
+    if time.monotonic() >= expires_at:
+        del _prompt_cache[guild_id]
+        return False, None
+    _prompt_cache.move_to_end(guild_id)
+    return True, prompt
+
+
+def _cache_prompt(guild_id: int, prompt: Optional[str]) -> None:
+    """Store a prompt (or its absence) in the cache, evicting the least recently used."""
+    _prompt_cache[guild_id] = (prompt, time.monotonic() + PROMPT_CACHE_TTL)
+    _prompt_cache.move_to_end(guild_id)
+    while len(_prompt_cache) > PROMPT_CACHE_SIZE:
+        _prompt_cache.popitem(last=False)
+
+
+async def _write_log_batch(rows: list[dict]) -> None:
+    """Insert a batch of log records in a single multi-row statement."""
+    session = _get_session()
+    if session is None:
+        return
+    try:
+        async with session:
+            await session.execute(insert(BotMessage), rows)
+            await session.commit()
+    except Exception as e:
+        print(f"Error writing {len(rows)} log records to database: {e}")
+        metrics.increment("errors", "stage", "log_message")
+
+
+async def _flush_log_queue() -> None:
+    """Background task that batches queued log records by size or time."""
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        row = await _log_queue.get()
+        if row is None:
+            break
+        batch = [row]
+        deadline = loop.time() + LOG_FLUSH_INTERVAL
+        while len(batch) < LOG_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(_log_queue.get(), timeout)
+            except TimeoutError:
+                break
+            if row is None:
+                stopping = True
+                break
+            batch.append(row)
+        await _write_log_batch(batch)
+
+    # Drain whatever is still buffered before shutting down
+    batch = []
+    while not _log_queue.empty():
+        row = _log_queue.get_nowait()
+        if row is not None:
+            batch.append(row)
+        if len(batch) >= LOG_BATCH_SIZE:
+            await _write_log_batch(batch)
+            batch = []
+    if batch:
+        await _write_log_batch(batch)
+
+
+async def _enqueue_log_record(row: dict) -> bool:
+    """Queue a log record for the flusher, applying the overflow policy."""
+    global _dropped_log_records
+    if LOG_OVERFLOW_POLICY == "block":
+        await _log_queue.put(row)
+        return True
+    try:
+        _log_queue.put_nowait(row)
+        return True
+    except asyncio.QueueFull:
+        _dropped_log_records += 1
+        if LOG_OVERFLOW_POLICY != "drop_oldest":
+            return False
+    # Make room by discarding the oldest buffered record
+    try:
+        _log_queue.get_nowait()
+        _log_queue.put_nowait(row)
+        return True
+    except (asyncio.QueueEmpty, asyncio.QueueFull):
+        return False
 
 
 def _get_session() -> Optional[AsyncSession]:
@@ -146,9 +862,29 @@ async def log_message(
     """
     Log a bot message interaction to the database.
     
-    Returns True if successful, False otherwise.
+    In write-behind mode the record is only queued and written later in a batch.
+    
+    Returns True if successful (or queued), False otherwise.
     Gracefully handles database errors without crashing.
     """
+    metrics.increment("actions", "action", action_type.value)
+    if _log_flusher is not None:
+        return await _enqueue_log_record(
+            dict(
+                guild_id=guild_id,
+                guild_name=guild_name,
+                channel_id=channel_id,
+                channel_name=channel_name,
+                user_id=user_id,
+                user_name=user_name,
+                user_display_name=user_display_name,
+                user_message=user_message,
+                bot_response=bot_response,
+                action_type=action_type,
+                created_at=datetime.now(timezone.utc),
+            )
+        )
+    
     session = _get_session()
     if session is None:
         return False
@@ -172,6 +908,7 @@ async def log_message(
             return True
     except Exception as e:
         print(f"Error logging message to database: {e}")
+        metrics.increment("errors", "stage", "log_message")
         return False
 
 
@@ -184,7 +921,13 @@ async def upsert_server_prompt(
     system_prompt: str,
 ) -> bool:
     """
-    Insert or update a server's system prompt.
+    Insert or update a server's system prompt and append it to the server's prompt history.
+    
+    Two statements run in one transaction: an INSERT ... ON CONFLICT DO UPDATE
+    of the current prompt, so concurrent updates for the same server can't race
+    to insert it twice, then an insert of the history row numbered MAX + 1. If
+    two updates race for the same version number, the unique constraint makes
+    one of them fail and roll back as a whole.
     
     Returns True if successful, False otherwise.
     Gracefully handles database errors without crashing.
@@ -193,64 +936,652 @@ async def upsert_server_prompt(
     if session is None:
         return False
     
+    now = datetime.now(timezone.utc)
     try:
         async with session:
-            from sqlalchemy import select
-            
-            # Check if prompt exists for this guild
-            stmt = select(ServerPrompt).where(ServerPrompt.guild_id == guild_id)
-            result = await session.execute(stmt)
-            existing = result.scalar_one_or_none()
+            stmt = _upsert(ServerPrompt).values(
+                guild_id=guild_id,
+                guild_name=guild_name,
+                user_id=user_id,
+                user_name=user_name,
+                user_display_name=user_display_name,
+                system_prompt=system_prompt,
+                created_at=now,
+                updated_at=now,
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["guild_id"],
+                    set_={
+                        column: getattr(stmt.excluded, column)
+                        for column in (
+                            "guild_name", "user_id", "user_name", "user_display_name",
+                            "system_prompt", "updated_at",
+                        )
+                    },
+                )
+            )
             
-            if existing:
-                # Update existing prompt
-                existing.guild_name = guild_name
-                existing.user_id = user_id
-                existing.user_name = user_name
-                existing.user_display_name = user_display_name
-                existing.system_prompt = system_prompt
-                existing.updated_at = datetime.now(timezone.utc)
-            else:
-                # Create new prompt
-                new_prompt = ServerPrompt(
+            next_version = (
+                select(func.coalesce(func.max(ServerPromptVersion.version), 0) + 1)
+                .where(ServerPromptVersion.guild_id == guild_id)
+                .scalar_subquery()
+            )
+            await session.execute(
+                insert(ServerPromptVersion).values(
                     guild_id=guild_id,
-                    guild_name=guild_name,
+                    version=next_version,
                     user_id=user_id,
                     user_name=user_name,
                     user_display_name=user_display_name,
                     system_prompt=system_prompt,
+                    created_at=now,
                 )
-                session.add(new_prompt)
+            )
             
             await session.commit()
+            _cache_prompt(guild_id, system_prompt)
             return True
     except Exception as e:
         print(f"Error upserting server prompt: {e}")
         return False
 
 
+async def list_server_prompt_versions(guild_id: int, limit: int = 10) -> list[ServerPromptVersion]:
+    """
+    List a server's prompt history, newest first.
+    
+    Returns the prompt versions, or an empty list if there are none.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return []
+    
+    try:
+        async with session:
+            stmt = (
+                select(ServerPromptVersion)
+                .where(ServerPromptVersion.guild_id == guild_id)
+                .order_by(ServerPromptVersion.version.desc())
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return list(result.scalars().all())
+    except Exception as e:
+        print(f"Error listing server prompt versions: {e}")
+        return []
+
+
+async def rollback_server_prompt(
+    guild_id: int,
+    guild_name: str,
+    version: int,
+    user_id: int,
+    user_name: str,
+    user_display_name: str,
+) -> Optional[str]:
+    """
+    Restore an earlier prompt version as a server's current prompt.
+    
+    The restored prompt is appended to the history as a new version, so the
+    history stays append-only and a rollback can itself be rolled back.
+    
+    Returns the restored prompt if successful, None otherwise.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return None
+    
+    try:
+        async with session:
+            stmt = select(ServerPromptVersion.system_prompt).where(
+                ServerPromptVersion.guild_id == guild_id,
+                ServerPromptVersion.version == version,
+            )
+            result = await session.execute(stmt)
+            prompt = result.scalar_one_or_none()
+    except Exception as e:
+        print(f"Error getting server prompt version: {e}")
+        return None
+    
+    if prompt is None:
+        return None
+    if not await upsert_server_prompt(
+        guild_id=guild_id,
+        guild_name=guild_name,
+        user_id=user_id,
+        user_name=user_name,
+        user_display_name=user_display_name,
+        system_prompt=prompt,
+    ):
+        return None
+    return prompt
+
+
 async def get_server_prompt(guild_id: int) -> Optional[str]:
     """
     Get the system prompt for a server.
     
+    Answers from the in-memory prompt cache when possible.
+    
     Returns the prompt string if found, None otherwise.
     Gracefully handles database errors without crashing.
     """
+    hit, prompt = _get_cached_prompt(guild_id)
+    if hit:
+        return prompt
+    
     session = _get_session()
     if session is None:
         return None
     
     try:
         async with session:
-            from sqlalchemy import select
-            
             stmt = select(ServerPrompt.system_prompt).where(
                 ServerPrompt.guild_id == guild_id
             )
             result = await session.execute(stmt)
             prompt = result.scalar_one_or_none()
+            _cache_prompt(guild_id, prompt)
             return prompt
     except Exception as e:
         print(f"Error getting server prompt: {e}")
+        metrics.increment("errors", "stage", "get_server_prompt")
+        return None
+
+
+async def set_leaderboard_channel(
+    guild_id: int,
+    guild_name: str,
+    channel_id: Optional[int],
+    channel_name: Optional[str],
+    user_id: int,
+    user_name: str,
+    user_display_name: str,
+) -> bool:
+    """
+    Set the channel a server's daily leaderboard is posted in.
+    
+    Args:
+        guild_id: The server to configure
+        guild_name: Name of the server
+        channel_id: The channel to post in, None to stop posting the leaderboard
+        channel_name: Name of the channel, None when channel_id is None
+        user_id: The user making the change
+        user_name: Username of the user
+        user_display_name: Display name of the user
+    
+    Returns True if successful, False otherwise.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return False
+    
+    now = datetime.now(timezone.utc)
+    try:
+        async with session:
+            # Turning it off keeps the row, so the server isn't treated as never configured
+            stmt = _upsert(LeaderboardChannel).values(
+                guild_id=guild_id,
+                guild_name=guild_name,
+                channel_id=channel_id,
+                channel_name=channel_name,
+                user_id=user_id,
+                user_name=user_name,
+                user_display_name=user_display_name,
+                created_at=now,
+                updated_at=now,
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["guild_id"],
+                    set_={
+                        column: getattr(stmt.excluded, column)
+                        for column in (
+                            "guild_name", "channel_id", "channel_name", "user_id", "user_name",
+                            "user_display_name", "updated_at",
+                        )
+                    },
+                )
+            )
+            await session.commit()
+    except Exception as e:
+        print(f"Error setting leaderboard channel: {e}")
+        return False
+    
+    if _leaderboard_channels is not None:
+        _leaderboard_channels[guild_id] = channel_id
+    return True
+
+
+async def get_leaderboard_channels() -> Optional[dict[int, Optional[int]]]:
+    """
+    Get the channel configured for the daily leaderboard in every server.
+    
+    The table is read once and then served from memory.
+    
+    Returns a copy of the guild_id -> channel_id mapping, where None means the
+    server turned the leaderboard off. Servers that never configured it are
+    missing. Returns None without a database or on errors.
+    Gracefully handles database errors without crashing.
+    """
+    global _leaderboard_channels
+    if _leaderboard_channels is not None:
+        return dict(_leaderboard_channels)
+    
+    session = _get_session()
+    if session is None:
+        return None
+    
+    try:
+        async with session:
+            stmt = select(LeaderboardChannel.guild_id, LeaderboardChannel.channel_id)
+            result = await session.execute(stmt)
+            _leaderboard_channels = {guild_id: channel_id for guild_id, channel_id in result.all()}
+            return dict(_leaderboard_channels)
+    except Exception as e:
+        print(f"Error getting leaderboard channels: {e}")
+        metrics.increment("errors", "stage", "get_leaderboard_channels")
+        return None
+
+
+async def get_bot_setting(key: str) -> Optional[str]:
+    """
+    Get a value saved with set_bot_setting.
+    
+    Returns the value, None if it was never set, without a database or on errors.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return None
+    
+    try:
+        async with session:
+            setting = await session.get(BotSetting, key)
+            return setting.value if setting else None
+    except Exception as e:
+        print(f"Error getting bot setting {key}: {e}")
         return None
 
+
+async def set_bot_setting(key: str, value: str) -> bool:
+    """
+    Save a value the bot needs again after a restart.
+    
+    Returns True if successful, False without a database or on errors.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return False
+    
+    try:
+        async with session:
+            stmt = _upsert(BotSetting).values(key=key, value=value, updated_at=datetime.now(timezone.utc))
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["key"],
+                    set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+                )
+            )
+            await session.commit()
+            return True
+    except Exception as e:
+        print(f"Error saving bot setting {key}: {e}")
+        return False
+
+
+async def record_game_score(
+    guild_id: int,
+    channel_id: int,
+    user_id: int,
+    score: GameScore,
+    message_id: Optional[int] = None,
+    created_at: Optional[datetime] = None,
+) -> bool:
+    """
+    Record a parsed game score.
+    
+    A repeated share of the same puzzle by the same user in the same server is ignored.
+    
+    Returns True if a new score was recorded, False otherwise.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return False
+    
+    try:
+        async with session:
+            stmt = _upsert(GameScoreRecord).values(
+                guild_id=guild_id,
+                channel_id=channel_id,
+                user_id=user_id,
+                message_id=message_id,
+                game=GameType(score.game),
+                puzzle_number=score.puzzle_number,
+                won=score.won,
+                guesses=score.guesses,
+                mistakes=score.mistakes,
+                hints=score.hints,
+                grid=score.grid,
+                created_at=created_at or datetime.now(timezone.utc),
+            ).on_conflict_do_nothing(
+                index_elements=["guild_id", "user_id", "game", "puzzle_number"]
+            ).returning(GameScoreRecord.id)
+            result = await session.execute(stmt)
+            recorded = result.scalar_one_or_none() is not None
+            if recorded:
+                await _update_game_stats(
+                    session, guild_id, [(user_id, score, (created_at or datetime.now(timezone.utc)).date())]
+                )
+            await session.commit()
+            return recorded
+    except Exception as e:
+        print(f"Error recording game score: {e}")
+        metrics.increment("errors", "stage", "record_game_score")
+        return False
+
+
+async def get_backfill_checkpoint(channel_id: int) -> Optional[BackfillCheckpoint]:
+    """
+    Get how far a channel's game score backfill got.
+    
+    Returns the checkpoint, None if the channel was never backfilled or on errors.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return None
+    
+    try:
+        async with session:
+            return await session.get(BackfillCheckpoint, channel_id)
+    except Exception as e:
+        print(f"Error getting backfill checkpoint: {e}")
+        return None
+
+
+async def record_backfilled_scores(
+    guild_id: int,
+    channel_id: int,
+    scores: list[tuple[int, int, datetime, GameScore]],
+    last_message_id: int,
+    messages_scanned: int,
+    completed: bool = False,
+) -> Optional[int]:
+    """
+    Record a batch of game scores found in a channel's history and move its checkpoint.
+    
+    The scores are inserted with one multi-row statement, and the stats and
+    checkpoint are updated in the same transaction, so a resumed backfill
+    neither skips nor double counts a batch. Like record_game_score(), only a
+    user's first share of a puzzle in a server counts.
+    
+    Args:
+        guild_id: The server the channel is in
+        channel_id: The channel being backfilled
+        scores: (user_id, message_id, message time, score) of each share, oldest first
+        last_message_id: Newest message covered by this batch
+        messages_scanned: Number of messages covered by this batch
+        completed: Whether this is the last batch of the channel's history
+    
+    Returns the number of new scores recorded, None on errors.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return None
+    
+    # Keep each user's first share of a puzzle; an upsert can't insert the same key twice
+    first_shares = {}
+    for user_id, message_id, created_at, score in scores:
+        first_shares.setdefault((user_id, GameType(score.game), score.puzzle_number), (message_id, created_at, score))
+    
+    try:
+        async with session:
+            recorded = []
+            if first_shares:
+                stmt = _upsert(GameScoreRecord).values([
+                    dict(
+                        guild_id=guild_id,
+                        channel_id=channel_id,
+                        user_id=user_id,
+                        message_id=message_id,
+                        game=game,
+                        puzzle_number=puzzle_number,
+                        won=score.won,
+                        guesses=score.guesses,
+                        mistakes=score.mistakes,
+                        hints=score.hints,
+                        grid=score.grid,
+                        created_at=created_at,
+                    )
+                    for (user_id, game, puzzle_number), (message_id, created_at, score) in first_shares.items()
+                ]).on_conflict_do_nothing(
+                    index_elements=["guild_id", "user_id", "game", "puzzle_number"]
+                ).returning(GameScoreRecord.user_id, GameScoreRecord.game, GameScoreRecord.puzzle_number)
+                result = await session.execute(stmt)
+                for key in result.all():
+                    _, created_at, score = first_shares[tuple(key)]
+                    recorded.append((key[0], score, created_at.date()))
+                if recorded:
+                    await _update_game_stats(session, guild_id, recorded)
+            
+            stmt = _upsert(BackfillCheckpoint).values(
+                channel_id=channel_id,
+                guild_id=guild_id,
+                last_message_id=last_message_id,
+                messages_scanned=messages_scanned,
+                scores_recorded=len(recorded),
+                completed=completed,
+                updated_at=datetime.now(timezone.utc),
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["channel_id"],
+                    set_={
+                        "last_message_id": stmt.excluded.last_message_id,
+                        "messages_scanned": BackfillCheckpoint.messages_scanned + stmt.excluded.messages_scanned,
+                        "scores_recorded": BackfillCheckpoint.scores_recorded + stmt.excluded.scores_recorded,
+                        "completed": stmt.excluded.completed,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                )
+            )
+            await session.commit()
+            return len(recorded)
+    except Exception as e:
+        print(f"Error recording backfilled game scores: {e}")
+        metrics.increment("errors", "stage", "record_backfilled_scores")
+        return None
+
+
+async def _update_game_stats(
+    session: AsyncSession, guild_id: int, scores: list[tuple[int, GameScore, date]]
+) -> None:
+    """
+    Add scores to every aggregate they belong to, in two upsert statements.
+    
+    Args:
+        session: The session to run the upserts in
+        guild_id: The server the scores were shared in
+        scores: (user_id, score, day played) of each score
+    """
+    # Summed per row first, since one upsert can't touch the same row twice
+    stats: dict[tuple, list[int]] = {}
+    buckets: dict[tuple, int] = {}
+    for user_id, score, day in scores:
+        game = GameType(score.game)
+        scored = score.score is not None
+        for period in StatPeriod:
+            period_start = stat_period_start(period, day)
+            for stat_user_id in (user_id, GUILD_TOTAL_USER_ID):
+                totals = stats.setdefault((game, period, period_start, stat_user_id), [0, 0, 0, 0])
+                totals[0] += 1
+                totals[1] += int(score.won)
+                totals[2] += score.score if scored else 0
+                totals[3] += int(scored)
+            bucket = (game, period, period_start, score.score if scored else NO_SCORE_BUCKET)
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+    
+    stat_rows = [
+        dict(
+            guild_id=guild_id,
+            game=game,
+            period=period,
+            period_start=period_start,
+            user_id=stat_user_id,
+            plays=plays,
+            wins=wins,
+            score_total=score_total,
+            scored_plays=scored_plays,
+        )
+        for (game, period, period_start, stat_user_id), (plays, wins, score_total, scored_plays) in stats.items()
+    ]
+    stmt = _upsert(GameStat).values(stat_rows)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["guild_id", "game", "period", "period_start", "user_id"],
+            set_={
+                column: getattr(GameStat, column) + getattr(stmt.excluded, column)
+                for column in ("plays", "wins", "score_total", "scored_plays")
+            },
+        )
+    )
+    
+    bucket_rows = [
+        dict(
+            guild_id=guild_id,
+            game=game,
+            period=period,
+            period_start=period_start,
+            bucket=bucket,
+            count=count,
+        )
+        for (game, period, period_start, bucket), count in buckets.items()
+    ]
+    stmt = _upsert(GameScoreBucket).values(bucket_rows)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["guild_id", "game", "period", "period_start", "bucket"],
+            set_={"count": GameScoreBucket.count + stmt.excluded.count},
+        )
+    )
+
+
+async def get_game_stats(
+    guild_id: int,
+    game: GameType,
+    period: StatPeriod,
+    day: Optional[date] = None,
+    limit: int = 10,
+) -> tuple[Optional[GameStat], list[GameStat], dict[int, int]]:
+    """
+    Get a server's aggregate stats for a game over one period window.
+    
+    Only reads the aggregate tables, so the cost doesn't grow with score history.
+    
+    Args:
+        guild_id: The server to get stats for
+        game: The game to get stats for
+        period: The period to get stats for
+        day: Any day in the period window, defaults to today (UTC)
+        limit: Maximum number of players to return
+    
+    Returns:
+        Tuple of (server totals, top players, score distribution by bucket).
+        Players are ranked by win rate, then lowest average score.
+        Gracefully handles database errors by returning empty stats.
+    """
+    empty = (None, [], {})
+    session = _get_session()
+    if session is None:
+        return empty
+    
+    period_start = stat_period_start(period, day or datetime.now(timezone.utc).date())
+    try:
+        async with session:
+            window = (
+                (GameStat.guild_id == guild_id)
+                & (GameStat.game == game)
+                & (GameStat.period == period)
+                & (GameStat.period_start == period_start)
+            )
+            totals = (
+                await session.execute(
+                    select(GameStat).where(window, GameStat.user_id == GUILD_TOTAL_USER_ID)
+                )
+            ).scalar_one_or_none()
+            
+            average = GameStat.score_total * 1.0 / func.nullif(GameStat.scored_plays, 0)
+            players = (
+                await session.execute(
+                    select(GameStat)
+                    .where(window, GameStat.user_id != GUILD_TOTAL_USER_ID)
+                    .order_by(
+                        (GameStat.wins * 1.0 / GameStat.plays).desc(),
+                        average.asc().nulls_last(),
+                        GameStat.plays.desc(),
+                    )
+                    .limit(limit)
+                )
+            ).scalars().all()
+            
+            buckets = (
+                await session.execute(
+                    select(GameScoreBucket.bucket, GameScoreBucket.count).where(
+                        GameScoreBucket.guild_id == guild_id,
+                        GameScoreBucket.game == game,
+                        GameScoreBucket.period == period,
+                        GameScoreBucket.period_start == period_start,
+                    )
+                )
+            ).all()
+            return totals, list(players), {bucket: count for bucket, count in buckets}
+    except Exception as e:
+        print(f"Error getting game stats: {e}")
+        return empty
+
+
+async def prune_game_stats(today: Optional[date] = None) -> int:
+    """
+    Delete day and week stats whose window ended over GAME_STATS_RETENTION_DAYS ago.
+    
+    Keeps the aggregate tables from growing with every new day and week;
+    all-time stats are never deleted. Meant to run daily.
+    
+    Args:
+        today: The current day (UTC), defaults to today
+    
+    Returns the number of rows deleted, 0 on errors.
+    Gracefully handles database errors without crashing.
+    """
+    session = _get_session()
+    if session is None:
+        return 0
+    
+    cutoff = (today or datetime.now(timezone.utc).date()) - timedelta(days=GAME_STATS_RETENTION_DAYS)
+    # A window of n days starting on `start` has ended by the cutoff if start + n <= cutoff
+    window_days = {StatPeriod.DAY: 1, StatPeriod.WEEK: 7}
+    deleted = 0
+    try:
+        async with session:
+            for model in (GameStat, GameScoreBucket):
+                for period, days in window_days.items():
+                    result = await session.execute(
+                        delete(model).where(
+                            model.period == period, model.period_start <= cutoff - timedelta(days=days)
+                        )
+                    )
+                    deleted += result.rowcount
+            await session.commit()
+    except Exception as e:
+        print(f"Error pruning game stats: {e}")
+        metrics.increment("errors", "stage", "prune_game_stats")
+        return 0
+    return deleted
@@ -5,12 +5,37 @@ This package contains modules for processing different word game scores
 and providing appropriate responses.
 """
 
-from .wordle import process_wordle_message
-from .connections import process_connections_message
-from .strands import process_strands_message
+from .results import GameScore
+from .wordle import parse_wordle_message, process_wordle_message
+from .wordle_pool import pooled_wordle_response, prewarm_wordle_pool, wordle_pool_key
+from .connections import parse_connections_message, process_connections_message
+from .strands import parse_strands_message, process_strands_message
+from .registry import (
+    PARSERS,
+    GameScoreParser,
+    GameScoreReply,
+    find_game_score_parsers,
+    parse_game_score_message,
+    process_game_score_message,
+    process_game_score_message_async,
+)
 
 __all__ = [
+    "GameScore",
+    "parse_wordle_message",
+    "parse_connections_message",
+    "parse_strands_message",
     "process_wordle_message",
+    "pooled_wordle_response",
+    "prewarm_wordle_pool",
+    "wordle_pool_key",
     "process_connections_message", 
     "process_strands_message",
-] 
\ No newline at end of file
+    "PARSERS",
+    "GameScoreParser",
+    "GameScoreReply",
+    "find_game_score_parsers",
+    "parse_game_score_message",
+    "process_game_score_message",
+    "process_game_score_message_async",
+]
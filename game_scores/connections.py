@@ -1,28 +1,78 @@
 import re
 from typing import Optional
 
+from .grid import MAX_SCAN_LENGTH, iter_header_matches, scan_rows
+from .results import GameScore, pack_grid
 
-def process_connections_message(message: str) -> Optional[str]:
+# The lookahead lets the regex engine skip headers that no grid follows
+CONNECTIONS_HEADER = re.compile(r"connections\s*(?:puzzle\s*)?#?(\d+)\s*(?=[🟨🟩🟦🟪])", re.IGNORECASE)
+CONNECTIONS_CELL_CODES = {"🟨": "0", "🟩": "1", "🟦": "2", "🟪": "3"}
+CONNECTIONS_CELLS = frozenset(CONNECTIONS_CELL_CODES)
+
+
+def parse_connections_message(message: str) -> Optional[GameScore]:
     """
-    Process a message for connections scores and return appropriate response.
+    Parse a connections score from a message.
     
     Args:
         message: The message text to process
         
     Returns:
-        Response message if connections score detected, None otherwise
+        The parsed score if a connections score is detected, None otherwise
     """
-    pattern = r"connections\s*(?:puzzle\s*)?#?\d+\s*((?:(?:🟨|🟩|🟦|🟪){4}\s*){1,6})"
-    matches = re.findall(pattern, message, re.IGNORECASE)
-    
-    if not matches:
+    message = message[:MAX_SCAN_LENGTH]
+    for header in iter_header_matches(CONNECTIONS_HEADER, message):
+        start = header.end()
+        end = scan_rows(message, start, CONNECTIONS_CELLS, width=4, max_rows=6)
+        if end > start:
+            break
+    else:
         return None
     
-    circles_str = matches[0]
+    circles_str = message[start:end]
     rows = circles_str.strip().split()
     is_loss = len(rows) == 6 and len(set(rows[-1])) > 1
     
-    if is_loss:
+    # Rows are usually one per line, but split any that were pasted together
+    guesses = [row[i:i + 4] for row in rows for i in range(0, len(row), 4)]
+    return GameScore(
+        game="connections",
+        puzzle_number=int(header.group(1)),
+        won=not is_loss,
+        grid=pack_grid(guesses, CONNECTIONS_CELL_CODES),
+        mistakes=sum(1 for guess in guesses if len(set(guess)) > 1),
+    )
+
+
+def connections_response(score: GameScore) -> str:
+    """
+    Generate the response for a parsed connections score.
+    
+    Args:
+        score: The parsed connections score
+        
+    Returns:
+        Response message for the connections score
+    """
+    if not score.won:
         return "You lost! Better luck tomorrow!"
     else:
-        return "Nice job solving the Connections!" 
\ No newline at end of file
+        return "Nice job solving the Connections!"
+
+
+def process_connections_message(message: str) -> Optional[str]:
+    """
+    Process a message for connections scores and return appropriate response.
+    
+    Args:
+        message: The message text to process
+        
+    Returns:
+        Response message if connections score detected, None otherwise
+    """
+    score = parse_connections_message(message)
+    
+    if not score:
+        return None
+    
+    return connections_response(score)
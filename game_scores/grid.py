@@ -0,0 +1,90 @@
+import re
+from functools import lru_cache
+from typing import Iterator
+
+# Discord messages are at most 4000 characters, so nothing past this is ever scanned
+MAX_SCAN_LENGTH = 4000
+
+
+# The grid patterns below are single character-class runs, matched one row at a
+# time, so the regex engine never has anything to backtrack into
+def _cell_class(cells: frozenset[str]) -> str:
+    """Build the inside of a regex character class matching any of the cells."""
+    return "".join(re.escape(cell) for cell in sorted(cells))
+
+
+@lru_cache(maxsize=None)
+def _cell_run_pattern(cells: frozenset[str]) -> re.Pattern:
+    """Compile a pattern matching a run of cells and whitespace."""
+    return re.compile("[" + _cell_class(cells) + r"\s]*")
+
+
+@lru_cache(maxsize=None)
+def _row_pattern(cells: frozenset[str], width: int) -> re.Pattern:
+    """Compile a pattern matching one row of exactly `width` cells and trailing whitespace."""
+    return re.compile("[" + _cell_class(cells) + "]{" + str(width) + r"}\s*")
+
+
+def iter_header_matches(pattern: re.Pattern, message: str) -> Iterator[re.Match]:
+    """
+    Yield every match of a header pattern in a message.
+
+    Unlike finditer(), a new search starts one character after the previous
+    match's start rather than at its end, so overlapping headers are found
+    just like a regex that tries every start position.
+
+    Args:
+        pattern: Compiled header pattern without nested quantifiers
+        message: The message text to search, already capped to MAX_SCAN_LENGTH
+    """
+    pos = 0
+    while match := pattern.search(message, pos):
+        yield match
+        pos = match.start() + 1
+
+
+def scan_rows(message: str, pos: int, cells: frozenset[str], width: int, max_rows: int) -> int:
+    """
+    Scan grid rows of exactly `width` cells, each followed by optional whitespace.
+
+    Each row is matched on its own, in a single forward pass with no
+    backtracking. Equivalent to the regex `(?:[cells]{width}\\s*){0,max_rows}`
+    starting at pos.
+
+    Args:
+        message: The message text to scan
+        pos: Position to start scanning at
+        cells: Characters allowed as grid cells
+        width: Number of cells in a row
+        max_rows: Maximum number of rows to consume
+
+    Returns:
+        Position just past the last consumed row, pos if no row was found
+    """
+    row = _row_pattern(cells, width)
+    for _ in range(max_rows):
+        match = row.match(message, pos)
+        if not match:
+            break
+        pos = match.end()
+    return pos
+
+
+def scan_run(message: str, pos: int, cells: frozenset[str]) -> int:
+    """
+    Scan a run of grid cells and whitespace that starts with a cell.
+
+    Single forward pass with no backtracking, equivalent to the regex
+    `(?:[cells]+\\s*)*` starting at pos.
+
+    Args:
+        message: The message text to scan
+        pos: Position to start scanning at
+        cells: Characters allowed as grid cells
+
+    Returns:
+        Position just past the run, pos if there is no cell at pos
+    """
+    if pos >= len(message) or message[pos] not in cells:
+        return pos
+    return _cell_run_pattern(cells).match(message, pos).end()
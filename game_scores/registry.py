@@ -0,0 +1,104 @@
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from .results import GameScore
+from .wordle import parse_wordle_message, wordle_response, wordle_response_async
+from .connections import parse_connections_message, connections_response
+from .strands import parse_strands_message, strands_response
+
+
+class GameScoreParser(NamedTuple):
+    """A registered game score parser and the keyword that routes messages to it."""
+    game: str
+    keyword: str
+    parse: Callable[[str], Optional[GameScore]]
+    respond: Callable[[GameScore], Optional[str]]
+    respond_async: Optional[Callable[..., Awaitable[Optional[str]]]] = None
+
+
+class GameScoreReply(NamedTuple):
+    """A detected game score and the bot's reply to it."""
+    game: str
+    response: str
+    score: GameScore
+
+
+# Parsers in priority order. The game names match the ActionType values in database.py.
+PARSERS: tuple[GameScoreParser, ...] = (
+    GameScoreParser("wordle", "wordle", parse_wordle_message, wordle_response, wordle_response_async),
+    GameScoreParser("connections", "connections", parse_connections_message, connections_response),
+    GameScoreParser("strands", "strands", parse_strands_message, strands_response),
+)
+
+
+def find_game_score_parsers(message: str) -> list[GameScoreParser]:
+    """
+    Find the parsers whose keyword appears in a message.
+
+    The message is lowercased once and checked with plain substring searches,
+    which rejects ordinary chatter before any of the full score patterns run.
+
+    Args:
+        message: The message text to check
+
+    Returns:
+        Matching parsers in priority order, usually zero or one
+    """
+    lowered = message.lower()
+    return [parser for parser in PARSERS if parser.keyword in lowered]
+
+
+def parse_game_score_message(message: str) -> Optional[GameScore]:
+    """
+    Parse a game score from a message with the parser it is routed to.
+
+    Args:
+        message: The message text to parse
+
+    Returns:
+        The parsed score if a game score was detected, None otherwise
+    """
+    for parser in find_game_score_parsers(message):
+        if score := parser.parse(message):
+            return score
+    return None
+
+
+def process_game_score_message(message: str) -> Optional[GameScoreReply]:
+    """
+    Process a message with the game score parser it is routed to.
+
+    Args:
+        message: The message text to process
+
+    Returns:
+        The game, response and parsed score if a game score was detected, None otherwise
+    """
+    for parser in find_game_score_parsers(message):
+        if (score := parser.parse(message)) and (response := parser.respond(score)):
+            return GameScoreReply(parser.game, response, score)
+    return None
+
+
+async def process_game_score_message_async(
+    message: str, use_ai: bool = False
+) -> Optional[GameScoreReply]:
+    """
+    Process a message with the game score parser it is routed to, allowing LLM replies.
+
+    Args:
+        message: The message text to process
+        use_ai: Whether parsers that support it may answer with an LLM
+
+    Returns:
+        The game, response and parsed score if a game score was detected, None otherwise
+    """
+    for parser in find_game_score_parsers(message):
+        if not (score := parser.parse(message)):
+            continue
+        if parser.respond_async is not None:
+            response = await parser.respond_async(score, use_ai=use_ai)
+        else:
+            response = parser.respond(score)
+        if response:
+            return GameScoreReply(parser.game, response, score)
+    return None
@@ -0,0 +1,47 @@
+from typing import NamedTuple, Optional
+
+
+class GameScore(NamedTuple):
+    """
+    A parsed game score.
+
+    The grid is packed as one digit per cell with rows separated by "/",
+    e.g. "00100/22222" for a two-row Wordle grid. The digits are game specific:
+        wordle:      0 = absent, 1 = present, 2 = correct
+        connections: 0 = yellow, 1 = green, 2 = blue, 3 = purple
+        strands:     0 = theme word, 1 = spangram, 2 = hint
+    """
+    game: str
+    puzzle_number: int
+    won: bool
+    grid: str = ""
+    guesses: Optional[int] = None
+    mistakes: Optional[int] = None
+    hints: Optional[int] = None
+
+    @property
+    def score(self) -> Optional[int]:
+        """The game's headline number: guesses for Wordle, mistakes for Connections, hints for Strands."""
+        if self.game == "wordle":
+            return self.guesses
+        if self.game == "connections":
+            return self.mistakes
+        return self.hints
+
+
+def pack_grid(rows: list[str], codes: dict[str, str]) -> str:
+    """
+    Pack grid rows of emoji cells into the compact GameScore grid format.
+
+    Args:
+        rows: Grid rows, each a string of emoji cells
+        codes: Digit for each emoji cell
+
+    Returns:
+        Packed grid string
+    """
+    # A few str.replace() calls are much faster than str.translate() on emoji
+    packed = "/".join(rows)
+    for cell, code in codes.items():
+        packed = packed.replace(cell, code)
+    return packed
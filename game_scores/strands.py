@@ -1,28 +1,77 @@
 import re
 from typing import Optional
 
+from .grid import MAX_SCAN_LENGTH, iter_header_matches, scan_run
+from .results import GameScore, pack_grid
 
-def process_strands_message(message: str) -> Optional[str]:
+# The lookahead lets the regex engine skip headers that no grid follows
+STRANDS_HEADER = re.compile(r'strands\s*#?(\d+)\s*[“"][^"“”]+[”"]\s*(?=[🔵🟡💡])', re.IGNORECASE)
+STRANDS_CELL_CODES = {"🔵": "0", "🟡": "1", "💡": "2"}
+STRANDS_CELLS = frozenset(STRANDS_CELL_CODES)
+
+
+def parse_strands_message(message: str) -> Optional[GameScore]:
     """
-    Process a message for strands scores and return appropriate response.
+    Parse a strands score from a message.
     
     Args:
         message: The message text to process
         
     Returns:
-        Response message if valid strands score detected, None otherwise
+        The parsed score if a valid strands score is detected, None otherwise
     """
-    pattern = r'(?i)strands\s*#?\d+\s*\n?[\u201c"][^""\u201c\u201d]+[\u201d"]\s*\n?((?:(?:🔵|🟡)+\s*\n?)+)'
-    matches = re.findall(pattern, message, re.MULTILINE | re.DOTALL)
-    
-    if not matches:
+    message = message[:MAX_SCAN_LENGTH]
+    for header in iter_header_matches(STRANDS_HEADER, message):
+        start = header.end()
+        end = scan_run(message, start, STRANDS_CELLS)
+        if end > start:
+            break
+    else:
         return None
     
-    circles_str = matches[0]
+    circles_str = message[start:end]
     yellow_count = circles_str.count('🟡')
     
     # Valid strands score must have exactly 1 yellow
-    if yellow_count == 1:
-        return "Nice job solving today's strands!"
+    if yellow_count != 1:
+        return None
+    
+    rows = circles_str.split()
+    return GameScore(
+        game="strands",
+        puzzle_number=int(header.group(1)),
+        won=True,
+        grid=pack_grid(rows, STRANDS_CELL_CODES),
+        hints=circles_str.count('💡'),
+    )
+
+
+def strands_response(score: GameScore) -> str:
+    """
+    Generate the response for a parsed strands score.
+    
+    Args:
+        score: The parsed strands score
+        
+    Returns:
+        Response message for the strands score
+    """
+    return "Nice job solving today's strands!"
+
+
+def process_strands_message(message: str) -> Optional[str]:
+    """
+    Process a message for strands scores and return appropriate response.
+    
+    Args:
+        message: The message text to process
+        
+    Returns:
+        Response message if valid strands score detected, None otherwise
+    """
+    score = parse_strands_message(message)
+    
+    if not score:
+        return None
     
-    return None 
\ No newline at end of file
+    return strands_response(score)
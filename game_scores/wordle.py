@@ -1,16 +1,52 @@
 import re
 from typing import Optional
-from dotenv import load_dotenv
 import os
-from xai_sdk import Client
-from xai_sdk.chat import user, system
 
-load_dotenv()
+from .grid import MAX_SCAN_LENGTH, scan_rows
+from .results import GameScore, pack_grid
+from .wordle_pool import pooled_wordle_response
 
 WORDLE_AI_ENABLED = os.getenv("WORDLE_AI_ENABLED") == "true"
-xai_client = Client(api_key=os.getenv("XAI_API_KEY"))
 
-def process_wordle_message(message: str, use_ai: bool = False) -> Optional[str]:
+WORDLE_PATTERN = re.compile(r"(?i)wordle\s+(\d+(?:,\d+)?)\s+([0-6X])(?=/6\*?)")
+# The "/6" or "/6*" after the score, plus any whitespace before the grid
+WORDLE_SCORE_SUFFIX = re.compile(r"/6\*?\s*")
+# Light, dark and high contrast mode cells
+WORDLE_CELL_CODES = {"⬛": "0", "⬜": "0", "🟨": "1", "🟦": "1", "🟩": "2", "🟧": "2"}
+WORDLE_CELLS = frozenset(WORDLE_CELL_CODES)
+
+def parse_wordle_message(message: str) -> Optional[GameScore]:
+    """
+    Parse a wordle score from a message.
+    
+    Args:
+        message: The message text to process
+        
+    Returns:
+        The parsed score if a wordle score is detected, None otherwise
+    """
+    message = message[:MAX_SCAN_LENGTH]
+    match = WORDLE_PATTERN.search(message)
+    
+    # No valid wordle score in user's message ("0" and a lowercase "x" never got a reply)
+    if not match or match.group(2) not in "123456X":
+        return None
+    
+    grid_start = WORDLE_SCORE_SUFFIX.match(message, match.end()).end()
+    grid_end = scan_rows(message, grid_start, WORDLE_CELLS, width=5, max_rows=6)
+    cells = "".join(message[grid_start:grid_end].split())
+    rows = [cells[i:i + 5] for i in range(0, len(cells), 5)]
+    
+    score = match.group(2)
+    return GameScore(
+        game="wordle",
+        puzzle_number=int(match.group(1).replace(",", "")),
+        won=score != "X",
+        grid=pack_grid(rows, WORDLE_CELL_CODES),
+        guesses=None if score == "X" else int(score),
+    )
+
+def process_wordle_message(message: str) -> Optional[str]:
     """
     Process a message for wordle scores and return appropriate response.
     
@@ -22,19 +58,48 @@ def process_wordle_message(message: str, use_ai: bool = False) -> Optional[str]:
     """
 
     try:
-        pattern = r"(?i)wordle\s+\d+(?:,\d+)?\s+([0-6X])(?=/6\*?)"
-        matches = re.findall(pattern, message)
+        score = parse_wordle_message(message)
         
-        if not matches: # No world score found in user's message
+        if not score:
             return None
         
-        if use_ai and WORDLE_AI_ENABLED:
-            return ai_wordle_response(message)
-        else:
-            return basic_wordle_response(score=matches[0])
+        return wordle_response(score)
     except Exception as e:
         return None
 
+def wordle_response(score: GameScore) -> Optional[str]:
+    """
+    Generate the basic response for a parsed wordle score.
+
+    Args:
+        score: The parsed wordle score
+
+    Returns:
+        Response message for the wordle score
+    """
+    return basic_wordle_response(score="X" if score.guesses is None else str(score.guesses))
+
+async def wordle_response_async(score: GameScore, use_ai: bool = False) -> Optional[str]:
+    """
+    Generate a response for a parsed wordle score, optionally with an LLM.
+
+    AI responses come from the pre-generated response pool, so a share never
+    waits on the LLM. Falls back to the basic response while the pool has
+    nothing for the share's shape yet.
+
+    Args:
+        score: The parsed wordle score
+        use_ai: Whether to use the LLM when WORDLE_AI_ENABLED is set
+
+    Returns:
+        Response message for the wordle score
+    """
+    response = wordle_response(score)
+    if not (use_ai and WORDLE_AI_ENABLED):
+        return response
+
+    return pooled_wordle_response(score) or response
+
 def basic_wordle_response(score: str) -> Optional[str]:
     """
     Generate a response for a wordle score using a basic pattern matching approach.
@@ -62,49 +127,3 @@ def basic_wordle_response(score: str) -> Optional[str]:
             return "That was a close one!"
         case _:
             return None
-
-def ai_wordle_response(message: str) -> str:
-    """
-    Generate a response for a wordle score using an LLM (grok-4-1-fast-reasoning).
-    
-    Args:
-        message: The message text to process
-        
-    Returns:
-        Response message for the wordle score, None if error
-    """
-    try:
-        system_prompt = """You are a friendly, slightly sassy bot that responds to people sharing their Wordle scores. 
-
-Wordle is a word guessing game where players have 6 attempts to guess a 5-letter word. Scores are typically shared like "Wordle 1,234 3/6" where the number before the slash is how many guesses it took (1-6), or "X" if they failed.
-
-Scoring context:
-- 1/6: Extremely lucky (almost impossible without cheating)
-- 2/6: Very impressive, often lucky
-- 3/6: Good solid score
-- 4/6: Decent, average performance
-- 5/6: Cutting it close but still got it
-- 6/6: Just barely made it
-- X/6: Failed to solve it
-
-Your personality:
-- Be brief and casual (1-2 sentences max)
-- Slightly playful and teasing but not mean
-- Celebrate good scores, gently roast bad ones
-- Use casual language, emojis are fine
-- Be encouraging even when teasing
-- Acknowledge when someone is really struggling or doing really well
-
-Examples of good responses:
-- For 1/6: "No way you didn't cheat! 🤔"
-- For 3/6: "Solid work! 💪"
-- For 6/6: "Whew, cutting it close there!"
-- For X/6: "Ouch! Tomorrow's a new day 😅"
-
-Respond to the Wordle score in the message with a brief, engaging comment."""
-        chat = xai_client.chat.create(model="grok-4-1-fast-reasoning")
-        chat.append(system(system_prompt))
-        chat.append(user(message))
-        return chat.sample().content
-    except Exception as e:
-        return None
\ No newline at end of file
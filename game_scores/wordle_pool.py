@@ -0,0 +1,197 @@
+import asyncio
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import llm
+from .results import GameScore
+
+# Maximum number of share shapes kept in the pool
+POOL_SIZE = int(os.getenv("WORDLE_POOL_SIZE", "256"))
+# Seconds before a shape's responses are regenerated, so the pool doesn't go stale
+POOL_TTL = float(os.getenv("WORDLE_POOL_TTL", "86400"))
+# Number of responses generated per shape by a single LLM call
+POOL_VARIANTS = int(os.getenv("WORDLE_POOL_VARIANTS", "5"))
+
+WORDLE_AI_PROMPT = """You are a friendly, slightly sassy bot that responds to people sharing their Wordle scores.
+
+Wordle is a word guessing game where players have 6 attempts to guess a 5-letter word. Scores are typically shared like "Wordle 1,234 3/6" where the number before the slash is how many guesses it took (1-6), or "X" if they failed.
+
+Scoring context:
+- 1/6: Extremely lucky (almost impossible without cheating)
+- 2/6: Very impressive, often lucky
+- 3/6: Good solid score
+- 4/6: Decent, average performance
+- 5/6: Cutting it close but still got it
+- 6/6: Just barely made it
+- X/6: Failed to solve it
+
+Your personality:
+- Be brief and casual (1-2 sentences max)
+- Slightly playful and teasing but not mean
+- Celebrate good scores, gently roast bad ones
+- Use casual language, emojis are fine
+- Be encouraging even when teasing
+- Acknowledge when someone is really struggling or doing really well
+
+Examples of good responses:
+- For 1/6: "No way you didn't cheat! 🤔"
+- For 3/6: "Solid work! 💪"
+- For 6/6: "Whew, cutting it close there!"
+- For X/6: "Ouch! Tomorrow's a new day 😅"
+
+Respond to the Wordle score in the message with a brief, engaging comment."""
+
+# Numbering or bullets the LLM may put in front of each response despite being asked not to
+_LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+# A row with at least this many green cells counts as being close to the answer
+_CLOSE_GREENS = 3
+
+
+class _PoolEntry:
+    __slots__ = ("responses", "next_index", "expires_at")
+
+    def __init__(self, responses: list[str], expires_at: float):
+        self.responses = responses
+        self.next_index = 0
+        self.expires_at = expires_at
+
+
+_pool: OrderedDict[str, _PoolEntry] = OrderedDict()
+# Background fills in progress, keyed by pool key, so each shape is only requested once
+_filling: dict[str, asyncio.Task] = {}
+
+
+def wordle_pool_key(score: GameScore) -> str:
+    """
+    Normalize a Wordle share to the key its responses are pooled under.
+
+    The key is the score plus a coarse grid shape: how good the first guess was
+    ("c"old, "w"arm or "h"ot) and how many guesses were spent close to the
+    answer without getting it (capped at 3). For example "4/w2", or "3/-" for a
+    share without a grid. That is at most 91 keys.
+
+    Args:
+        score: The parsed wordle score
+
+    Returns:
+        The pool key
+    """
+    result = "X" if score.guesses is None else str(score.guesses)
+    if not score.grid:
+        return f"{result}/-"
+
+    rows = score.grid.split("/")
+    opener = rows[0]
+    if opener.count("2") >= _CLOSE_GREENS:
+        opening = "h"
+    elif opener.strip("0"):
+        opening = "w"
+    else:
+        opening = "c"
+    # The winning row is all green, so it isn't a near miss
+    misses = rows[:-1] if score.won else rows
+    close = sum(row.count("2") >= _CLOSE_GREENS for row in misses)
+    return f"{result}/{opening}{min(close, 3)}"
+
+
+def _describe_share(key: str) -> str:
+    """Describe a pool key in words for the LLM."""
+    result, shape = key.split("/")
+    description = f"Someone shared their Wordle score: {result}/6."
+    if shape == "-":
+        return description
+
+    opening, close = shape[0], int(shape[1])
+    description += {
+        "c": " Their first guess didn't match a single letter.",
+        "w": " Their first guess found a letter or two.",
+        "h": " Their first guess was already close to the answer.",
+    }[opening]
+    if close:
+        guesses = "3 or more guesses" if close == 3 else f"{close} guess" + ("es" if close > 1 else "")
+        ending = "running out of guesses" if result == "X" else "getting it"
+        description += f" They were only a letter or two away for {guesses} before {ending}."
+    return description
+
+
+def _parse_variants(text: str) -> list[str]:
+    """Split an LLM reply into individual responses, one per line."""
+    variants = []
+    for line in text.splitlines():
+        line = _LIST_MARKER.sub("", line).strip().strip('"')
+        if line:
+            variants.append(line)
+    return variants[:POOL_VARIANTS]
+
+
+async def _fill(key: str) -> None:
+    """Generate a set of responses for one share shape with a single LLM call."""
+    prompt = (
+        f"{_describe_share(key)}\n\n"
+        f"Write {POOL_VARIANTS} different responses to this share, one per line, without numbering."
+    )
+    try:
+        variants = _parse_variants(await llm.complete(WORDLE_AI_PROMPT, prompt))
+    except Exception as e:
+        print(f"Error filling wordle response pool for {key}: {e}")
+        return
+    if not variants:
+        return
+
+    random.shuffle(variants)
+    _pool[key] = _PoolEntry(variants, time.monotonic() + POOL_TTL)
+    _pool.move_to_end(key)
+    while len(_pool) > POOL_SIZE:
+        _pool.popitem(last=False)
+
+
+def _schedule_fill(key: str) -> None:
+    """Start filling a key in the background unless it is already being filled."""
+    if key in _filling:
+        return
+    task = asyncio.create_task(_fill(key))
+    _filling[key] = task
+    task.add_done_callback(lambda _: _filling.pop(key, None))
+
+
+def pooled_wordle_response(score: GameScore) -> Optional[str]:
+    """
+    Get a pre-generated AI response for a Wordle share without waiting on the LLM.
+
+    Responses for the share's shape are handed out in rotation. On a miss a
+    background fill is started and None is returned, so the caller can fall
+    back to the basic response. Expired responses are still served while
+    fresh ones are generated. Must be called from a running event loop.
+
+    Args:
+        score: The parsed wordle score
+
+    Returns:
+        A pooled response, None on a miss
+    """
+    key = wordle_pool_key(score)
+    entry = _pool.get(key)
+    if entry is None or time.monotonic() >= entry.expires_at:
+        _schedule_fill(key)
+        if entry is None:
+            return None
+        # Keep serving the stale responses while fresh ones are generated
+    else:
+        _pool.move_to_end(key)
+
+    response = entry.responses[entry.next_index % len(entry.responses)]
+    entry.next_index += 1
+    return response
+
+
+def prewarm_wordle_pool() -> None:
+    """Start filling the pool for the plain share of every score (e.g. "Wordle 1,234 3/6") in the background."""
+    for result in ("1", "2", "3", "4", "5", "6", "X"):
+        key = f"{result}/-"
+        if key not in _pool:
+            _schedule_fill(key)
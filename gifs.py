@@ -0,0 +1,197 @@
+import asyncio
+import bisect
+import difflib
+import json
+import os
+import random
+import re
+import time
+from typing import Optional
+
+GIFS_FILE = os.getenv("GIFS_FILE", "gifs.json")
+# Seconds between checks of the catalog file's modification time
+RELOAD_INTERVAL = float(os.getenv("GIFS_RELOAD_INTERVAL", "5"))
+# Discord shows at most 25 autocomplete choices
+AUTOCOMPLETE_LIMIT = 25
+# Longest substrings indexed for substring search; longer queries intersect these
+NGRAM_SIZE = 3
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    """Normalize a category name for matching, e.g. "Liar's Bar" and "liars_bar" both become "liarsbar"."""
+    return _NON_ALPHANUMERIC.sub("", name.lower())
+
+
+def display_name(category: str) -> str:
+    return category.replace("_", " ")
+
+
+class GifCatalog:
+    """An immutable snapshot of the GIF catalog with its lookup indexes precomputed."""
+
+    def __init__(self, categories: dict[str, list[str]]):
+        # Empty categories are dropped so a random pick never comes up empty
+        self.categories: dict[str, tuple[str, ...]] = {
+            name: tuple(urls) for name, urls in categories.items() if urls
+        }
+        self.names: tuple[str, ...] = tuple(self.categories)
+        # Normalized name -> category, plus the normalized names sorted for prefix search
+        self._index: dict[str, str] = {}
+        for name in self.names:
+            key = normalize(name)
+            if key in self._index:
+                print(f"GIF categories {self._index[key]!r} and {name!r} have the same name, ignoring {name!r}")
+                continue
+            self._index[key] = name
+        self._sorted_keys: list[str] = sorted(self._index)
+        # Every substring of up to NGRAM_SIZE characters -> positions in _sorted_keys of the
+        # keys containing it, in order, so substring search only looks at keys that can match
+        ngrams: dict[str, list[int]] = {}
+        for position, key in enumerate(self._sorted_keys):
+            grams = {
+                key[start:start + size]
+                for size in range(1, NGRAM_SIZE + 1)
+                for start in range(len(key) - size + 1)
+            }
+            for gram in grams:
+                ngrams.setdefault(gram, []).append(position)
+        self._ngrams: dict[str, tuple[int, ...]] = {gram: tuple(positions) for gram, positions in ngrams.items()}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def find(self, query: str) -> Optional[str]:
+        """Find the category a query names, ignoring case, spaces and punctuation."""
+        return self._index.get(normalize(query))
+
+    def random_gif(self, category: Optional[str] = None) -> Optional[str]:
+        """
+        Pick a random GIF from a category, or from a random category.
+
+        Args:
+            category: Category name as stored in the catalog
+
+        Returns:
+            A GIF URL, None if the catalog or category is empty
+        """
+        if category is None:
+            if not self.names:
+                return None
+            category = random.choice(self.names)
+        gifs = self.categories.get(category)
+        return random.choice(gifs) if gifs else None
+
+    def _substring_matches(self, key: str, limit: int, exclude: set[str]) -> list[str]:
+        """Find up to `limit` keys containing a key, in sorted order, using the n-gram index."""
+        if len(key) <= NGRAM_SIZE:
+            candidates = self._ngrams.get(key, ())
+        else:
+            # Only keys containing the query's rarest n-gram can contain the query
+            candidates = min(
+                (self._ngrams.get(key[start:start + NGRAM_SIZE], ()) for start in range(len(key) - NGRAM_SIZE + 1)),
+                key=len,
+            )
+
+        matches = []
+        for position in candidates:
+            candidate = self._sorted_keys[position]
+            if candidate in exclude or key not in candidate:
+                continue
+            matches.append(candidate)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def autocomplete(self, query: str, limit: int = AUTOCOMPLETE_LIMIT) -> list[str]:
+        """
+        Suggest categories for a partially typed query.
+
+        Prefix matches come first, then other substring matches. Both come
+        from precomputed indexes and stop at `limit`, since this runs on
+        every keystroke.
+
+        Args:
+            query: What the user has typed so far
+            limit: Maximum number of suggestions
+
+        Returns:
+            Category names, best matches first
+        """
+        key = normalize(query)
+        if not key:
+            return list(self.names[:limit])
+
+        matches = []
+        start = bisect.bisect_left(self._sorted_keys, key)
+        for candidate in self._sorted_keys[start:]:
+            if not candidate.startswith(key) or len(matches) >= limit:
+                break
+            matches.append(candidate)
+
+        if len(matches) < limit:
+            matches.extend(self._substring_matches(key, limit - len(matches), set(matches)))
+        return [self._index[candidate] for candidate in matches]
+
+    def suggest(self, query: str) -> Optional[str]:
+        """
+        Get the closest category to a query that doesn't name one, if any is close.
+
+        Falls back to fuzzy matching for typos, which compares against every
+        category, so it is only used for a /gif with an unknown category.
+        """
+        matches = self.autocomplete(query, limit=1)
+        if matches:
+            return matches[0]
+        close = difflib.get_close_matches(normalize(query), self._sorted_keys, n=1, cutoff=0.6)
+        return self._index[close[0]] if close else None
+
+
+_catalog = GifCatalog({})
+_loaded_mtime: Optional[float] = None
+_checked_at = float("-inf")
+
+
+def load_catalog(path: str) -> GifCatalog:
+    """Load a catalog from a JSON file mapping category names to lists of GIF URLs."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    return GifCatalog({str(name): [str(url) for url in urls] for name, urls in data.items()})
+
+
+async def get_catalog() -> GifCatalog:
+    """
+    Get the current catalog, reloading it if the file changed.
+
+    The file's modification time is checked at most every RELOAD_INTERVAL
+    seconds. A new catalog is built completely, in a worker thread so the
+    event loop isn't held up, before it replaces the old one. An invalid
+    file leaves the old one in place.
+
+    Returns:
+        The current catalog, empty if the file doesn't exist
+    """
+    global _catalog, _loaded_mtime, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < RELOAD_INTERVAL:
+        return _catalog
+    _checked_at = now
+
+    try:
+        mtime = os.stat(GIFS_FILE).st_mtime
+    except OSError:
+        return _catalog
+    if mtime == _loaded_mtime:
+        return _catalog
+
+    try:
+        catalog = await asyncio.to_thread(load_catalog, GIFS_FILE)
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        print(f"Error loading {GIFS_FILE}, keeping the previous catalog: {e}")
+        _loaded_mtime = mtime
+        return _catalog
+    _catalog, _loaded_mtime = catalog, mtime
+    return _catalog
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+import aiohttp
+
+# How long a fetched leaderboard is served from memory, in seconds
+CACHE_TTL = float(os.getenv("HAMSTERDLE_CACHE_TTL", "60"))
+# Total timeout for a single request to the Unity endpoint, in seconds
+REQUEST_TIMEOUT = float(os.getenv("HAMSTERDLE_TIMEOUT", "10"))
+
+# Shared HTTP session (initialized lazily) so connections are kept alive and reused
+_session: Optional[aiohttp.ClientSession] = None
+
+# Cached leaderboard and the monotonic time it was fetched at
+_cached_leaderboard: Optional[list[dict]] = None
+_cached_at = 0.0
+
+# In-flight fetch shared by all concurrent callers
+_inflight: Optional[asyncio.Task] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Basic {os.getenv('AUTHORIZATION_HEADER')}",
+            },
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=300),
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared HTTP session."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def is_cached() -> bool:
+    """Return True if a fresh leaderboard is available without a network call."""
+    return (
+        _cached_leaderboard is not None
+        and time.monotonic() - _cached_at < CACHE_TTL
+    )
+
+
+async def _fetch_leaderboard() -> list[dict]:
+    global _cached_leaderboard, _cached_at
+    async with _get_session().get(os.getenv("UNITY_URL")) as response:
+        response.raise_for_status()
+        data = await response.json(content_type=None)
+    _cached_leaderboard = data["results"]
+    _cached_at = time.monotonic()
+    return _cached_leaderboard
+
+
+async def get_leaderboard() -> list[dict]:
+    """
+    Get the daily Hamsterdle leaderboard.
+
+    Serves from the in-memory cache while it is fresh. On a miss, concurrent
+    callers share a single upstream request instead of each making their own.
+
+    Returns:
+        The list of leaderboard entries, best first
+
+    Raises:
+        Exception: If the upstream request fails
+    """
+    global _inflight
+    if is_cached():
+        return _cached_leaderboard
+
+    if _inflight is None or _inflight.done():
+        _inflight = asyncio.create_task(_fetch_leaderboard())
+
+    # Shield the shared task so one cancelled caller doesn't cancel it for the others
+    return await asyncio.shield(_inflight)
@@ -0,0 +1,187 @@
+import asyncio
+import os
+from typing import AsyncIterator, Optional, Sequence
+
+from xai_sdk import AsyncClient
+from xai_sdk.chat import assistant, user, system
+
+import metrics
+
+DEFAULT_MODEL = "grok-4-1-fast-reasoning"
+
+# Maximum number of LLM calls running at the same time across the whole bot
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+# Maximum number of calls allowed to wait for a free slot before new ones are rejected
+MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+# Per-call timeout in seconds, covering both queueing and generation
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+
+class LLMBusyError(Exception):
+    """Raised when the wait queue is full and a call is rejected immediately."""
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a call does not finish within its timeout."""
+
+
+# Client and limiter are created lazily so importing this module has no side effects
+_client: Optional[AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_waiting = 0
+
+
+def _get_client() -> AsyncClient:
+    """Get the shared async xAI client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = AsyncClient(api_key=os.getenv("XAI_API_KEY"))
+    return _client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Get the global concurrency limiter, creating it on first use."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _semaphore
+
+
+def queue_depth() -> int:
+    """Return the number of calls currently waiting for a free slot."""
+    return _waiting
+
+
+def _create_chat(system_prompt: str, prompt: str, model: str, history: Sequence[tuple[str, str]]):
+    chat = _get_client().chat.create(model=model)
+    chat.append(system(system_prompt))
+    for role, content in history:
+        chat.append(assistant(content) if role == "assistant" else user(content))
+    chat.append(user(prompt))
+    return chat
+
+
+async def _sample(system_prompt: str, prompt: str, model: str, history: Sequence[tuple[str, str]] = ()) -> str:
+    response = await _create_chat(system_prompt, prompt, model, history).sample()
+    return response.content
+
+
+async def _stream(
+    system_prompt: str, prompt: str, model: str, history: Sequence[tuple[str, str]] = ()
+) -> AsyncIterator[str]:
+    async for _, chunk in _create_chat(system_prompt, prompt, model, history).stream():
+        if chunk.content:
+            yield chunk.content
+
+
+async def _acquire(deadline: float) -> asyncio.Semaphore:
+    """Wait for a free slot until the deadline, returning the semaphore to release afterwards."""
+    global _waiting
+    semaphore = _get_semaphore()
+    if semaphore.locked() and _waiting >= MAX_QUEUE:
+        raise LLMBusyError("Too many requests are waiting for the LLM")
+
+    _waiting += 1
+    try:
+        with metrics.timed("llm_wait"):
+            async with asyncio.timeout_at(deadline):
+                await semaphore.acquire()
+    except TimeoutError:
+        raise LLMTimeoutError("Timed out waiting for a free LLM slot") from None
+    finally:
+        _waiting -= 1
+    return semaphore
+
+
+async def complete(
+    system_prompt: str,
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    timeout: Optional[float] = None,
+    history: Sequence[tuple[str, str]] = (),
+) -> str:
+    """
+    Run a single chat completion without blocking the event loop.
+
+    Calls share a global concurrency cap. Callers beyond the cap wait in a
+    bounded queue; once the queue is full, new calls are rejected straight away.
+
+    Args:
+        system_prompt: The system prompt for the chat
+        prompt: The user message to respond to
+        model: The model to use
+        timeout: Seconds to wait for a slot and the completion, defaults to LLM_TIMEOUT
+        history: Earlier (role, content) messages of the conversation, oldest first,
+            where role is "user" or "assistant"
+
+    Returns:
+        The completion text
+
+    Raises:
+        LLMBusyError: If too many calls are already waiting
+        LLMTimeoutError: If the call does not finish within the timeout
+    """
+    deadline = asyncio.get_running_loop().time() + (DEFAULT_TIMEOUT if timeout is None else timeout)
+    semaphore = await _acquire(deadline)
+    try:
+        with metrics.timed("llm_sample"):
+            async with asyncio.timeout_at(deadline):
+                return await _sample(system_prompt, prompt, model, history)
+    except TimeoutError:
+        raise LLMTimeoutError("The LLM took too long to respond") from None
+    finally:
+        semaphore.release()
+
+
+async def stream(
+    system_prompt: str,
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    timeout: Optional[float] = None,
+    history: Sequence[tuple[str, str]] = (),
+) -> AsyncIterator[str]:
+    """
+    Stream a single chat completion, yielding pieces of text as they are generated.
+
+    Shares the concurrency cap, queue and timeout of complete(); the slot is
+    held until the stream is exhausted or closed.
+
+    Args:
+        system_prompt: The system prompt for the chat
+        prompt: The user message to respond to
+        model: The model to use
+        timeout: Seconds to wait for a slot and the whole completion, defaults to LLM_TIMEOUT
+        history: Earlier (role, content) messages of the conversation, oldest first,
+            where role is "user" or "assistant"
+
+    Yields:
+        The completion text, piece by piece
+
+    Raises:
+        LLMBusyError: If too many calls are already waiting
+        LLMTimeoutError: If the call does not finish within the timeout
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + (DEFAULT_TIMEOUT if timeout is None else timeout)
+    semaphore = await _acquire(deadline)
+    start = loop.time()
+    first = True
+    pieces = _stream(system_prompt, prompt, model, history)
+    try:
+        while True:
+            try:
+                # Only the wait for the next piece is timed out, never the caller's handling of it
+                async with asyncio.timeout_at(deadline):
+                    piece = await anext(pieces)
+            except StopAsyncIteration:
+                break
+            except TimeoutError:
+                raise LLMTimeoutError("The LLM took too long to respond") from None
+            if first:
+                metrics.observe("llm_first_token", loop.time() - start)
+                first = False
+            yield piece
+        metrics.observe("llm_stream", loop.time() - start)
+    finally:
+        await pieces.aclose()
+        semaphore.release()
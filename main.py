@@ -1,56 +1,179 @@
+import time
+
+# Measured from here, before any heavy imports
+STARTED_AT = time.perf_counter()
+
+from dotenv import load_dotenv
+
+# Load .env before the modules below read their settings from the environment
+load_dotenv()
+
+import asyncio
 import discord
+import hashlib
+import math
 import os
 from pathlib import Path
-import random
 import re
 import json
 import datetime
-from dotenv import load_dotenv
+from discord import app_commands
 from discord.ext import tasks
-import requests
 from discord.ext import commands
-from xai_sdk import Client
-from xai_sdk.chat import user, system
-from game_scores import (
-    process_wordle_message,
-    process_connections_message,
-    process_strands_message,
+import llm
+import metrics
+import conversation
+import admission
+import replies
+import outbox
+import archive
+import backfill
+import gifs
+import sharding
+import hamsterdle as hamsterdle_client
+from game_scores import process_game_score_message_async, prewarm_wordle_pool
+from game_scores.wordle import WORDLE_AI_ENABLED
+from database import (
+    init_db,
+    close_db,
+    log_message,
+    upsert_server_prompt,
+    get_server_prompt,
+    list_server_prompt_versions,
+    rollback_server_prompt,
+    set_leaderboard_channel,
+    get_leaderboard_channels,
+    get_bot_setting,
+    set_bot_setting,
+    record_game_score,
+    get_game_stats,
+    maintain_bot_message_partitions,
+    prune_game_stats,
+    log_queue_depth,
+    dropped_log_records,
+    ActionType,
+    GameType,
+    StatPeriod,
+    NO_SCORE_BUCKET,
 )
-from database import init_db, log_message, upsert_server_prompt, get_server_prompt, ActionType
 
-load_dotenv()
+IMPORT_SECONDS = time.perf_counter() - STARTED_AT
 
 intents = discord.Intents.default()
 intents.message_content = True
 
-discord_client = commands.Bot(command_prefix="!", intents=intents)
-xai_client = Client(api_key=os.getenv("XAI_API_KEY"))
+# Hash of the last synced command tree, so unchanged commands aren't synced again on restart.
+# Kept in the database, since the dyno's filesystem is wiped on restart; the file is only
+# used without a database.
+COMMAND_TREE_HASH_FILE = os.getenv("COMMAND_TREE_HASH_FILE", ".command_tree_hash")
+COMMAND_TREE_HASH_SETTING = "command_tree_hash"
 
-AUTHORIZATION_HEADER = os.getenv("AUTHORIZATION_HEADER")
-UNITY_URL = os.getenv("UNITY_URL")
-GIFS_FILE = "gifs.json"
+def command_tree_hash(tree: app_commands.CommandTree) -> str:
+    payload = [command.to_dict(tree) for command in tree.get_commands()]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+async def sync_command_tree(bot: commands.Bot) -> None:
+    """Sync the application commands with Discord, unless they haven't changed since the last sync."""
+    tree_hash = f"{bot.application_id}:{command_tree_hash(bot.tree)}"
+    hash_file = Path(COMMAND_TREE_HASH_FILE)
+    synced_hash = await get_bot_setting(COMMAND_TREE_HASH_SETTING)
+    if synced_hash is None:
+        try:
+            synced_hash = hash_file.read_text()
+        except OSError:
+            pass
+    if synced_hash == tree_hash:
+        print("Commands unchanged, skipping sync.")
+        return
+    
+    try:
+        synced = await bot.tree.sync()
+        print(f"Synced {len(synced)} commands.")
+    except Exception as e:
+        print(f"Error syncing commands: {e}")
+        return
+    if await set_bot_setting(COMMAND_TREE_HASH_SETTING, tree_hash):
+        return
+    try:
+        hash_file.write_text(tree_hash)
+    except OSError as e:
+        print(f"Error saving command tree hash: {e}")
+
+class CheripitBot(sharding.BotBase):
+    """
+    The bot, with one-time startup and shutdown work that doesn't repeat on gateway reconnects.
+    
+    Runs as an AutoShardedBot when SHARD_COUNT is set, see sharding.py.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ready_count = 0
+        sharding.track(self)
+    
+    async def setup_hook(self):
+        # Runs once, after login and before connecting to the gateway
+        setup_started = time.perf_counter()
+        await init_db()
+        if METRICS_PORT:
+            await metrics.start_server(METRICS_PORT)
+        if WORDLE_AI_ENABLED:
+            prewarm_wordle_pool()
+        send_daily_message.start()
+        # Work done once per bot, not once per process, when shards are split between processes
+        if sharding.owns_global_work():
+            maintain_database.start()
+            await sync_command_tree(self)
+        setup_seconds = time.perf_counter() - setup_started
+        metrics.observe("startup_setup", setup_seconds)
+        print(f"Startup: imports took {IMPORT_SECONDS:.2f}s, setup took {setup_seconds:.2f}s")
+    
+    async def close(self):
+        send_daily_message.cancel()
+        maintain_database.cancel()
+        # Stop running backfills before the database closes; they resume from their checkpoint
+        for task in backfill_tasks:
+            task.cancel()
+        await asyncio.gather(*backfill_tasks, return_exceptions=True)
+        # Send what is still queued while the connection is up
+        await outbox.drain(OUTBOX_DRAIN_TIMEOUT)
+        await hamsterdle_client.close_session()
+        await metrics.stop_server()
+        await close_db()
+        await super().close()
+
+discord_client = CheripitBot(command_prefix="!", intents=intents, **sharding.bot_options())
+
+# Stream Grok answers into a progressively edited reply instead of waiting for the whole answer
+GROK_STREAMING = os.getenv("GROK_STREAMING", "true") == "true"
+
+# Seconds queued messages get to be sent on shutdown
+OUTBOX_DRAIN_TIMEOUT = float(os.getenv("OUTBOX_DRAIN_TIMEOUT", "5"))
+
+# Maximum number of servers the daily leaderboard is sent to at the same time
+LEADERBOARD_FANOUT = int(os.getenv("LEADERBOARD_FANOUT", "10"))
+# Channel the leaderboard goes to in servers that never picked one with /set_leaderboard_channel
+LEGACY_LEADERBOARD_CHANNEL = "g✱mer-safe-space"
+
+# Local port for the Prometheus metrics endpoint, disabled when unset
+METRICS_PORT = int(os.getenv("METRICS_PORT") or 0)
+
+metrics.register_gauge("llm_queue_depth", llm.queue_depth)
+metrics.register_gauge("log_queue_depth", log_queue_depth)
+metrics.register_gauge("log_records_dropped", dropped_log_records)
+metrics.register_gauge("conversation_channels", conversation.channel_count)
+metrics.register_gauge("admission_queue_depth", admission.queue_depth)
+metrics.register_gauge("outbox_queue_depth", outbox.queue_depth)
+metrics.register_labeled_gauge("shard_latency_seconds", "shard", lambda: sharding.shard_latencies(discord_client))
+metrics.observe("startup_import", IMPORT_SECONDS)
 
 DEFAULT_PROMPT = """* You are Grok, a helpful assistant
 * Your goal is to be silly and very politically right wing
 * Please respond concisely"""
 
-if Path(GIFS_FILE).exists():
-    try:
-        with open(GIFS_FILE, "r") as f:
-            gif_database = json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        gif_database = {}
-else:
-    gif_database = {}
-
 async def get_daily_hamsterdle_leaderboard() -> tuple[discord.Embed | None, str]:
     try:
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Basic {AUTHORIZATION_HEADER}",
-        }
-        response = requests.get(UNITY_URL, headers=headers)
-        leaderboard = response.json()["results"]
+        leaderboard = await hamsterdle_client.get_leaderboard()
 
         # If leaderboard is empty, don't generate an embed or response
         if not leaderboard:
@@ -104,15 +227,55 @@ async def get_daily_hamsterdle_leaderboard() -> tuple[discord.Embed | None, str]
 
 @discord_client.event
 async def on_ready():
-    print(f"Logged in as {discord_client.user}!")
-    await init_db()
-    try:
-        synced = await discord_client.tree.sync()
-        print(f"Synced {len(synced)} commands.")
-    except Exception as e:
-        print(f"Error syncing commands: {e}")
-    send_daily_message.start()
+    # Fires again on every gateway reconnect, so one-time startup work lives in setup_hook
+    discord_client.ready_count += 1
+    metrics.increment("gateway_ready")
+    if discord_client.ready_count == 1:
+        ready_seconds = time.perf_counter() - STARTED_AT
+        metrics.observe("startup_ready", ready_seconds)
+        print(f"Logged in as {discord_client.user}! Ready {ready_seconds:.2f}s after start.")
+        if discord_client.shard_count:
+            print(f"Running shards {discord_client.shard_ids or 'all'} of {discord_client.shard_count}.")
+    else:
+        print(f"Reconnected as {discord_client.user}.")
+
 
+async def get_leaderboard_targets(guilds: list[discord.Guild]) -> list[discord.TextChannel]:
+    """
+    Get the channels the daily leaderboard is posted in, among the given servers.
+    
+    Servers without a configured channel fall back to LEGACY_LEADERBOARD_CHANNEL
+    if they have one, which is then saved as their configured channel. Servers
+    that have neither are searched for it by name again on every run.
+    
+    Args:
+        guilds: The servers this client is connected to
+    
+    Returns:
+        The channels to post in, at most one per server
+    """
+    # None without a database, so every server uses the legacy channel
+    configured = await get_leaderboard_channels()
+    channels = []
+    for guild in guilds:
+        if configured is not None and guild.id in configured:
+            channel_id = configured[guild.id]
+            channel = guild.get_channel(channel_id) if channel_id is not None else None
+        else:
+            channel = discord.utils.get(guild.text_channels, name=LEGACY_LEADERBOARD_CHANNEL)
+            if channel is not None and configured is not None:
+                await set_leaderboard_channel(
+                    guild_id=guild.id,
+                    guild_name=guild.name,
+                    channel_id=channel.id,
+                    channel_name=channel.name,
+                    user_id=discord_client.user.id,
+                    user_name=discord_client.user.name,
+                    user_display_name=discord_client.user.display_name,
+                )
+        if channel is not None:
+            channels.append(channel)
+    return channels
 
 @tasks.loop(
     time=[
@@ -121,19 +284,64 @@ async def on_ready():
     ]
 )
 async def send_daily_message():
-    gamer_channel = discord.utils.get(discord_client.guilds[0].channels, name="g✱mer-safe-space")
+    # Only servers this client is connected to, with a channel it can still see
+    channels = await get_leaderboard_targets(discord_client.guilds)
+    if not channels:
+        return
 
-    if gamer_channel:
-        embed, response = await get_daily_hamsterdle_leaderboard()
-        if embed:
-            await gamer_channel.send(embed=embed)
-        if response:
-            await gamer_channel.send(response)
+    # Fetched once and shared by every server
+    embed, response = await get_daily_hamsterdle_leaderboard()
+    if not embed and not response:
+        return
+
+    semaphore = asyncio.Semaphore(LEADERBOARD_FANOUT)
+
+    async def send_leaderboard(channel):
+        async with semaphore:
+            try:
+                with metrics.timed("leaderboard_send"):
+                    if embed:
+                        await outbox.send(channel, embed=embed, priority=outbox.BULK)
+                    if response:
+                        await outbox.send(channel, response, priority=outbox.BULK)
+            except Exception as e:
+                # One server's missing permissions mustn't stop the others
+                print(f"Error sending leaderboard to {channel.guild.name} #{channel.name}: {e}")
+
+    await asyncio.gather(*(send_leaderboard(channel) for channel in channels))
+
+@send_daily_message.before_loop
+async def before_send_daily_message():
+    # Started from setup_hook, before the guild list is available
+    await discord_client.wait_until_ready()
+
+@tasks.loop(hours=24)
+async def maintain_database():
+    # Archive first, so rows are archived before their partition is dropped
+    if archive.ARCHIVE_AFTER_DAYS and not archive.ARCHIVE_DIR_CONFIGURED:
+        # The default directory is on the dyno's filesystem, which a restart wipes
+        print("Warning: ARCHIVE_AFTER_DAYS is set without ARCHIVE_DIR, not archiving bot messages")
+    elif archive.ARCHIVE_AFTER_DAYS:
+        await archive.archive_bot_messages(
+            datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=archive.ARCHIVE_AFTER_DAYS)
+        )
+    await maintain_bot_message_partitions()
+    await prune_game_stats()
 
 @discord_client.tree.command(name="hamsterdle", description="display the daily hamsterdle leaderboard")
 async def hamsterdle(interaction: discord.Interaction):
+    # Defer on a cold cache so the upstream fetch can't miss the interaction deadline
+    deferred = not hamsterdle_client.is_cached()
+    if deferred:
+        await interaction.response.defer()
+
     embed, response = await get_daily_hamsterdle_leaderboard()
-    if embed:
+    if deferred:
+        if embed:
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.followup.send(response or "The daily hamsterdle leaderboard is empty!")
+    elif embed:
         await interaction.response.send_message(embed=embed)
     
     # Log the command to database
@@ -153,26 +361,22 @@ async def hamsterdle(interaction: discord.Interaction):
 
 @discord_client.tree.command(name="gif", description="display a random gif, optionally from a specific category")
 async def gif(interaction: discord.Interaction, category: str = None):
-    gif_to_send = None
+    catalog = await gifs.get_catalog()
     
-    if not gif_database:
-        await interaction.response.send_message("No gifs available!")
+    if not catalog:
         gif_to_send = "No gifs available!"
     elif not category:
         # Get a random category and then a random gif from that category
-        category = random.choice(list(gif_database.keys()))
-        gif_to_send = random.choice(gif_database[category])
-        await interaction.response.send_message(gif_to_send)
+        gif_to_send = catalog.random_gif()
+    elif (found := catalog.find(category)) is not None:
+        category = found
+        gif_to_send = catalog.random_gif(found)
     else:
-        # Convert category to lowercase and replace spaces with underscores
-        category = category.lower().replace(' ', '_')
-        
-        if category in gif_database:
-            gif_to_send = random.choice(gif_database[category])
-            await interaction.response.send_message(gif_to_send)
-        else:
-            gif_to_send = f"No gifs for {category}!"
-            await interaction.response.send_message(gif_to_send)
+        gif_to_send = f"No gifs for {category}!"
+        if suggestion := catalog.suggest(category):
+            gif_to_send += f" Did you mean {gifs.display_name(suggestion)}?"
+    
+    await interaction.response.send_message(gif_to_send)
     
     # Log the command to database
     if interaction.guild:
@@ -189,6 +393,13 @@ async def gif(interaction: discord.Interaction, category: str = None):
             bot_response=gif_to_send,
         )
 
+@gif.autocomplete("category")
+async def gif_category_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    return [
+        app_commands.Choice(name=gifs.display_name(category), value=category)
+        for category in (await gifs.get_catalog()).autocomplete(current)
+    ]
+
 @discord_client.tree.command(
     name="set_prompt",
     description="Set a custom Grok system prompt for **this** server",
@@ -289,58 +500,539 @@ async def show_grok_prompt(interaction: discord.Interaction):
         bot_response=current_prompt,
     )
 
-async def grok_answer(prompt: str, server_id: int | None = None) -> str:
+@discord_client.tree.command(
+    name="prompt_history",
+    description="Show the recent Grok system prompts for **this** server",
+)
+@app_commands.default_permissions(manage_guild=True)
+async def prompt_history(interaction: discord.Interaction):
+    if interaction.guild is None:
+        await interaction.response.send_message(
+            "❌ This command can only be used in servers, not in DMs."
+        )
+        return
+    
+    versions = await list_server_prompt_versions(interaction.guild.id)
+    
+    embed = discord.Embed(
+        title="📜 Grok Prompt History",
+        color=0x00ff00
+    )
+    if not versions:
+        embed.description = "No custom prompts have been set yet."
+    for version in versions:
+        # Embed field values are limited to 1024 characters
+        prompt = version.system_prompt if len(version.system_prompt) <= 200 else version.system_prompt[:200] + "…"
+        embed.add_field(
+            name=f"Version {version.version} by {version.user_display_name} ({version.created_at:%Y-%m-%d})",
+            value=f"```\n{prompt}\n```",
+            inline=False
+        )
+    embed.set_footer(text="Use /rollback_prompt to restore an earlier version.")
+    
+    await interaction.response.send_message(embed=embed)
+    
+    # Log the command to database
+    await log_message(
+        guild_id=interaction.guild.id,
+        guild_name=interaction.guild.name,
+        channel_id=interaction.channel.id,
+        channel_name=interaction.channel.name,
+        user_id=interaction.user.id,
+        user_name=interaction.user.name,
+        user_display_name=interaction.user.display_name,
+        action_type=ActionType.PROMPT_HISTORY,
+        user_message=None,
+        bot_response=f"{len(versions)} versions",
+    )
+
+@discord_client.tree.command(
+    name="rollback_prompt",
+    description="Restore an earlier Grok system prompt for **this** server",
+)
+@app_commands.describe(version="Version number from /prompt_history")
+@app_commands.default_permissions(manage_guild=True)
+async def rollback_prompt(interaction: discord.Interaction, version: int):
+    if interaction.guild is None:
+        await interaction.response.send_message(
+            "❌ This command can only be used in servers, not in DMs."
+        )
+        return
+    
+    prompt = await rollback_server_prompt(
+        guild_id=interaction.guild.id,
+        guild_name=interaction.guild.name,
+        version=version,
+        user_id=interaction.user.id,
+        user_name=interaction.user.name,
+        user_display_name=interaction.user.display_name,
+    )
+    
+    if prompt is not None:
+        embed = discord.Embed(
+            title=f"⏪ Restored Grok Prompt Version {version}",
+            description=f"```\n{prompt}\n```",
+            color=0x00ff00
+        )
+    else:
+        embed = discord.Embed(
+            title="⚠️ Prompt Not Restored",
+            description=f"Version {version} wasn't found or couldn't be restored.",
+            color=0xffaa00
+        )
+    
+    await interaction.response.send_message(embed=embed)
+    
+    # Log the command to database
+    await log_message(
+        guild_id=interaction.guild.id,
+        guild_name=interaction.guild.name,
+        channel_id=interaction.channel.id,
+        channel_name=interaction.channel.name,
+        user_id=interaction.user.id,
+        user_name=interaction.user.name,
+        user_display_name=interaction.user.display_name,
+        action_type=ActionType.ROLLBACK_PROMPT,
+        user_message=str(version),
+        bot_response=prompt if prompt is not None else "Version not found",
+    )
+
+@discord_client.tree.command(
+    name="set_leaderboard_channel",
+    description="Set the channel the daily Hamsterdle leaderboard is posted in for **this** server",
+)
+@app_commands.describe(channel="Channel to post in; leave empty to stop posting the leaderboard")
+@app_commands.default_permissions(manage_guild=True)
+async def set_leaderboard_channel_command(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    if interaction.guild is None:
+        await interaction.response.send_message(
+            "❌ This command can only be used in servers, not in DMs."
+        )
+        return
+    
+    success = await set_leaderboard_channel(
+        guild_id=interaction.guild.id,
+        guild_name=interaction.guild.name,
+        channel_id=channel.id if channel else None,
+        channel_name=channel.name if channel else None,
+        user_id=interaction.user.id,
+        user_name=interaction.user.name,
+        user_display_name=interaction.user.display_name,
+    )
+    
+    if not success:
+        response = "⚠️ The leaderboard channel couldn't be saved because of a database error."
+    elif channel:
+        response = f"✅ The daily Hamsterdle leaderboard will be posted in {channel.mention}."
+    else:
+        response = "✅ The daily Hamsterdle leaderboard will no longer be posted in this server."
+    
+    await interaction.response.send_message(response)
+    
+    # Log the command to database
+    await log_message(
+        guild_id=interaction.guild.id,
+        guild_name=interaction.guild.name,
+        channel_id=interaction.channel.id,
+        channel_name=interaction.channel.name,
+        user_id=interaction.user.id,
+        user_name=interaction.user.name,
+        user_display_name=interaction.user.display_name,
+        action_type=ActionType.SET_LEADERBOARD_CHANNEL,
+        user_message=channel.name if channel else None,
+        bot_response=response,
+    )
+
+# Running backfills, so their tasks aren't garbage collected before they finish
+backfill_tasks: set[asyncio.Task] = set()
+
+@discord_client.tree.command(
+    name="backfill_scores",
+    description="Record the game scores shared in a channel's history for **this** server's stats",
+)
+@app_commands.describe(channel="Channel to backfill; defaults to this one")
+@app_commands.default_permissions(administrator=True)
+async def backfill_scores(interaction: discord.Interaction, channel: discord.TextChannel = None):
+    if interaction.guild is None:
+        await interaction.response.send_message(
+            "❌ This command can only be used in servers, not in DMs."
+        )
+        return
+    
+    channel = channel or interaction.channel
+    if backfill.is_running(channel.id):
+        response = f"⏳ {channel.mention} is already being backfilled."
+        await interaction.response.send_message(response, ephemeral=True)
+    else:
+        response = f"⏳ Backfilling game scores from {channel.mention}. Progress shows up here."
+        await interaction.response.send_message(response)
+        
+        async def show_progress(result: backfill.BackfillResult) -> None:
+            try:
+                await interaction.edit_original_response(
+                    content=f"⏳ Backfilling {channel.mention}: {result.messages_scanned} messages scanned, "
+                    f"{result.scores_recorded} scores recorded"
+                )
+            except discord.HTTPException:
+                # The interaction expires after 15 minutes; the summary is still posted at the end
+                pass
+        
+        async def run_backfill() -> None:
+            try:
+                result = await backfill.backfill_channel(channel, show_progress)
+            except discord.Forbidden:
+                summary = f"❌ I can't read the history of {channel.mention}."
+            except Exception as e:
+                print(f"Error backfilling {interaction.guild.name} #{channel.name}: {e}")
+                metrics.increment("errors", "stage", "backfill")
+                summary = (
+                    f"⚠️ Backfill of {channel.mention} stopped early because of an error. "
+                    "Run it again to resume."
+                )
+            else:
+                if result is None:
+                    return
+                progress = f"{result.messages_scanned} messages scanned, {result.scores_recorded} scores recorded"
+                if result.completed:
+                    summary = f"✅ Backfilled {channel.mention}: {progress}."
+                else:
+                    summary = f"⚠️ Backfill of {channel.mention} stopped early ({progress}). Run it again to resume."
+            try:
+                await outbox.send(interaction.channel, summary)
+            except Exception as e:
+                print(f"Error sending backfill summary: {e}")
+        
+        task = asyncio.create_task(run_backfill())
+        backfill_tasks.add(task)
+        task.add_done_callback(backfill_tasks.discard)
+    
+    # Log the command to database
+    await log_message(
+        guild_id=interaction.guild.id,
+        guild_name=interaction.guild.name,
+        channel_id=interaction.channel.id,
+        channel_name=interaction.channel.name,
+        user_id=interaction.user.id,
+        user_name=interaction.user.name,
+        user_display_name=interaction.user.display_name,
+        action_type=ActionType.BACKFILL_SCORES,
+        user_message=channel.name,
+        bot_response=response,
+    )
+
+STATS_PERIOD_NAMES = {
+    StatPeriod.DAY: "Today",
+    StatPeriod.WEEK: "This Week",
+    StatPeriod.ALL: "All Time",
+}
+
+# What GameScore.score means for each game; lower is better for all of them
+STATS_SCORE_NAMES = {
+    GameType.WORDLE: "guesses",
+    GameType.CONNECTIONS: "mistakes",
+    GameType.STRANDS: "hints",
+}
+
+@discord_client.tree.command(name="stats", description="Show game stats for **this** server")
+@app_commands.choices(
+    game=[app_commands.Choice(name=game.value.capitalize(), value=game.value) for game in GameType],
+    period=[app_commands.Choice(name=name, value=period.value) for period, name in STATS_PERIOD_NAMES.items()],
+)
+async def stats(
+    interaction: discord.Interaction,
+    game: app_commands.Choice[str],
+    period: app_commands.Choice[str] | None = None,
+):
+    if interaction.guild is None:
+        await interaction.response.send_message(
+            "❌ This command can only be used in servers, not in DMs."
+        )
+        return
+    
+    game_type = GameType(game.value)
+    stat_period = StatPeriod(period.value) if period else StatPeriod.ALL
+    totals, players, distribution = await get_game_stats(interaction.guild.id, game_type, stat_period)
+    score_name = STATS_SCORE_NAMES[game_type]
+    
+    embed = discord.Embed(
+        title=f"📊 {game.name} Stats ({STATS_PERIOD_NAMES[stat_period]})",
+        color=0x538d4e  # Wordle green
+    )
+    if totals is None:
+        embed.description = "No scores recorded yet!"
+    else:
+        embed.description = f"{totals.plays} plays, {totals.win_rate:.0%} won"
+        if totals.average_score is not None:
+            embed.description += f", {totals.average_score:.2f} {score_name} on average"
+        
+        embed.add_field(
+            name="Top Players",
+            value="\n".join(
+                f"{rank}. <@{player.user_id}>: {player.plays} plays, {player.win_rate:.0%} won"
+                + (f", {player.average_score:.2f} {score_name}" if player.average_score is not None else "")
+                for rank, player in enumerate(players, start=1)
+            ),
+            inline=False,
+        )
+        embed.add_field(
+            name=f"Distribution ({score_name})",
+            value="\n".join(
+                f"{'X' if bucket == NO_SCORE_BUCKET else bucket}: {count}"
+                for bucket, count in sorted(distribution.items(), key=lambda item: (item[0] == NO_SCORE_BUCKET, item[0]))
+            ),
+            inline=False,
+        )
+    
+    await interaction.response.send_message(embed=embed)
+    
+    # Log the command to database
+    await log_message(
+        guild_id=interaction.guild.id,
+        guild_name=interaction.guild.name,
+        channel_id=interaction.channel.id,
+        channel_name=interaction.channel.name,
+        user_id=interaction.user.id,
+        user_name=interaction.user.name,
+        user_display_name=interaction.user.display_name,
+        action_type=ActionType.STATS,
+        user_message=f"{game_type.value} {stat_period.value}",
+        bot_response=embed.description,
+    )
+
+def format_latency(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.1f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+# Discord rejects the whole embed if a field value is longer than this
+EMBED_FIELD_LIMIT = 1024
+
+def embed_field_value(lines: list[str], empty: str) -> str:
+    """Join lines into an embed field value, leaving out those past the field limit with a count of them."""
+    if not lines:
+        return empty
+    value = ""
+    for index, line in enumerate(lines):
+        more = len(lines) - index
+        # Keep room for the "…and N more" line in case a later line doesn't fit
+        reserve = len(f"\n…and {more} more") if more > 1 else 0
+        candidate = f"{value}\n{line}" if value else line
+        if len(candidate) + reserve > EMBED_FIELD_LIMIT:
+            return f"{value}\n…and {more} more" if value else f"…and {more} more"
+        value = candidate
+    return value
+
+@discord_client.tree.command(name="botstats", description="Show the bot's latency and usage metrics")
+@app_commands.default_permissions(administrator=True)
+async def botstats(interaction: discord.Interaction):
+    embed = discord.Embed(title="⏱️ Bot Stats", color=0x808080)
+    
+    stages = metrics.stage_summary()
+    embed.add_field(
+        name="Latency (count, p50, p99)",
+        value=embed_field_value(
+            [
+                f"`{stage}`: {count}, {format_latency(p50)}, {format_latency(p99)}"
+                for stage, (count, p50, p99) in stages.items()
+            ],
+            "Nothing measured yet",
+        ),
+        inline=False,
+    )
+    counters = metrics.counter_values()
+    embed.add_field(
+        name="Counters",
+        value=embed_field_value(
+            [
+                f"`{name}{f' {value}' if label else ''}`: {count}"
+                for (name, label, value), count in counters.items()
+            ],
+            "Nothing counted yet",
+        ),
+        inline=False,
+    )
+    embed.add_field(
+        name="Shards (latency, disconnects)",
+        value=embed_field_value(
+            [
+                f"`{status.shard_id}`: {'🟢' if status.connected else '🔴'} "
+                f"{format_latency(status.latency)}, {status.disconnects}, "
+                f"{'up' if status.connected else 'down'} since <t:{int(status.changed_at)}:R>"
+                # Disconnected shards first, so they aren't the ones left out
+                for status in sorted(sharding.shard_health(discord_client), key=lambda status: status.connected)
+            ],
+            "Not connected yet",
+        ),
+        inline=False,
+    )
+    embed.add_field(
+        name="Gauges",
+        value=embed_field_value(
+            [f"`{name}`: {value}" for name, value in metrics.gauge_values().items()], "No gauges registered"
+        ),
+        inline=False,
+    )
+    
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    if interaction.guild:
+        # Log the command to database
+        await log_message(
+            guild_id=interaction.guild.id,
+            guild_name=interaction.guild.name,
+            channel_id=interaction.channel.id,
+            channel_name=interaction.channel.name,
+            user_id=interaction.user.id,
+            user_name=interaction.user.name,
+            user_display_name=interaction.user.display_name,
+            action_type=ActionType.BOT_STATS,
+            user_message=None,
+            bot_response=None,
+        )
+
+async def get_system_prompt(server_id: int | None) -> str:
     # Get custom prompt from database, fall back to default
-    system_prompt = DEFAULT_PROMPT
     if server_id:
-        custom_prompt = await get_server_prompt(server_id)
+        with metrics.timed("get_server_prompt"):
+            custom_prompt = await get_server_prompt(server_id)
         if custom_prompt:
-            system_prompt = custom_prompt
+            return custom_prompt
+    return DEFAULT_PROMPT
+
+def grok_error_message(e: Exception) -> str:
+    if isinstance(e, llm.LLMBusyError):
+        return "I'm a bit overwhelmed right now, try again in a moment!"
+    return f"Sorry, I encountered an error: {str(e)}"
 
+async def grok_answer(
+    prompt: str,
+    server_id: int | None = None,
+    history: list[conversation.ChatMessage] | None = None,
+) -> str:
+    system_prompt = await get_system_prompt(server_id)
     try:
-        chat = xai_client.chat.create(model="grok-4-1-fast-reasoning")
-        chat.append(system(system_prompt))
-        chat.append(user(prompt))
-        return chat.sample().content
+        return await llm.complete(
+            system_prompt, prompt, history=conversation.as_chat_history(history or [])
+        )
     except Exception as e:
-        return f"Sorry, I encountered an error: {str(e)}"
+        return grok_error_message(e)
+
+async def stream_grok_answer(
+    channel: discord.abc.Messageable,
+    prompt: str,
+    server_id: int | None = None,
+    history: list[conversation.ChatMessage] | None = None,
+) -> str:
+    system_prompt = await get_system_prompt(server_id)
+    pieces = llm.stream(system_prompt, prompt, history=conversation.as_chat_history(history or []))
+    return await replies.stream_reply(channel, pieces, grok_error_message)
+
+# When each rate limited user's limit ends; they are only told to slow down once before then
+rate_limit_notices: dict[int, float] = {}
+
+def should_send_rate_limit_notice(user_id: int, retry_after: float) -> bool:
+    """Whether to tell a rate limited user to slow down, at most once per rate limit window."""
+    now = time.monotonic()
+    if rate_limit_notices.get(user_id, 0) > now:
+        return False
+    if len(rate_limit_notices) >= 1000:
+        for expired in [user for user, until in rate_limit_notices.items() if until <= now]:
+            del rate_limit_notices[expired]
+    rate_limit_notices[user_id] = now + retry_after
+    return True
 
 @discord_client.event
 async def on_message(message):
     if message.author == discord_client.user:  # Ignore bot's own messages
         return
     
+    # Remember every message as context for Grok mentions. The bot's own answers are
+    # remembered once complete, since streamed answers are posted as a placeholder first.
+    conversation.remember(
+        message.channel.id, message.id, message.author.display_name, message.clean_content
+    )
+    
+    with metrics.timed("on_message"):
+        await handle_message(message)
+
+async def handle_message(message: discord.Message):
     # Helper to log messages to the database
     async def log_to_db(action: ActionType, response: str):
         if message.guild:
-            await log_message(
-                guild_id=message.guild.id,
-                guild_name=message.guild.name,
-                channel_id=message.channel.id,
-                channel_name=message.channel.name,
-                user_id=message.author.id,
-                user_name=message.author.name,
-                user_display_name=message.author.display_name,
-                action_type=action,
-                user_message=message.content,
-                bot_response=response,
-            )
+            with metrics.timed("log_message"):
+                await log_message(
+                    guild_id=message.guild.id,
+                    guild_name=message.guild.name,
+                    channel_id=message.channel.id,
+                    channel_name=message.channel.name,
+                    user_id=message.author.id,
+                    user_name=message.author.name,
+                    user_display_name=message.author.display_name,
+                    action_type=action,
+                    user_message=message.content,
+                    bot_response=response,
+                )
     
-    if response := process_wordle_message(message.content, use_ai=True):
-        await message.channel.send(response)
-        await log_to_db(ActionType.WORDLE, response)
-    elif response := process_connections_message(message.content):
-        await message.channel.send(response)
-        await log_to_db(ActionType.CONNECTIONS, response)
-    elif response := process_strands_message(message.content):
-        await message.channel.send(response)
-        await log_to_db(ActionType.STRANDS, response)
+    # Includes the LLM call when an AI Wordle reply is enabled, which is also timed on its own
+    with metrics.timed("parse"):
+        reply = await process_game_score_message_async(message.content, use_ai=True)
+    if reply:
+        with metrics.timed("send"):
+            # Merged with other score replies in a burst, naming who each line is for
+            await outbox.send(message.channel, reply.response, merge=True, mention=message.author.mention)
+        await log_to_db(ActionType(reply.game), reply.response)
+        if message.guild:
+            with metrics.timed("record_game_score"):
+                await record_game_score(
+                    guild_id=message.guild.id,
+                    channel_id=message.channel.id,
+                    user_id=message.author.id,
+                    score=reply.score,
+                    message_id=message.id,
+                )
     elif discord_client.user in message.mentions:
         # Remove the bot mention from the message content
         clean_message = message.content.replace(f"<@{discord_client.user.id}>", "").strip()
         server_id = message.guild.id if message.guild else None
-        answer = await grok_answer(clean_message, server_id=server_id)
-        await message.channel.send(answer)
+        history = conversation.recent(message.channel.id, before_id=message.id)
+        
+        async def answer_question(prompt: str) -> str:
+            # Sends the answer too, since a streamed answer is sent while it is generated
+            if GROK_STREAMING:
+                with metrics.timed("grok_answer"):
+                    answer = await stream_grok_answer(
+                        outbox.PacedChannel(message.channel), prompt, server_id=server_id, history=history
+                    )
+            else:
+                with metrics.timed("grok_answer"):
+                    answer = await grok_answer(prompt, server_id=server_id, history=history)
+                with metrics.timed("send"):
+                    await replies.send_long_message(outbox.PacedChannel(message.channel), answer)
+            conversation.remember(
+                message.channel.id,
+                discord.utils.time_snowflake(discord.utils.utcnow()),
+                discord_client.user.display_name,
+                answer,
+                from_bot=True,
+            )
+            return answer
+        
+        try:
+            answer = await admission.submit(
+                server_id, message.channel.id, message.author.id, clean_message, answer_question
+            )
+        except admission.RateLimited as e:
+            if not should_send_rate_limit_notice(message.author.id, e.retry_after):
+                # Already told; answering every spammed mention would use up the channel's send budget
+                metrics.increment("admission", "result", "notice_dropped")
+                return
+            answer = f"Whoa, slow down! Ask me again in {math.ceil(e.retry_after)}s."
+            with metrics.timed("send"):
+                await outbox.send(message.channel, answer)
+        if answer is None:
+            # Merged into this user's previous question, which gets the answer
+            return
         await log_to_db(ActionType.MENTION, answer)
 
-discord_client.run(os.getenv("DISCORD_TOKEN"))
\ No newline at end of file
+if __name__ == "__main__":
+    discord_client.run(os.getenv("DISCORD_TOKEN"))
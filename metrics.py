@@ -0,0 +1,235 @@
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from aiohttp import web
+
+# Prefix for every exported metric name
+NAMESPACE = "cheripit"
+
+# Latency histogram bucket upper bounds in seconds, from 0.1 ms to 1 min
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Histogram:
+    """A fixed-bucket latency histogram; observing a value is one bisect and three adds."""
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        # One count per bucket, plus a final overflow bucket for values above the last bound
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by interpolating within its bucket, like Prometheus' histogram_quantile().
+
+        Args:
+            q: The quantile to estimate, between 0 and 1
+
+        Returns:
+            The estimated value in seconds, None if nothing was observed
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                if index == len(LATENCY_BUCKETS):
+                    return LATENCY_BUCKETS[-1]
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return LATENCY_BUCKETS[-1]
+
+
+# Stage latencies keyed by stage name
+_histograms: dict[str, Histogram] = {}
+# Counters keyed by (name, label name, label value)
+_counters: dict[tuple[str, str, str], int] = {}
+# Gauges are read when metrics are exported, keyed by name
+_gauges: dict[str, Callable[[], float]] = {}
+# Gauges with one value per label value, keyed by name, as (label name, read function)
+_labeled_gauges: dict[str, tuple[str, Callable[[], dict[str, float]]]] = {}
+
+_runner: Optional[web.AppRunner] = None
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record the latency of one run of a stage."""
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        histogram = _histograms[stage] = Histogram()
+    histogram.observe(seconds)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Time the body of a with block as one run of a stage.
+
+    The latency is recorded even if the body raises, in which case the stage's
+    error counter is incremented too.
+
+    Args:
+        stage: Name of the stage, e.g. "parse" or "send"
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        increment("errors", "stage", stage)
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+
+def increment(name: str, label: str = "", value: str = "") -> None:
+    """Increment a counter, optionally for one value of a label, e.g. increment("actions", "action", "wordle")."""
+    key = (name, label, value)
+    _counters[key] = _counters.get(key, 0) + 1
+
+
+def register_gauge(name: str, read: Callable[[], float]) -> None:
+    """Register a function that reports a gauge's current value, e.g. a queue depth."""
+    _gauges[name] = read
+
+
+def register_labeled_gauge(name: str, label: str, read: Callable[[], dict[str, float]]) -> None:
+    """Register a function that reports a gauge's value per label value, e.g. the latency of each shard."""
+    _labeled_gauges[name] = (label, read)
+
+
+def stage_summary() -> dict[str, tuple[int, float, float]]:
+    """
+    Summarize the latency of every stage.
+
+    Returns:
+        Mapping of stage name to (count, p50 seconds, p99 seconds)
+    """
+    return {
+        stage: (histogram.count, histogram.quantile(0.5), histogram.quantile(0.99))
+        for stage, histogram in sorted(_histograms.items())
+    }
+
+
+def counter_values() -> dict[tuple[str, str, str], int]:
+    """Return every counter's value, keyed by (name, label name, label value)."""
+    return dict(sorted(_counters.items()))
+
+
+def gauge_values() -> dict[str, float]:
+    """Read every registered gauge."""
+    return {name: read() for name, read in sorted(_gauges.items())}
+
+
+def labeled_gauge_values() -> dict[tuple[str, str, str], float]:
+    """Read every registered labeled gauge, keyed by (name, label name, label value)."""
+    return {
+        (name, label, value): reading
+        for name, (label, read) in sorted(_labeled_gauges.items())
+        for value, reading in sorted(read().items())
+    }
+
+
+def reset() -> None:
+    """Discard all recorded latencies and counters."""
+    _histograms.clear()
+    _counters.clear()
+
+
+def render_prometheus() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lines = []
+
+    name = f"{NAMESPACE}_stage_latency_seconds"
+    lines.append(f"# HELP {name} Latency of each bot stage.")
+    lines.append(f"# TYPE {name} histogram")
+    for stage, histogram in sorted(_histograms.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+    typed = set()
+    for (counter, label, value), count in sorted(_counters.items()):
+        name = f"{NAMESPACE}_{counter}_total"
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        labels = f'{{{label}="{value}"}}' if label else ""
+        lines.append(f"{name}{labels} {count}")
+
+    for gauge, value in gauge_values().items():
+        name = f"{NAMESPACE}_{gauge}"
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+    typed = set()
+    for (gauge, label, value), reading in labeled_gauge_values().items():
+        name = f"{NAMESPACE}_{gauge}"
+        if name not in typed:
+            lines.append(f"# TYPE {name} gauge")
+            typed.add(name)
+        lines.append(f'{name}{{{label}="{value}"}} {reading}')
+
+    return "\n".join(lines) + "\n"
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render_prometheus(), content_type="text/plain", charset="utf-8")
+
+
+def server_running() -> bool:
+    return _runner is not None
+
+
+async def start_server(port: int, host: str = "127.0.0.1") -> None:
+    """
+    Serve the metrics at /metrics for a Prometheus scraper.
+
+    Binds to localhost by default so the endpoint is never exposed publicly.
+    Gracefully handles errors (e.g. the port being in use) without crashing.
+
+    Args:
+        port: Port to listen on
+        host: Interface to listen on
+    """
+    global _runner
+    if _runner is not None:
+        return
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    try:
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+    except Exception as e:
+        print(f"Error starting metrics server on {host}:{port}: {e}")
+        await runner.cleanup()
+        return
+    _runner = runner
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+
+
+async def stop_server() -> None:
+    """Stop the metrics server if it is running."""
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
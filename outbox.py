@@ -0,0 +1,240 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+import discord
+
+import metrics
+from ratelimit import TokenBucket
+
+# Send priorities; interactive replies always go before bulk posts queued for the same channel
+INTERACTIVE = 0
+BULK = 1
+
+# Seconds a mergeable reply to a busy channel waits for others, so a burst goes out as one
+# message. Replies to a quiet channel are sent straight away. 0 disables merging.
+MERGE_WINDOW = float(os.getenv("OUTBOX_MERGE_WINDOW", "0.75"))
+# Discord allows about 5 messages per 5 seconds in a channel
+CHANNEL_BURST = float(os.getenv("OUTBOX_CHANNEL_BURST", "5"))
+CHANNEL_RATE = float(os.getenv("OUTBOX_CHANNEL_RATE", "1"))
+# Sends per second across all channels, below Discord's global limit of 50 requests per second,
+# which edits and interaction responses count against too
+GLOBAL_RATE = float(os.getenv("OUTBOX_GLOBAL_RATE", "40"))
+# Share of the global budget BULK sends leave untouched, so interactive replies in other
+# channels aren't held up behind a fan-out
+BULK_RESERVE = float(os.getenv("OUTBOX_BULK_RESERVE", "0.25"))
+# Maximum number of channel rate limit buckets kept; the least recently used are dropped
+MAX_BUCKETS = int(os.getenv("OUTBOX_MAX_BUCKETS", "10000"))
+
+# Discord rejects messages longer than this
+MESSAGE_LIMIT = 2000
+
+
+class _Outgoing:
+    __slots__ = ("content", "kwargs", "mention", "merge", "queued_at", "sent")
+
+    def __init__(self, content: Optional[str], kwargs: dict, mention: Optional[str], merge: bool):
+        self.content = content
+        self.kwargs = kwargs
+        self.mention = mention
+        self.merge = merge
+        self.queued_at = time.monotonic()
+        self.sent: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def line(self) -> str:
+        """The message's line in a merged message, naming who it replies to."""
+        return f"{self.mention} {self.content}" if self.mention else self.content
+
+
+class _ChannelQueue:
+    __slots__ = ("queues", "worker")
+
+    def __init__(self):
+        # One queue per priority, indexed by priority
+        self.queues: tuple[deque[_Outgoing], ...] = (deque(), deque())
+        self.worker: Optional[asyncio.Task] = None
+
+
+# Queued messages of every channel with messages waiting, keyed by channel id
+_channels: dict[int, _ChannelQueue] = {}
+_buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+_global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_RATE, time.monotonic())
+
+
+def _get_bucket(channel_id: int, now: float) -> TokenBucket:
+    bucket = _buckets.get(channel_id)
+    if bucket is None:
+        bucket = _buckets[channel_id] = TokenBucket(CHANNEL_BURST, CHANNEL_RATE, now)
+        while len(_buckets) > MAX_BUCKETS:
+            _buckets.popitem(last=False)
+    else:
+        _buckets.move_to_end(channel_id)
+        bucket.refill(now)
+    return bucket
+
+
+async def _pace(channel_id: int, priority: int) -> None:
+    """Wait until both the channel's and the global rate limit allow a send, then take a token from each."""
+    # BULK sends also need the reserved share of the global bucket to be left over
+    needed = min(1 + BULK_RESERVE * _global_bucket.capacity, _global_bucket.capacity) if priority == BULK else 1
+    while True:
+        now = time.monotonic()
+        bucket = _get_bucket(channel_id, now)
+        _global_bucket.refill(now)
+        global_wait = max(0.0, (needed - _global_bucket.tokens) / _global_bucket.rate)
+        wait = max(bucket.wait_time(), global_wait)
+        if wait <= 0:
+            bucket.tokens -= 1
+            _global_bucket.tokens -= 1
+            return
+        await asyncio.sleep(wait)
+
+
+def _is_busy(channel_id: int) -> bool:
+    """Whether a channel has used some of its rate limit recently."""
+    bucket = _buckets.get(channel_id)
+    if bucket is None:
+        return False
+    bucket.refill(time.monotonic())
+    return bucket.tokens < bucket.capacity
+
+
+def _take_batch(queue: deque[_Outgoing]) -> list[_Outgoing]:
+    """Take the next message, merged with the mergeable messages right behind it that still fit."""
+    batch = [queue.popleft()]
+    if not batch[0].merge:
+        return batch
+    length = len(batch[0].line())
+    while queue and queue[0].merge and length + 1 + len(queue[0].line()) <= MESSAGE_LIMIT:
+        length += 1 + len(queue[0].line())
+        batch.append(queue.popleft())
+    return batch
+
+
+async def _run(channel: discord.abc.Messageable, channel_queue: _ChannelQueue) -> None:
+    """Send a channel's queued messages one at a time until none are left."""
+    try:
+        while True:
+            priority, queue = next(
+                ((priority, queue) for priority, queue in enumerate(channel_queue.queues) if queue), (None, None)
+            )
+            if queue is None:
+                return
+            head = queue[0]
+            wait = head.queued_at + MERGE_WINDOW - time.monotonic()
+            if head.merge and wait > 0 and _is_busy(channel.id):
+                # Look again afterwards, in case something more urgent arrived meanwhile
+                await asyncio.sleep(wait)
+                continue
+
+            batch = _take_batch(queue)
+            await _pace(channel.id, priority)
+            if len(batch) == 1:
+                content, kwargs = head.content, head.kwargs
+            else:
+                # Name everyone replied to without pinging them all
+                content = "\n".join(item.line() for item in batch)
+                kwargs = {"allowed_mentions": discord.AllowedMentions.none()}
+                metrics.increment("outbox", "result", "merged")
+            now = time.monotonic()
+            for item in batch:
+                metrics.observe("outbox_wait", now - item.queued_at)
+
+            try:
+                message = await channel.send(content, **kwargs)
+            except Exception as e:
+                metrics.increment("errors", "stage", "outbox_send")
+                for item in batch:
+                    if not item.sent.done():
+                        item.sent.set_exception(e)
+            else:
+                metrics.increment("outbox", "result", "sent")
+                for item in batch:
+                    if not item.sent.done():
+                        item.sent.set_result(message)
+    finally:
+        if _channels.get(channel.id) is channel_queue:
+            del _channels[channel.id]
+        # Only left over if the worker was cancelled, e.g. on shutdown
+        for queue in channel_queue.queues:
+            for item in queue:
+                item.sent.cancel()
+
+
+async def send(
+    channel: discord.abc.Messageable,
+    content: Optional[str] = None,
+    *,
+    priority: int = INTERACTIVE,
+    merge: bool = False,
+    mention: Optional[str] = None,
+    **kwargs,
+) -> discord.Message:
+    """
+    Queue a message for a channel and wait until it is sent.
+
+    Each channel's messages are sent one at a time, paced to stay within
+    Discord's per-channel and global rate limits, with INTERACTIVE messages
+    ahead of BULK ones.
+
+    Args:
+        channel: The channel to send to
+        content: The message text
+        priority: INTERACTIVE or BULK
+        merge: Whether the message may be merged with other mergeable messages
+            queued for the channel within MERGE_WINDOW. Only for text messages,
+            so anything in kwargs is ignored when it is merged.
+        mention: Who the message replies to, put in front of its line when merged
+        **kwargs: Passed on to channel.send(), e.g. embed
+
+    Returns:
+        The sent message, which a merged message shares with the others it was merged with
+
+    Raises:
+        discord.HTTPException: If sending failed
+    """
+    item = _Outgoing(content, kwargs, mention, merge and content is not None)
+    channel_queue = _channels.get(channel.id)
+    if channel_queue is None:
+        channel_queue = _channels[channel.id] = _ChannelQueue()
+    channel_queue.queues[priority].append(item)
+    if channel_queue.worker is None:
+        channel_queue.worker = asyncio.create_task(_run(channel, channel_queue))
+
+    try:
+        return await item.sent
+    except asyncio.CancelledError:
+        # Still queued if the caller was cancelled, so it is never sent
+        queue = channel_queue.queues[priority]
+        if item in queue:
+            queue.remove(item)
+        raise
+
+
+class PacedChannel:
+    """A channel whose sends go through the outbox, for code that takes a channel; everything else is the channel's own."""
+    __slots__ = ("channel", "priority")
+
+    def __init__(self, channel: discord.abc.Messageable, priority: int = INTERACTIVE):
+        self.channel = channel
+        self.priority = priority
+
+    def __getattr__(self, name: str):
+        return getattr(self.channel, name)
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> discord.Message:
+        return await send(self.channel, content, priority=self.priority, **kwargs)
+
+
+def queue_depth() -> int:
+    """Return the number of messages waiting to be sent."""
+    return sum(len(queue) for channel_queue in _channels.values() for queue in channel_queue.queues)
+
+
+async def drain(timeout: float) -> None:
+    """Wait up to `timeout` seconds for every queued message to be sent, e.g. before shutting down."""
+    workers = [channel_queue.worker for channel_queue in _channels.values() if channel_queue.worker is not None]
+    if workers:
+        await asyncio.wait(workers, timeout=timeout)
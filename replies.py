@@ -0,0 +1,123 @@
+import asyncio
+import os
+from contextlib import aclosing
+from typing import AsyncGenerator, Callable
+
+import discord
+
+# Discord rejects messages longer than this
+MESSAGE_LIMIT = 2000
+# Minimum seconds between edits of a streamed reply. Discord allows about 5 edits
+# per 5 seconds per channel, and other replies need some of that budget too.
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.2"))
+
+STREAM_PLACEHOLDER = "💭 Thinking..."
+# Shown at the end of a streamed reply that is still being generated
+STREAM_CURSOR = " ▌"
+
+_FENCE = "```"
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> list[str]:
+    """
+    Split text into parts that each fit in a Discord message.
+
+    Splits prefer paragraph breaks, then line breaks, then spaces. A code block
+    cut by a split is closed at the end of one part and reopened in the next.
+    Each part leaves room for STREAM_CURSOR.
+
+    Args:
+        text: The text to split
+        limit: Maximum length of a part
+
+    Returns:
+        The parts in order, [""] for empty text
+    """
+    # Room for the cursor, and for closing and reopening a code block
+    budget = limit - len(STREAM_CURSOR) - 2 * (len(_FENCE) + 1)
+    parts = []
+    reopen = ""
+    while len(reopen) + len(text) > budget:
+        window = text[:budget - len(reopen)]
+        cut = -1
+        for separator in ("\n\n", "\n", " "):
+            cut = window.rfind(separator)
+            # Don't settle for a break in the first half of the window
+            if cut > len(window) // 2:
+                break
+        if cut <= len(window) // 2:
+            cut = len(window)
+        part = reopen + text[:cut].rstrip()
+        text = text[cut:].lstrip()
+        if part.count(_FENCE) % 2:
+            part += "\n" + _FENCE
+            reopen = _FENCE + "\n"
+        else:
+            reopen = ""
+        parts.append(part)
+    parts.append(reopen + text)
+    return parts
+
+
+async def send_long_message(channel: discord.abc.Messageable, text: str) -> list[discord.Message]:
+    """Send text as one message, or as several if it is too long for one."""
+    return [await channel.send(part) for part in split_message(text, MESSAGE_LIMIT) if part]
+
+
+async def stream_reply(
+    channel: discord.abc.Messageable,
+    pieces: AsyncGenerator[str, None],
+    error_message: Callable[[Exception], str],
+) -> str:
+    """
+    Post a placeholder, then edit it as text streams in.
+
+    Edits happen at most every STREAM_EDIT_INTERVAL seconds. Text that no
+    longer fits in the current message continues in a new one.
+
+    Args:
+        channel: The channel to reply in
+        pieces: The reply text, piece by piece; closed when the reply is done, even on errors
+        error_message: Turns an error raised by `pieces` into text to show in the reply
+
+    Returns:
+        The full reply text, including any error message
+    """
+    loop = asyncio.get_running_loop()
+    messages = [await channel.send(STREAM_PLACEHOLDER)]
+    shown = [STREAM_PLACEHOLDER]
+
+    async def render(text: str, done: bool) -> None:
+        parts = split_message(text, MESSAGE_LIMIT)
+        if not done:
+            parts[-1] += STREAM_CURSOR
+        for index, part in enumerate(parts):
+            if not part.strip():
+                continue
+            if index == len(messages):
+                messages.append(await channel.send(part))
+                shown.append(part)
+            elif shown[index] != part:
+                await messages[index].edit(content=part)
+                shown[index] = part
+
+    text = ""
+    last_render = loop.time()
+    try:
+        async with aclosing(pieces):
+            async for piece in pieces:
+                text += piece
+                if loop.time() - last_render >= STREAM_EDIT_INTERVAL:
+                    try:
+                        await render(text, done=False)
+                    except discord.HTTPException:
+                        # Skip this update; the next one shows the text so far
+                        pass
+                    last_render = loop.time()
+    except Exception as e:
+        text = f"{text}\n\n{error_message(e)}" if text.strip() else error_message(e)
+    if not text.strip():
+        text = "🤷"
+
+    await render(text, done=True)
+    return text
@@ -0,0 +1,183 @@
+import math
+import os
+import time
+from typing import Optional
+
+import discord
+from discord.ext import commands
+
+# Total number of shards across every process: unset runs a single unsharded
+# connection, "auto" lets Discord recommend a count
+SHARD_COUNT = os.getenv("SHARD_COUNT", "")
+# Shards run by this process, e.g. "0-3" or "0,2,4-7", so several processes or hosts
+# can split the shards between them. Requires a numeric SHARD_COUNT; defaults to all shards.
+SHARD_IDS = os.getenv("SHARD_IDS", "")
+
+
+def parse_shard_ids(spec: str, shard_count: int) -> list[int]:
+    """
+    Parse a list of shard ids and inclusive ranges, e.g. "0,2,4-7".
+
+    Args:
+        spec: The ids and ranges, separated by commas
+        shard_count: Total number of shards; every id must be below it
+
+    Returns:
+        The shard ids, sorted and without duplicates
+
+    Raises:
+        ValueError: If the spec is malformed or names a shard that doesn't exist
+    """
+    shard_ids = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        if start > end:
+            raise ValueError(f"Invalid shard range {part!r}")
+        shard_ids.update(range(start, end + 1))
+
+    if not shard_ids:
+        raise ValueError(f"No shards in {spec!r}")
+    if min(shard_ids) < 0 or max(shard_ids) >= shard_count:
+        raise ValueError(f"Shard ids in {spec!r} must be between 0 and {shard_count - 1}")
+    return sorted(shard_ids)
+
+
+def _shard_settings() -> tuple[bool, Optional[int], Optional[list[int]]]:
+    """Validate the shard settings, returning (sharded, shard count, shard ids)."""
+    if not SHARD_COUNT:
+        if SHARD_IDS:
+            raise ValueError("SHARD_IDS requires SHARD_COUNT")
+        return False, None, None
+    if SHARD_COUNT == "auto":
+        if SHARD_IDS:
+            raise ValueError("SHARD_IDS requires a numeric SHARD_COUNT, not auto")
+        return True, None, None
+
+    shard_count = int(SHARD_COUNT)
+    if shard_count < 1:
+        raise ValueError("SHARD_COUNT must be at least 1")
+    shard_ids = parse_shard_ids(SHARD_IDS, shard_count) if SHARD_IDS else None
+    return True, shard_count, shard_ids
+
+
+SHARDED, _shard_count, _shard_ids = _shard_settings()
+
+# The bot base class for the configured mode
+BotBase = commands.AutoShardedBot if SHARDED else commands.Bot
+
+
+def bot_options() -> dict:
+    """Return the keyword arguments that configure BotBase's shards."""
+    if not SHARDED:
+        return {}
+    return {"shard_count": _shard_count, "shard_ids": _shard_ids}
+
+
+def owns_global_work() -> bool:
+    """
+    Whether this process should do work that must only happen once per bot,
+    such as syncing application commands.
+
+    That is the unsharded process, or the process that runs shard 0.
+    """
+    return _shard_ids is None or 0 in _shard_ids
+
+
+class ShardStatus:
+    """Connection health of one shard."""
+    __slots__ = ("shard_id", "connected", "changed_at", "disconnects", "latency")
+
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.connected = False
+        # Unix time of the last connect or disconnect
+        self.changed_at = time.time()
+        self.disconnects = 0
+        # Heartbeat latency in seconds, None until the first heartbeat
+        self.latency: Optional[float] = None
+
+
+_shards: dict[int, ShardStatus] = {}
+
+
+def _status(shard_id: int) -> ShardStatus:
+    status = _shards.get(shard_id)
+    if status is None:
+        status = _shards[shard_id] = ShardStatus(shard_id)
+    return status
+
+
+def record_connect(shard_id: int) -> None:
+    """Mark a shard as connected (or resumed)."""
+    status = _status(shard_id)
+    if not status.connected:
+        status.connected = True
+        status.changed_at = time.time()
+
+
+def record_disconnect(shard_id: int) -> None:
+    """Mark a shard as disconnected."""
+    status = _status(shard_id)
+    if status.connected:
+        status.connected = False
+        status.changed_at = time.time()
+        status.disconnects += 1
+
+
+def track(bot: commands.Bot) -> None:
+    """Record the connection health of a bot's shards from its gateway events."""
+    if isinstance(bot, discord.AutoShardedClient):
+        async def on_shard_connect(shard_id: int):
+            record_connect(shard_id)
+
+        async def on_shard_disconnect(shard_id: int):
+            record_disconnect(shard_id)
+
+        bot.add_listener(on_shard_connect, "on_shard_connect")
+        bot.add_listener(on_shard_connect, "on_shard_resumed")
+        bot.add_listener(on_shard_disconnect, "on_shard_disconnect")
+        return
+
+    # An unsharded bot is reported as shard 0
+    async def on_connect():
+        record_connect(0)
+
+    async def on_disconnect():
+        record_disconnect(0)
+
+    bot.add_listener(on_connect, "on_connect")
+    bot.add_listener(on_connect, "on_resumed")
+    bot.add_listener(on_disconnect, "on_disconnect")
+
+
+def shard_health(bot: commands.Bot) -> list[ShardStatus]:
+    """
+    Get the health of every shard this process runs, with current latencies.
+
+    Args:
+        bot: The bot whose shards to report
+
+    Returns:
+        Every shard's status, ordered by shard id
+    """
+    if isinstance(bot, discord.AutoShardedClient):
+        latencies = bot.latencies
+    else:
+        latencies = [(0, bot.latency)]
+    for shard_id, latency in latencies:
+        _status(shard_id).latency = latency if math.isfinite(latency) else None
+    return [_shards[shard_id] for shard_id in sorted(_shards)]
+
+
+def shard_latencies(bot: commands.Bot) -> dict[str, float]:
+    """Return the heartbeat latency of every connected shard, keyed by shard id."""
+    return {
+        str(status.shard_id): status.latency
+        for status in shard_health(bot)
+        if status.connected and status.latency is not None
+    }
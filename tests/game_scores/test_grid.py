@@ -0,0 +1,50 @@
+import re
+
+from game_scores import process_connections_message, process_strands_message
+from game_scores.grid import MAX_SCAN_LENGTH, iter_header_matches, scan_rows, scan_run
+
+CONNECTIONS_CELLS = frozenset("🟨🟩🟦🟪")
+STRANDS_CELLS = frozenset("🔵🟡")
+
+def test_grid_scanning():
+    """Test the grid scanners on rows, runs and their edge cases."""
+
+    # (message, expected end) for 4-wide rows, at most 6 of them
+    rows_cases = [
+        ("🟨🟨🟨🟨\n🟩🟩🟩🟩 x", 10),
+        ("🟨🟨🟨🟨🟨", 4),
+        ("🟨🟨🟨", 0),
+        ("🟨🟨🟨🟨 " * 8, 30),
+        ("", 0),
+    ]
+    for message, expected in rows_cases:
+        assert scan_rows(message, 0, CONNECTIONS_CELLS, width=4, max_rows=6) == expected, repr(message)
+
+    # (message, expected end) for runs of cells and whitespace
+    run_cases = [
+        ("🔵🔵🟡\n🔵 \nx", 7),
+        (" 🔵🔵", 0),
+        ("x🔵", 0),
+        ("", 0),
+    ]
+    for message, expected in run_cases:
+        assert scan_run(message, 0, STRANDS_CELLS) == expected, repr(message)
+
+    # Overlapping header matches are all found
+    assert [match.end() for match in iter_header_matches(re.compile(r"aa"), "aaa")] == [2, 3]
+
+def test_grid_edge_cases():
+    """Test parser results that depend on scanning order and length caps."""
+
+    # A later header is still found when an earlier one swallows it
+    assert process_strands_message('strands 1 "x strands 2 "y" 🔵🟡') == "Nice job solving today's strands!"
+    assert process_connections_message("Connections 1 x connections 2 🟨🟨🟨🟨") == "Nice job solving the Connections!"
+
+    # Nothing past the scan cap is considered
+    padding = "x" * MAX_SCAN_LENGTH
+    assert process_connections_message(padding + "Connections #1 🟨🟨🟨🟨") is None
+    assert process_strands_message(padding + "Strands #1 “x” 🔵🟡") is None
+
+    # Long runs without the expected shape are rejected
+    assert process_strands_message("Strands #1 “x” " + "🔵" * 3990) is None
+    assert process_connections_message("connections 1 " * 285) is None
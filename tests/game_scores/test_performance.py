@@ -0,0 +1,15 @@
+from benchmarks.corpus import MAX_MESSAGE_LENGTH, generate_corpus
+from benchmarks.parsers import PARSERS, measure
+
+# Generous per-message budget; a backtracking blowup is orders of magnitude slower
+WORST_LATENCY_BUDGET = 0.01
+
+def test_parser_worst_case_latency():
+    """Test that no corpus message, including pathological ones, is slow to parse."""
+    corpus = generate_corpus(size_per_category=50)
+    assert all(len(message) <= MAX_MESSAGE_LENGTH for messages in corpus.values() for message in messages)
+
+    for parser_name, parse in PARSERS.items():
+        for category, messages in corpus.items():
+            _, worst = measure(parse, messages, repeats=2)
+            assert worst < WORST_LATENCY_BUDGET, f"{parser_name} took {worst:.4f}s on a {category} message"
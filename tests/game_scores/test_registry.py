@@ -0,0 +1,38 @@
+import asyncio
+
+from game_scores import (
+    find_game_score_parsers,
+    process_game_score_message,
+    process_game_score_message_async,
+)
+
+def test_game_score_dispatch():
+    """Test that messages are routed to the right parser by keyword."""
+
+    dispatch_valid = [
+        ("Wordle 1,025 3/6", ("wordle", "Good score!")),
+        ("connections #456\n🟨🟨🟨🟨\n🟩🟩🟩🟩\n🟦🟦🟦🟦\n🟪🟪🟪🟪", ("connections", "Nice job solving the Connections!")),
+        ("Strands #507\n“Chips in”\n🔵🔵🔵🟡\n🔵🔵🔵", ("strands", "Nice job solving today's strands!")),
+        ("my wordle streak is gone\nConnections #100\n🟨🟨🟨🟨", ("connections", "Nice job solving the Connections!")),
+    ]
+
+    dispatch_invalid = [
+        "hello everyone",
+        "Just talking about wordle",
+        "🟨🟨🟨🟨\n🟩🟩🟩🟩\n🟦🟦🟦🟦\n🟪🟪🟪🟪",
+    ]
+
+    # Test valid cases
+    for message, expected in dispatch_valid:
+        reply = process_game_score_message(message)
+        assert reply[:2] == expected, f"Expected {expected} for message: {message}"
+        assert reply.score.game == reply.game
+        assert asyncio.run(process_game_score_message_async(message)) == reply
+
+    # Test invalid cases
+    for message in dispatch_invalid:
+        assert process_game_score_message(message) is None, f"Should not match: {message}"
+
+    # Ordinary chatter is rejected by the keyword prefilter alone
+    assert find_game_score_parsers("hello everyone, how was your day?") == []
+    assert [parser.game for parser in find_game_score_parsers("STRANDS and Wordle")] == ["wordle", "strands"]
@@ -0,0 +1,51 @@
+from game_scores import (
+    GameScore,
+    parse_connections_message,
+    parse_game_score_message,
+    parse_strands_message,
+    parse_wordle_message,
+)
+
+def test_game_score_parsing():
+    """Test that parsers return structured scores with packed grids."""
+
+    parse_cases = [
+        (
+            parse_wordle_message,
+            "Wordle 1,497 5/6*\n\n⬛⬛🟨⬛⬛\n⬛⬛🟨🟩🟩\n🟩⬛⬛🟩🟩\n🟩🟩⬛🟩🟩\n🟩🟩🟩🟩🟩",
+            GameScore("wordle", 1497, True, "00100/00122/20022/22022/22222", guesses=5),
+        ),
+        (
+            parse_wordle_message,
+            "wordle 123 X/6",
+            GameScore("wordle", 123, False, "", guesses=None),
+        ),
+        (
+            parse_connections_message,
+            "Connections\nPuzzle #775\n🟩🟦🟦🟦\n🟦🟦🟦🟦\n🟨🟨🟨🟨\n🟩🟩🟩🟩\n🟪🟪🟪🟪",
+            GameScore("connections", 775, True, "1222/2222/0000/1111/3333", mistakes=1),
+        ),
+        (
+            parse_connections_message,
+            "Connections #500\n🟨🟨🟨🟨\n🟩🟩🟩🟩\n🟦🟪🟨🟩\n🟪🟦🟨🟩\n🟨🟩🟦🟪\n🟪🟨🟩🟦",
+            GameScore("connections", 500, False, "0000/1111/2301/3201/0123/3012", mistakes=4),
+        ),
+        (
+            parse_strands_message,
+            "Strands #507\n“Chips in”\n🔵🔵🔵🟡\n🔵🔵🔵",
+            GameScore("strands", 507, True, "0001/000", hints=0),
+        ),
+        (
+            parse_strands_message,
+            "Strands #508\n“Hinted”\n💡🔵🔵🟡\n🔵💡🔵",
+            GameScore("strands", 508, True, "2001/020", hints=2),
+        ),
+    ]
+
+    for parse, message, expected in parse_cases:
+        assert parse(message) == expected, f"Expected {expected} for message: {message}"
+
+    assert parse_game_score_message("Wordle 1,025 3/6").score == 3
+    assert parse_game_score_message("wordle 123 x/6") is None
+    assert parse_game_score_message("Strands #1 “x” 🔵🟡🟡") is None
+    assert parse_game_score_message("just chatting") is None
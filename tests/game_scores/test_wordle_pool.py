@@ -0,0 +1,64 @@
+import asyncio
+
+from game_scores import parse_wordle_message, wordle_pool_key
+from game_scores import wordle, wordle_pool
+
+def test_wordle_pool_keys():
+    """Test that shares are normalized to their score and rough grid shape."""
+
+    key_cases = [
+        ("Wordle 1,025 3/6", "3/-"),
+        ("Wordle 1,497 5/6*\n\n⬛⬛🟨⬛⬛\n⬛⬛🟨🟩🟩\n🟩⬛⬛🟩🟩\n🟩🟩⬛🟩🟩\n🟩🟩🟩🟩🟩", "5/w2"),
+        ("Wordle 1,496 4/6*\n\n⬛⬛⬛⬛⬛\n⬛⬛🟩⬛🟩\n⬛⬛🟩⬛🟩\n🟩🟩🟩🟩🟩", "4/c0"),
+        ("Wordle 1,496 2/6\n\n🟩🟩🟩⬛🟩\n🟩🟩🟩🟩🟩", "2/h1"),
+        ("Wordle 1,496 X/6\n\n⬜⬜🟨⬜⬜\n" + "🟩🟩⬜🟩🟩\n" * 5, "X/w3"),
+    ]
+    for message, expected in key_cases:
+        assert wordle_pool_key(parse_wordle_message(message)) == expected, message
+
+def test_wordle_pool_fill_and_rotation(monkeypatch):
+    """Test cold misses, background fills, rotation, expiry and LRU eviction."""
+    calls = []
+
+    async def fake_complete(system_prompt, prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return "1. Nice one!\n\n- Solid work 💪\n\"Not bad at all\""
+
+    monkeypatch.setattr(wordle_pool.llm, "complete", fake_complete)
+    monkeypatch.setattr(wordle_pool, "_pool", wordle_pool.OrderedDict())
+    monkeypatch.setattr(wordle_pool, "POOL_SIZE", 2)
+    monkeypatch.setattr(wordle, "WORDLE_AI_ENABLED", True)
+    three = parse_wordle_message("Wordle 1,025 3/6")
+    four = parse_wordle_message("Wordle 1,025 4/6")
+    five = parse_wordle_message("Wordle 1,025 5/6")
+
+    async def run():
+        # A cold miss answers with the basic response and fills the pool once
+        assert await wordle.wordle_response_async(three, use_ai=True) == "Good score!"
+        assert await wordle.wordle_response_async(three, use_ai=True) == "Good score!"
+        await asyncio.sleep(0.05)
+        assert len(calls) == 1 and "3/6" in calls[0]
+
+        # Pooled responses are handed out in rotation
+        responses = [wordle_pool.pooled_wordle_response(three) for _ in range(6)]
+        assert sorted(responses[:3]) == ["Nice one!", "Not bad at all", "Solid work 💪"]
+        assert responses[3:] == responses[:3]
+
+        # Without AI replies the pool isn't used at all
+        assert await wordle.wordle_response_async(three) == "Good score!"
+
+        # Expired responses are still served while they are regenerated
+        wordle_pool._pool["3/-"].expires_at = 0
+        assert wordle_pool.pooled_wordle_response(three) is not None
+        await asyncio.sleep(0.05)
+        assert len(calls) == 2
+        assert wordle_pool._pool["3/-"].expires_at > 0
+
+        # Filling two more shapes evicts the least recently used one
+        for score in (four, five):
+            wordle_pool.pooled_wordle_response(score)
+            await asyncio.sleep(0.05)
+        assert list(wordle_pool._pool) == ["4/-", "5/-"]
+
+    asyncio.run(run())
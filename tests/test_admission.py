@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+import admission
+
+
+@pytest.fixture
+def fresh_admission(monkeypatch):
+    monkeypatch.setattr(admission, "_user_buckets", admission.OrderedDict())
+    monkeypatch.setattr(admission, "_guild_buckets", admission.OrderedDict())
+    monkeypatch.setattr(admission, "_pending", {})
+    monkeypatch.setattr(admission, "_queues", admission.OrderedDict())
+    monkeypatch.setattr(admission, "_running", 0)
+    monkeypatch.setattr(admission, "COALESCE_WINDOW", 0)
+
+
+def test_rate_limits(monkeypatch, fresh_admission):
+    """Test the per-user and per-server token buckets."""
+    monkeypatch.setattr(admission, "USER_BURST", 2)
+    monkeypatch.setattr(admission, "USER_RATE", 60)
+    monkeypatch.setattr(admission, "GUILD_BURST", 3)
+    now = 1000.0
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now)
+
+    async def echo(prompt):
+        return prompt
+
+    async def ask(guild_id, user_id):
+        return await admission.submit(guild_id, 1, user_id, "hi", echo)
+
+    async def run():
+        nonlocal now
+        assert await ask(1, 1) == "hi"
+        assert await ask(1, 1) == "hi"
+        with pytest.raises(admission.RateLimited) as limited:
+            await ask(1, 1)
+        assert limited.value.retry_after == pytest.approx(1.0)
+
+        # The server's bucket is shared by its users, and a rejected request takes no tokens
+        assert await ask(1, 2) == "hi"
+        with pytest.raises(admission.RateLimited):
+            await ask(1, 3)
+        assert await ask(2, 3) == "hi"
+
+        # Buckets refill at their rate per minute
+        now += 1
+        assert await ask(3, 1) == "hi"
+        with pytest.raises(admission.RateLimited):
+            await ask(3, 1)
+
+    asyncio.run(run())
+
+
+def test_coalescing(monkeypatch, fresh_admission):
+    """Test that rapid questions from one user in a channel are answered once."""
+    monkeypatch.setattr(admission, "COALESCE_WINDOW", 0.05)
+    prompts = []
+
+    async def answer(prompt):
+        prompts.append(prompt)
+        return "answer"
+
+    async def run():
+        first = asyncio.create_task(admission.submit(1, 1, 1, "what is", answer))
+        await asyncio.sleep(0.01)
+        assert await admission.submit(1, 1, 1, "the capital of France?", answer) is None
+        # Another user, or the same user elsewhere, isn't merged
+        other = asyncio.create_task(admission.submit(1, 2, 1, "hello", answer))
+        assert await first == "answer"
+        await other
+        assert prompts == ["what is\nthe capital of France?", "hello"]
+
+    asyncio.run(run())
+
+
+def test_coalescing_cap(monkeypatch, fresh_admission):
+    """Test that a waiting request stops taking merges once it is full."""
+    monkeypatch.setattr(admission, "COALESCE_WINDOW", 0.05)
+    monkeypatch.setattr(admission, "USER_BURST", 2)
+    monkeypatch.setattr(admission, "MAX_MERGED_PROMPTS", 3)
+    monkeypatch.setattr(admission, "MAX_MERGED_CHARS", 20)
+    prompts = []
+
+    async def answer(prompt):
+        prompts.append(prompt)
+        return "answer"
+
+    async def run():
+        first = asyncio.create_task(admission.submit(1, 1, 1, "a", answer))
+        await asyncio.sleep(0.01)
+        assert await admission.submit(1, 1, 1, "b", answer) is None
+        assert await admission.submit(1, 1, 1, "c", answer) is None
+        # Too many prompts: admitted as a new request, which the next ones merge into
+        second = asyncio.create_task(admission.submit(1, 1, 1, "d", answer))
+        await asyncio.sleep(0.01)
+        assert await admission.submit(1, 1, 1, "e" * 10, answer) is None
+        # Too long, and the user is out of tokens for a new request
+        with pytest.raises(admission.RateLimited):
+            await admission.submit(1, 1, 1, "f" * 10, answer)
+        await asyncio.gather(first, second)
+        assert prompts == ["a\nb\nc", "d\n" + "e" * 10]
+
+    asyncio.run(run())
+
+
+def test_fair_scheduling(monkeypatch, fresh_admission):
+    """Test that servers take turns for the answer slots."""
+    monkeypatch.setattr(admission, "CONCURRENCY", 1)
+    monkeypatch.setattr(admission, "GUILD_BURST", 10)
+    order = []
+
+    def answer_for(guild_id):
+        async def answer(prompt):
+            order.append(guild_id)
+            await asyncio.sleep(0.01)
+            return prompt
+        return answer
+
+    async def run():
+        # Server 1 floods the queue before server 2 asks anything
+        tasks = [
+            asyncio.create_task(admission.submit(1, 1, user_id, "q", answer_for(1)))
+            for user_id in range(4)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(admission.submit(2, 2, 9, "q", answer_for(2))))
+        await asyncio.sleep(0)
+        assert admission.queue_depth() == 4
+
+        # A cancelled waiter gives up its place without losing a slot
+        tasks[2].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert order == [1, 1, 2, 1]
+        assert admission._running == 0 and admission.queue_depth() == 0
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+import asyncio
+import gzip
+
+import archive
+import database
+
+
+def test_archive_bot_messages(monkeypatch, tmp_path):
+    """Test that old rows are archived per server and month, deleted, and can be read back."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'bot.db'}")
+    monkeypatch.setattr(database, "LOG_WRITE_BEHIND", False)
+    monkeypatch.setattr(archive, "ARCHIVE_CHUNK_SIZE", 3)
+    monkeypatch.setattr(archive, "ARCHIVE_DELETE_BATCH", 2)
+    directory = tmp_path / "archive"
+    utc = database.timezone.utc
+    times = [
+        database.datetime(2026, 8, 31, 23, tzinfo=utc),
+        database.datetime(2026, 9, 1, 1, tzinfo=utc),
+        database.datetime(2026, 9, 15, tzinfo=utc),
+        database.datetime(2026, 10, 15, tzinfo=utc),
+    ]
+
+    async def run():
+        await database.init_db()
+        async with database._get_session() as session:
+            for guild_id in (1, 2):
+                for index, created_at in enumerate(times):
+                    session.add(database.BotMessage(
+                        guild_id=guild_id, guild_name="guild", channel_id=10, channel_name="general",
+                        user_id=100, user_name="user", user_display_name="User",
+                        user_message=f"héllo {index}", bot_response=None,
+                        action_type=database.ActionType.MENTION, created_at=created_at,
+                    ))
+            await session.commit()
+
+        archived = await archive.archive_bot_messages(database.datetime(2026, 10, 1, tzinfo=utc), str(directory))
+        async with database._get_session() as session:
+            remaining = (await session.execute(database.select(database.BotMessage))).scalars().all()
+        await database.close_db()
+        return archived, remaining
+
+    archived, remaining = asyncio.run(run())
+    assert archived == 6
+    assert [row.user_message for row in remaining] == ["héllo 3", "héllo 3"]
+
+    assert sorted(p.relative_to(directory).as_posix() for p in directory.rglob("*.gz")) == [
+        "1/2026-08.jsonl.gz", "1/2026-09.jsonl.gz", "2/2026-08.jsonl.gz", "2/2026-09.jsonl.gz",
+    ]
+    # Rows from several chunks end up in the same file
+    with gzip.open(archive.archive_path(directory, 1, "2026-09"), "rt", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+
+    records = list(archive.load_archive(str(directory), guild_id=1))
+    assert [record["user_message"] for record in records] == ["héllo 0", "héllo 1", "héllo 2"]
+    assert records[0]["created_at"] == times[0]
+    assert records[0]["action_type"] == "mention"
+    assert len(list(archive.load_archive(str(directory), start=database.date(2026, 9, 1)))) == 4
+    assert len(list(archive.load_archive(str(directory), end=database.date(2026, 9, 1)))) == 2
+    assert list(archive.load_archive(str(tmp_path / "missing"))) == []
@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+import backfill
+import database
+
+WON = "Wordle 1,496 2/6\n\n🟩🟩🟩⬛🟩\n🟩🟩🟩🟩🟩"
+LOST = "Wordle 1,497 X/6\n\n⬜⬜🟨⬜⬜\n" + "🟩🟩⬜🟩🟩\n" * 5
+
+
+class FakeChannel:
+    def __init__(self, messages):
+        self.id = 10
+        self.guild = SimpleNamespace(id=1)
+        self.messages = messages
+        self.requested_after = []
+
+    async def history(self, limit, after, before, oldest_first):
+        assert limit is None and oldest_first
+        self.requested_after.append(after.id if after else None)
+        for message in self.messages:
+            if (after is None or message.id > after.id) and message.id < before.id:
+                yield message
+
+
+def _message(message_id, user_id, content, bot=False):
+    return SimpleNamespace(
+        id=message_id,
+        author=SimpleNamespace(id=user_id, bot=bot),
+        content=content,
+        created_at=database.datetime(2026, 10, 15, 12, tzinfo=database.timezone.utc),
+    )
+
+
+def test_backfill_channel(monkeypatch, tmp_path):
+    """Test that scores are recorded in batches, checkpointed, and that a rerun resumes."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'bot.db'}")
+    monkeypatch.setattr(database, "LOG_WRITE_BEHIND", False)
+    monkeypatch.setattr(backfill, "BACKFILL_BATCH_SIZE", 2)
+    monkeypatch.setattr(backfill, "BACKFILL_PAGE_DELAY", 0)
+    messages = [
+        _message(1, 3, WON),
+        _message(2, 3, "nice one"),
+        _message(3, 3, WON),  # Repeated share, only the first counts
+        _message(4, 4, LOST),
+        _message(5, 5, WON, bot=True),
+    ]
+    channel = FakeChannel(messages)
+    progress = []
+
+    async def on_progress(result):
+        progress.append((result.messages_scanned, result.scores_recorded, result.completed))
+
+    async def run():
+        await database.init_db()
+        first = await backfill.backfill_channel(channel, on_progress)
+        checkpoint = await database.get_backfill_checkpoint(channel.id)
+
+        # Only the new message is read and recorded on the next run
+        channel.messages.append(_message(6, 5, WON))
+        second = await backfill.backfill_channel(channel)
+        again = await database.get_backfill_checkpoint(channel.id)
+
+        totals, players, _ = await database.get_game_stats(
+            1, database.GameType.WORDLE, database.StatPeriod.WEEK, day=database.date(2026, 10, 15)
+        )
+        await database.close_db()
+        return first, checkpoint, second, again, totals, players
+
+    first, checkpoint, second, again, totals, players = asyncio.run(run())
+    assert progress == [(2, 1, False), (4, 2, False), (5, 2, True)]
+    assert (first.messages_scanned, first.scores_recorded, first.completed) == (5, 2, True)
+    assert (checkpoint.last_message_id, checkpoint.messages_scanned, checkpoint.completed) == (5, 5, True)
+
+    assert channel.requested_after == [None, 5]
+    assert (second.messages_scanned, second.scores_recorded) == (1, 1)
+    assert (again.last_message_id, again.messages_scanned, again.scores_recorded) == (6, 6, 3)
+
+    assert (totals.plays, totals.wins) == (3, 2)
+    assert sorted(player.user_id for player in players) == [3, 4, 5]
+    assert not backfill.is_running(channel.id)
@@ -0,0 +1,50 @@
+import conversation
+
+
+def test_conversation_window(monkeypatch):
+    """Test the ring buffer, token budget and message exclusion."""
+    monkeypatch.setattr(conversation, "_channels", conversation.OrderedDict())
+    monkeypatch.setattr(conversation, "HISTORY_SIZE", 4)
+    monkeypatch.setattr(conversation, "MAX_MESSAGE_CHARS", 40)
+
+    for i in range(1, 7):
+        conversation.remember(1, i, "golem", f"message {i}")
+    conversation.remember(1, 7, "grok", "answer", from_bot=True)
+    conversation.remember(1, 8, "golem", "   ")
+
+    # Only the last four messages are kept, and empty ones are skipped
+    assert [m.message_id for m in conversation.recent(1)] == [4, 5, 6, 7]
+    assert [m.message_id for m in conversation.recent(1, before_id=7)] == [4, 5, 6]
+    assert conversation.as_chat_history(conversation.recent(1, before_id=6)[-1:]) == [("user", "golem: message 5")]
+    assert conversation.as_chat_history(conversation.recent(1)[-1:]) == [("assistant", "answer")]
+
+    # The newest messages that fit in the budget are returned
+    tokens = [m.tokens for m in conversation.recent(1)]
+    assert [m.message_id for m in conversation.recent(1, token_budget=sum(tokens[-2:]))] == [6, 7]
+    assert conversation.recent(1, token_budget=0) == []
+
+    # Long messages are truncated before they are stored
+    conversation.remember(1, 9, "golem", "x" * 100)
+    assert conversation.recent(1)[-1].content == "x" * 40 + "…"
+
+    assert conversation.recent(2) == []
+
+
+def test_conversation_eviction(monkeypatch):
+    """Test that idle and least recently active channels are forgotten."""
+    monkeypatch.setattr(conversation, "_channels", conversation.OrderedDict())
+    monkeypatch.setattr(conversation, "MAX_CHANNELS", 2)
+    now = 1000.0
+    monkeypatch.setattr(conversation.time, "monotonic", lambda: now)
+
+    conversation.remember(1, 1, "golem", "hi")
+    conversation.remember(2, 2, "golem", "hi")
+    conversation.remember(1, 3, "golem", "hi again")
+    conversation.remember(3, 4, "golem", "hi")
+    assert list(conversation._channels) == [1, 3]
+
+    now += conversation.IDLE_TTL
+    assert conversation.recent(1) == []
+    conversation.remember(4, 5, "golem", "hi")
+    assert list(conversation._channels) == [4]
+    assert conversation.channel_count() == 1
@@ -0,0 +1,331 @@
+import asyncio
+
+import database
+from database import ActionType
+
+
+def _log_kwargs(i: int) -> dict:
+    return dict(
+        guild_id=1,
+        guild_name="guild",
+        channel_id=2,
+        channel_name="channel",
+        user_id=i,
+        user_name=f"user{i}",
+        user_display_name=f"User {i}",
+        action_type=ActionType.WORDLE,
+        user_message="Wordle 1,497 3/6",
+        bot_response="Good score!",
+    )
+
+
+def test_write_behind_logging(monkeypatch):
+    """Test that queued log records are batched and drained on close."""
+    batches = []
+
+    async def fake_write(rows):
+        batches.append(rows)
+
+    monkeypatch.setattr(database, "_write_log_batch", fake_write)
+    monkeypatch.setattr(database, "LOG_BATCH_SIZE", 10)
+    monkeypatch.setattr(database, "LOG_FLUSH_INTERVAL", 60)
+
+    async def run():
+        database._start_log_flusher()
+        for i in range(25):
+            assert await database.log_message(**_log_kwargs(i))
+        await asyncio.sleep(0.01)
+
+        # Two full batches were flushed by size, the rest waits for the timer
+        assert [len(batch) for batch in batches] == [10, 10]
+
+        await database.close_db()
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        assert [row["user_id"] for batch in batches for row in batch] == list(range(25))
+
+    asyncio.run(run())
+
+
+def test_write_behind_overflow(monkeypatch):
+    """Test the drop policies when the log queue is full."""
+    monkeypatch.setattr(database, "LOG_QUEUE_SIZE", 2)
+
+    async def run(policy):
+        monkeypatch.setattr(database, "LOG_OVERFLOW_POLICY", policy)
+        monkeypatch.setattr(database, "_log_queue", asyncio.Queue(maxsize=2))
+        results = [await database._enqueue_log_record({"user_id": i}) for i in range(3)]
+        remaining = [database._log_queue.get_nowait()["user_id"] for _ in range(2)]
+        return results, remaining
+
+    assert asyncio.run(run("drop_newest")) == ([True, True, False], [0, 1])
+    assert asyncio.run(run("drop_oldest")) == ([True, True, True], [1, 2])
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+
+class FakeSession:
+    def __init__(self, prompts, queries):
+        self.prompts = prompts
+        self.queries = queries
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        guild_id = stmt.compile().params["guild_id_1"]
+        self.queries.append(guild_id)
+        return FakeResult(self.prompts.get(guild_id))
+
+
+def test_server_prompt_cache(monkeypatch):
+    """Test that prompt lookups, including misses, are cached with LRU eviction."""
+    queries = []
+    prompts = {1: "be nice"}
+    monkeypatch.setattr(database, "_get_session", lambda: FakeSession(prompts, queries))
+    monkeypatch.setattr(database, "_prompt_cache", database.OrderedDict())
+    monkeypatch.setattr(database, "PROMPT_CACHE_SIZE", 2)
+
+    async def run():
+        assert await database.get_server_prompt(1) == "be nice"
+        assert await database.get_server_prompt(1) == "be nice"
+        assert await database.get_server_prompt(2) is None
+        assert await database.get_server_prompt(2) is None
+        assert queries == [1, 2]
+
+        # Guild 3 evicts guild 1, the least recently used entry
+        await database.get_server_prompt(3)
+        await database.get_server_prompt(1)
+        assert queries == [1, 2, 3, 1]
+
+        # A write-through replaces the cached value without a query
+        database._cache_prompt(1, "be mean")
+        assert await database.get_server_prompt(1) == "be mean"
+        assert queries == [1, 2, 3, 1]
+
+        monkeypatch.setattr(database, "PROMPT_CACHE_TTL", 0)
+        database._cache_prompt(1, "be mean")
+        assert await database.get_server_prompt(1) == "be nice"
+        assert queries == [1, 2, 3, 1, 1]
+
+    asyncio.run(run())
+
+
+def test_stat_period_start():
+    """Test the period windows game stats are rolled up over."""
+    day = database.date(2026, 10, 15)  # A Thursday
+    assert database.stat_period_start(database.StatPeriod.DAY, day) == day
+    assert database.stat_period_start(database.StatPeriod.WEEK, day) == database.date(2026, 10, 12)
+    assert database.stat_period_start(database.StatPeriod.ALL, day) == database.ALL_TIME_START
+
+
+def test_bot_message_partition_months():
+    """Test the month arithmetic used for bot_messages partitions."""
+    day = database.date(2026, 11, 17)
+    assert database._month_start(day) == database.date(2026, 11, 1)
+    assert database._month_start(day, 2) == database.date(2027, 1, 1)
+    assert database._month_start(day, -11) == database.date(2025, 12, 1)
+    assert database._bot_message_partition_name(database.date(2027, 1, 1)) == "bot_messages_p202701"
+
+
+def _use_sqlite(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'bot.db'}")
+    monkeypatch.setattr(database, "LOG_WRITE_BEHIND", False)
+    monkeypatch.setattr(database, "_prompt_cache", database.OrderedDict())
+
+
+def test_sqlite_backend(monkeypatch, tmp_path):
+    """Test the public database API end to end on an embedded SQLite database."""
+    _use_sqlite(monkeypatch, tmp_path)
+    score = database.GameScore("wordle", 1497, True, "00100/22222", guesses=2)
+    day = database.date(2026, 10, 15)
+    created_at = database.datetime(2026, 10, 15, 12, tzinfo=database.timezone.utc)
+
+    async def run():
+        await database.init_db()
+        assert database._engine.dialect.name == "sqlite"
+        async with database._engine.connect() as conn:
+            journal_mode = (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar()
+        assert journal_mode == "wal"
+
+        assert await database.log_message(**_log_kwargs(1))
+
+        assert await database.get_server_prompt(1) is None
+        assert await database.upsert_server_prompt(1, "guild", 1, "user1", "User 1", "be nice")
+        assert await database.upsert_server_prompt(1, "guild", 1, "user1", "User 1", "be mean")
+        database._prompt_cache.clear()
+        assert await database.get_server_prompt(1) == "be mean"
+
+        # A repeated share of the same puzzle is only counted once
+        assert await database.record_game_score(1, 2, 3, score, created_at=created_at)
+        assert not await database.record_game_score(1, 2, 3, score, created_at=created_at)
+        assert await database.record_game_score(1, 2, 4, score._replace(won=False, guesses=None), created_at=created_at)
+
+        totals, players, distribution = await database.get_game_stats(
+            1, database.GameType.WORDLE, database.StatPeriod.WEEK, day=day
+        )
+        assert (totals.plays, totals.wins) == (2, 1)
+        assert [player.user_id for player in players] == [3, 4]
+        assert distribution == {2: 1, database.NO_SCORE_BUCKET: 1}
+
+        async with database._get_session() as session:
+            messages = (await session.execute(database.select(database.BotMessage))).scalars().all()
+        assert [message.user_id for message in messages] == [1]
+
+        await database.close_db()
+
+    asyncio.run(run())
+
+
+def test_server_prompt_versions(monkeypatch, tmp_path):
+    """Test that every prompt set is kept in the history and can be rolled back to."""
+    _use_sqlite(monkeypatch, tmp_path)
+    author = dict(user_id=1, user_name="user1", user_display_name="User 1")
+
+    async def run():
+        await database.init_db()
+        for prompt in ("be nice", "be mean", "be brief"):
+            assert await database.upsert_server_prompt(1, "guild", system_prompt=prompt, **author)
+        assert await database.upsert_server_prompt(2, "other", system_prompt="be loud", **author)
+
+        versions = await database.list_server_prompt_versions(1)
+        assert [(v.version, v.system_prompt) for v in versions] == [
+            (3, "be brief"), (2, "be mean"), (1, "be nice"),
+        ]
+        assert [v.version for v in await database.list_server_prompt_versions(2)] == [1]
+
+        # A rollback becomes the current prompt and is appended as a new version
+        assert await database.rollback_server_prompt(1, "guild", 1, **author) == "be nice"
+        assert await database.rollback_server_prompt(1, "guild", 9, **author) is None
+        database._prompt_cache.clear()
+        assert await database.get_server_prompt(1) == "be nice"
+        assert [v.version for v in await database.list_server_prompt_versions(1, limit=2)] == [4, 3]
+
+        async with database._get_session() as session:
+            prompts = (await session.execute(database.select(database.ServerPrompt))).scalars().all()
+        assert sorted(prompt.guild_id for prompt in prompts) == [1, 2]
+
+        await database.close_db()
+
+    asyncio.run(run())
+
+
+def test_prompt_versions_backfill(monkeypatch, tmp_path):
+    """Test that a prompt set before the prompt history existed becomes version 1 on startup."""
+    _use_sqlite(monkeypatch, tmp_path)
+    author = dict(user_id=1, user_name="user1", user_display_name="User 1")
+
+    async def run():
+        await database.init_db()
+        async with database._get_session() as session:
+            session.add(database.ServerPrompt(guild_id=1, guild_name="guild", system_prompt="be nice", **author))
+            await session.commit()
+        await database.close_db()
+
+        await database.init_db()
+        assert await database.upsert_server_prompt(1, "guild", system_prompt="be mean", **author)
+        # Already backfilled servers aren't backfilled again
+        await database.close_db()
+        await database.init_db()
+        versions = await database.list_server_prompt_versions(1)
+        assert [(v.version, v.system_prompt) for v in versions] == [(2, "be mean"), (1, "be nice")]
+        assert await database.rollback_server_prompt(1, "guild", 1, **author) == "be nice"
+        await database.close_db()
+
+    asyncio.run(run())
+
+
+def test_leaderboard_channels(monkeypatch, tmp_path):
+    """Test that leaderboard channels are stored per server and served from memory."""
+    _use_sqlite(monkeypatch, tmp_path)
+    author = dict(user_id=1, user_name="user1", user_display_name="User 1")
+
+    async def run():
+        assert await database.get_leaderboard_channels() is None
+        await database.init_db()
+        assert await database.get_leaderboard_channels() == {}
+        assert await database.set_leaderboard_channel(1, "guild", 10, "general", **author)
+        assert await database.set_leaderboard_channel(2, "other", 20, "games", **author)
+        assert await database.set_leaderboard_channel(1, "guild", 11, "leaderboard", **author)
+        assert await database.get_leaderboard_channels() == {1: 11, 2: 20}
+
+        # Clearing a channel stops the leaderboard for that server, and is remembered
+        assert await database.set_leaderboard_channel(2, "other", None, None, **author)
+        channels = await database.get_leaderboard_channels()
+        assert channels == {1: 11, 2: None}
+        # Callers get a copy, not the cache itself
+        channels[3] = 30
+        assert await database.get_leaderboard_channels() == {1: 11, 2: None}
+
+        # The cache matches what a fresh load reads from the table
+        database._leaderboard_channels = None
+        assert await database.get_leaderboard_channels() == {1: 11, 2: None}
+
+        await database.close_db()
+
+    asyncio.run(run())
+
+
+def test_bot_settings(monkeypatch, tmp_path):
+    """Test that bot settings are saved, overwritten and read back."""
+    _use_sqlite(monkeypatch, tmp_path)
+
+    async def run():
+        assert not await database.set_bot_setting("key", "value")
+        await database.init_db()
+        assert await database.get_bot_setting("key") is None
+        assert await database.set_bot_setting("key", "one")
+        assert await database.set_bot_setting("key", "two")
+        assert await database.get_bot_setting("key") == "two"
+        await database.close_db()
+
+    asyncio.run(run())
+
+
+def test_bot_messages_primary_key():
+    """Test that created_at is only part of the primary key when bot_messages is partitioned."""
+    columns = [column.name for column in database.BotMessage.__table__.primary_key.columns]
+    assert columns == (["id", "created_at"] if database.BOT_MESSAGES_PARTITIONED else ["id"])
+
+
+def test_prune_game_stats(monkeypatch, tmp_path):
+    """Test that expired day and week stats are deleted and all-time stats are kept."""
+    _use_sqlite(monkeypatch, tmp_path)
+    monkeypatch.setattr(database, "GAME_STATS_RETENTION_DAYS", 7)
+    score = database.GameScore("wordle", 1497, True, "00100/22222", guesses=2)
+    utc = database.timezone.utc
+
+    async def stats(period, day):
+        totals, _, distribution = await database.get_game_stats(1, database.GameType.WORDLE, period, day=day)
+        return (totals.plays if totals else 0), distribution
+
+    async def run():
+        await database.init_db()
+        # Monday 2026-10-05 and Thursday 2026-10-08
+        for user_id, day in ((1, 5), (2, 8)):
+            created_at = database.datetime(2026, 10, day, 12, tzinfo=utc)
+            assert await database.record_game_score(1, 2, user_id, score, created_at=created_at)
+
+        # 2026-10-15 minus 7 days: the 5th's and 8th's days ended by then, their week didn't
+        assert await database.prune_game_stats(database.date(2026, 10, 15)) > 0
+        day = database.StatPeriod.DAY
+        week = database.StatPeriod.WEEK
+        assert await stats(day, database.date(2026, 10, 5)) == (0, {})
+        assert await stats(day, database.date(2026, 10, 8)) == (1, {2: 1})
+        assert await stats(week, database.date(2026, 10, 5)) == (2, {2: 2})
+
+        # A week later the week has ended too
+        await database.prune_game_stats(database.date(2026, 10, 19))
+        assert await stats(week, database.date(2026, 10, 5)) == (0, {})
+        assert await stats(database.StatPeriod.ALL, None) == (2, {2: 2})
+        await database.close_db()
+
+    asyncio.run(run())
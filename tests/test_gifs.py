@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+
+import gifs
+
+
+def test_gif_catalog_lookup():
+    """Test category lookup, autocomplete order and random picks."""
+    catalog = gifs.GifCatalog({
+        "liars_bar": ["https://gif/liar"],
+        "lion": ["https://gif/lion"],
+        "bar_fight": ["https://gif/fight1", "https://gif/fight2"],
+        "empty": [],
+    })
+
+    # Empty categories are dropped
+    assert len(catalog) == 3
+    assert catalog.find("empty") is None
+
+    # Case, spaces and punctuation are ignored
+    assert catalog.find("Liar's Bar") == "liars_bar"
+    assert catalog.find("BAR FIGHT") == "bar_fight"
+    assert catalog.find("nope") is None
+
+    # Prefix matches first, then substring matches; typos only get a suggestion
+    assert catalog.autocomplete("li") == ["liars_bar", "lion"]
+    assert catalog.autocomplete("bar") == ["bar_fight", "liars_bar"]
+    assert catalog.autocomplete("arsb") == ["liars_bar"]
+    assert catalog.autocomplete("lino") == []
+    assert catalog.suggest("lino") == "lion"
+    assert catalog.autocomplete("") == ["liars_bar", "lion", "bar_fight"]
+    assert catalog.autocomplete("bar", limit=1) == ["bar_fight"]
+    assert catalog.suggest("barfihgt") == "bar_fight"
+    assert catalog.suggest("zzzz") is None
+
+    assert catalog.random_gif("bar_fight") in ("https://gif/fight1", "https://gif/fight2")
+    assert catalog.random_gif("nope") is None
+    assert catalog.random_gif() in {url for urls in catalog.categories.values() for url in urls}
+    assert gifs.GifCatalog({}).random_gif() is None
+    assert gifs.display_name("liars_bar") == "liars bar"
+
+    # Names that normalize the same keep the first category
+    assert gifs.GifCatalog({"cat": ["a"], "CAT": ["b"]}).find("cat") == "cat"
+
+
+def test_gif_catalog_substring_index():
+    """Test that substring search through the n-gram index matches a plain scan."""
+    names = [f"{word}_{index}" for index in range(50) for word in ("cat", "dog", "catdog", "bird")]
+    catalog = gifs.GifCatalog({name: ["https://gif"] for name in names})
+    for query in ("a", "at", "tdo", "atdog", "dog4", "ird_1", "zzz", "catdog_49"):
+        key = gifs.normalize(query)
+        expected = [candidate for candidate in catalog._sorted_keys if key in candidate]
+        assert catalog._substring_matches(key, len(names), set()) == expected
+        assert catalog._substring_matches(key, 3, set()) == expected[:3]
+
+
+def test_gif_catalog_reload(tmp_path, monkeypatch):
+    """Test that the catalog reloads when its file changes and survives a bad file."""
+    path = tmp_path / "gifs.json"
+    monkeypatch.setattr(gifs, "GIFS_FILE", str(path))
+    monkeypatch.setattr(gifs, "RELOAD_INTERVAL", 0)
+    monkeypatch.setattr(gifs, "_catalog", gifs.GifCatalog({}))
+    monkeypatch.setattr(gifs, "_loaded_mtime", None)
+    monkeypatch.setattr(gifs, "_checked_at", float("-inf"))
+
+    # A missing file gives an empty catalog
+    assert len(asyncio.run(gifs.get_catalog())) == 0
+
+    path.write_text(json.dumps({"cats": ["https://gif/cat"]}))
+    os.utime(path, (1000, 1000))
+    catalog = asyncio.run(gifs.get_catalog())
+    assert catalog.names == ("cats",)
+    # An unchanged file isn't reloaded
+    assert asyncio.run(gifs.get_catalog()) is catalog
+
+    path.write_text(json.dumps({"cats": ["https://gif/cat"], "dogs": ["https://gif/dog"]}))
+    os.utime(path, (2000, 2000))
+    assert asyncio.run(gifs.get_catalog()).names == ("cats", "dogs")
+
+    # An invalid file keeps the previous catalog
+    path.write_text("{not json")
+    os.utime(path, (3000, 3000))
+    assert asyncio.run(gifs.get_catalog()).names == ("cats", "dogs")
+    path.write_text(json.dumps(["not", "an", "object"]))
+    os.utime(path, (4000, 4000))
+    assert asyncio.run(gifs.get_catalog()).names == ("cats", "dogs")
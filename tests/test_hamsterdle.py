@@ -0,0 +1,54 @@
+import asyncio
+
+import hamsterdle
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self, content_type=None):
+        return self.data
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url):
+        self.calls += 1
+        return FakeResponse({"results": [{"playerName": "golem#1234", "score": 10}]})
+
+
+def test_leaderboard_single_flight_and_cache(monkeypatch):
+    """Test that concurrent fetches share one request and later ones hit the cache."""
+    session = FakeSession()
+    monkeypatch.setattr(hamsterdle, "_get_session", lambda: session)
+    monkeypatch.setattr(hamsterdle, "_cached_leaderboard", None)
+    monkeypatch.setattr(hamsterdle, "_inflight", None)
+
+    async def run():
+        assert not hamsterdle.is_cached()
+        results = await asyncio.gather(*(hamsterdle.get_leaderboard() for _ in range(5)))
+        assert session.calls == 1
+        assert all(result == results[0] for result in results)
+
+        assert hamsterdle.is_cached()
+        await hamsterdle.get_leaderboard()
+        assert session.calls == 1
+
+        monkeypatch.setattr(hamsterdle, "CACHE_TTL", 0)
+        await hamsterdle.get_leaderboard()
+        assert session.calls == 2
+
+    asyncio.run(run())
@@ -0,0 +1,50 @@
+import asyncio
+from types import SimpleNamespace
+
+import database
+import main
+
+
+class FakeGuild:
+    def __init__(self, guild_id, channel_names):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+        self.text_channels = [
+            SimpleNamespace(id=guild_id * 10 + index, name=name) for index, name in enumerate(channel_names)
+        ]
+
+    def get_channel(self, channel_id):
+        return next((channel for channel in self.text_channels if channel.id == channel_id), None)
+
+
+def test_legacy_leaderboard_channel(monkeypatch, tmp_path):
+    """Test that servers without a configured channel keep getting the leaderboard in the legacy one."""
+    monkeypatch.setattr(
+        main.discord_client._connection, "user", SimpleNamespace(id=99, name="bot", display_name="Bot"), raising=False
+    )
+    legacy = main.LEGACY_LEADERBOARD_CHANNEL
+    guilds = [FakeGuild(1, ["general", legacy]), FakeGuild(2, ["general", legacy]), FakeGuild(3, ["general"])]
+    author = dict(user_id=1, user_name="user1", user_display_name="User 1")
+
+    async def run():
+        # Without a database every server with the legacy channel gets it
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+        no_database = await main.get_leaderboard_targets(guilds)
+
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'bot.db'}")
+        monkeypatch.setattr(database, "LOG_WRITE_BEHIND", False)
+        await database.init_db()
+        # Server 2 turned it off, which the legacy channel mustn't override
+        assert await database.set_leaderboard_channel(2, "guild2", None, None, **author)
+        targets = await main.get_leaderboard_targets(guilds)
+
+        # The fallback was saved, so the next run reads it from a fresh cache
+        database._leaderboard_channels = None
+        configured = await database.get_leaderboard_channels()
+        await database.close_db()
+        return no_database, targets, configured
+
+    no_database, targets, configured = asyncio.run(run())
+    assert [channel.id for channel in no_database] == [11, 21]
+    assert [channel.id for channel in targets] == [11]
+    assert configured == {1: 11, 2: None}
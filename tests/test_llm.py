@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+import llm
+
+
+def test_llm_concurrency_and_queue(monkeypatch):
+    """Test that calls are capped, queued, rejected when full and timed out."""
+    monkeypatch.setattr(llm, "MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(llm, "MAX_QUEUE", 1)
+    monkeypatch.setattr(llm, "_semaphore", None)
+
+    running = 0
+    peak = 0
+
+    async def fake_sample(system_prompt, prompt, model, history):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return prompt.upper()
+
+    monkeypatch.setattr(llm, "_sample", fake_sample)
+
+    async def run():
+        calls = [asyncio.create_task(llm.complete("sys", f"hi {i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        assert llm.queue_depth() == 1
+
+        # Two calls running and one waiting: the queue is full
+        with pytest.raises(llm.LLMBusyError):
+            await llm.complete("sys", "one too many")
+
+        results = await asyncio.gather(*calls)
+        assert results == ["HI 0", "HI 1", "HI 2"]
+        assert peak == 2
+
+        with pytest.raises(llm.LLMTimeoutError):
+            await llm.complete("sys", "slow", timeout=0.01)
+
+    asyncio.run(run())
+
+
+def test_llm_history(monkeypatch):
+    """Test that earlier conversation messages are passed through to the chat."""
+    monkeypatch.setattr(llm, "_semaphore", None)
+    seen = []
+
+    async def fake_sample(system_prompt, prompt, model, history):
+        seen.append(list(history))
+        return "ok"
+
+    monkeypatch.setattr(llm, "_sample", fake_sample)
+    history = [("user", "golem: what's 2+2?"), ("assistant", "4")]
+    assert asyncio.run(llm.complete("sys", "and times 3?", history=history)) == "ok"
+    assert asyncio.run(llm.complete("sys", "hi")) == "ok"
+    assert seen == [history, []]
+
+
+def test_llm_stream(monkeypatch):
+    """Test that streams hold a slot until closed and time out between pieces."""
+    monkeypatch.setattr(llm, "MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(llm, "_semaphore", None)
+
+    async def fake_stream(system_prompt, prompt, model, history):
+        for word in prompt.split():
+            await asyncio.sleep(0.01)
+            yield word
+
+    monkeypatch.setattr(llm, "_stream", fake_stream)
+
+    async def run():
+        assert [piece async for piece in llm.stream("sys", "one two three")] == ["one", "two", "three"]
+
+        # Closing a stream early frees its slot
+        pieces = llm.stream("sys", "one two three")
+        assert await anext(pieces) == "one"
+        assert llm._get_semaphore().locked()
+        await pieces.aclose()
+        assert not llm._get_semaphore().locked()
+
+        with pytest.raises(llm.LLMTimeoutError):
+            async for _ in llm.stream("sys", "one two three", timeout=0.015):
+                pass
+        assert not llm._get_semaphore().locked()
+
+    asyncio.run(run())
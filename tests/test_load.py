@@ -0,0 +1,27 @@
+import asyncio
+
+import llm
+from benchmarks import load
+
+
+def test_load_harness(tmp_path):
+    """Test that synthetic traffic runs through the real handlers and is reported per action."""
+    real_sample = llm._sample
+    mix = load.parse_mix(",".join(load.DEFAULT_MIX))
+    assert set(mix) == set(load.DEFAULT_MIX) and abs(sum(mix.values()) - 1) < 1e-9
+
+    results = asyncio.run(load.run_load(
+        rate=200,
+        duration=0.5,
+        mix=mix,
+        llm_latency=0.01,
+        send_latency=0,
+        database_url=f"sqlite:///{tmp_path / 'load.db'}",
+    ))
+
+    assert "error" not in results
+    for action in ("wordle", "mention", "gif", "stats", "show_prompt"):
+        assert results[action]["count"] > 0
+        assert results[action]["p50"] <= results[action]["p99"] <= results[action]["max"]
+    # The stub LLM is removed again afterwards
+    assert llm._sample is real_sample
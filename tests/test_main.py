@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+import database
+import main
+
+
+class FakeTree:
+    def __init__(self):
+        self.syncs = 0
+
+    def get_commands(self):
+        return []
+
+    async def sync(self):
+        self.syncs += 1
+        return []
+
+
+def test_sync_command_tree(monkeypatch, tmp_path):
+    """Test that the command tree is only synced when it changed, tracked in the database if there is one."""
+    hash_file = tmp_path / "hash"
+    monkeypatch.setattr(main, "COMMAND_TREE_HASH_FILE", str(hash_file))
+    bot = SimpleNamespace(application_id=1, tree=FakeTree())
+
+    async def run():
+        # Without a database the hash is kept in the file
+        monkeypatch.delenv("DATABASE_URL", raising=False)
+        await main.sync_command_tree(bot)
+        await main.sync_command_tree(bot)
+        assert bot.tree.syncs == 1 and hash_file.exists()
+
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'bot.db'}")
+        monkeypatch.setattr(database, "LOG_WRITE_BEHIND", False)
+        await database.init_db()
+        # With a database the hash is kept there, so it survives the file being wiped on restart
+        hash_file.unlink()
+        bot.application_id = 2
+        await main.sync_command_tree(bot)
+        await main.sync_command_tree(bot)
+        await database.close_db()
+        assert bot.tree.syncs == 2 and not hash_file.exists()
+
+    asyncio.run(run())
+
+
+def test_rate_limit_notice(monkeypatch):
+    """Test that a rate limited user is told to slow down once per rate limit window."""
+    monkeypatch.setattr(main, "rate_limit_notices", {})
+    now = [100.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: now[0])
+
+    assert main.should_send_rate_limit_notice(1, 5)
+    assert not main.should_send_rate_limit_notice(1, 4)
+    # Other users are told separately
+    assert main.should_send_rate_limit_notice(2, 5)
+    now[0] += 5
+    assert main.should_send_rate_limit_notice(1, 5)
+
+
+def test_embed_field_value():
+    """Test that embed field values stay within Discord's limit, saying how many lines were left out."""
+    assert main.embed_field_value([], "empty") == "empty"
+    assert main.embed_field_value(["a", "b"], "empty") == "a\nb"
+
+    lines = [f"line {index:04}" for index in range(200)]
+    value = main.embed_field_value(lines, "empty")
+    assert len(value) <= main.EMBED_FIELD_LIMIT
+    shown = value.split("\n")[:-1]
+    assert shown == lines[:len(shown)]
+    assert value.endswith(f"…and {len(lines) - len(shown)} more")
+
+    # Exactly at the limit everything fits
+    lines = ["x" * 511, "y" * 512]
+    assert main.embed_field_value(lines, "empty") == "\n".join(lines)
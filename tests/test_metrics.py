@@ -0,0 +1,75 @@
+import asyncio
+import socket
+
+import aiohttp
+import pytest
+
+import metrics
+
+
+def test_histogram_quantiles():
+    """Test quantile estimates from the fixed latency buckets."""
+    histogram = metrics.Histogram()
+    assert histogram.quantile(0.5) is None
+
+    # 0.1 ms and 1 ms fall exactly on bucket bounds
+    for _ in range(100):
+        histogram.observe(0.0001)
+        histogram.observe(0.001)
+    assert histogram.count == 200
+    assert histogram.quantile(0.25) == pytest.approx(0.00005)
+    assert histogram.quantile(0.75) == pytest.approx(0.00075)
+
+    # Values past the last bucket are reported as the last bound
+    histogram.observe(600)
+    assert histogram.quantile(1.0) == metrics.LATENCY_BUCKETS[-1]
+
+
+def test_timed_stages_and_export(monkeypatch):
+    """Test stage timing, error counting and the Prometheus text output."""
+    monkeypatch.setattr(metrics, "_histograms", {})
+    monkeypatch.setattr(metrics, "_counters", {})
+    monkeypatch.setattr(metrics, "_gauges", {})
+    monkeypatch.setattr(metrics, "_labeled_gauges", {})
+
+    with metrics.timed("parse"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.timed("send"):
+            raise ValueError
+    metrics.increment("actions", "action", "wordle")
+    metrics.increment("actions", "action", "wordle")
+    metrics.register_gauge("llm_queue_depth", lambda: 3)
+    metrics.register_labeled_gauge("shard_latency_seconds", "shard", lambda: {"1": 0.5, "0": 0.25})
+
+    assert [(stage, count) for stage, (count, _, _) in metrics.stage_summary().items()] == [("parse", 1), ("send", 1)]
+    assert metrics.counter_values() == {("actions", "action", "wordle"): 2, ("errors", "stage", "send"): 1}
+
+    text = metrics.render_prometheus()
+    assert 'cheripit_stage_latency_seconds_bucket{stage="parse",le="+Inf"} 1' in text
+    assert 'cheripit_stage_latency_seconds_count{stage="send"} 1' in text
+    assert 'cheripit_actions_total{action="wordle"} 2' in text
+    assert 'cheripit_errors_total{stage="send"} 1' in text
+    assert 'cheripit_shard_latency_seconds{shard="0"} 0.25\ncheripit_shard_latency_seconds{shard="1"} 0.5' in text
+    assert "cheripit_llm_queue_depth 3" in text
+
+
+def test_metrics_server():
+    """Test that the metrics endpoint serves the Prometheus text on a local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    async def run():
+        await metrics.start_server(port)
+        try:
+            assert metrics.server_running()
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    assert response.status == 200
+                    assert await response.text() == metrics.render_prometheus()
+        finally:
+            await metrics.stop_server()
+        assert not metrics.server_running()
+
+    asyncio.run(run())
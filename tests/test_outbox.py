@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+import outbox
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1, delay=0.0, error=None):
+        self.id = channel_id
+        self.delay = delay
+        self.error = error
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        self.sent.append((content, kwargs))
+        return len(self.sent)
+
+
+@pytest.fixture
+def fresh_outbox(monkeypatch):
+    monkeypatch.setattr(outbox, "_channels", {})
+    monkeypatch.setattr(outbox, "_buckets", outbox.OrderedDict())
+    monkeypatch.setattr(outbox, "_global_bucket", outbox.TokenBucket(100, 100, outbox.time.monotonic()))
+    monkeypatch.setattr(outbox, "MERGE_WINDOW", 0.05)
+
+
+def test_outbox_merges_bursts(fresh_outbox):
+    """Test that mergeable replies queued within the window go out as one message."""
+    channel = FakeChannel()
+
+    async def run():
+        # A quiet channel gets its reply straight away
+        assert await outbox.send(channel, "First!", merge=True, mention="<@1>") == 1
+        return await asyncio.gather(
+            outbox.send(channel, "Nice!", merge=True, mention="<@1>"),
+            outbox.send(channel, "Ouch!", merge=True, mention="<@2>"),
+            outbox.send(channel, "Solid", merge=True),
+            outbox.send(FakeChannel(2), "Alone", merge=True, mention="<@3>"),
+        )
+
+    assert asyncio.run(run()) == [2, 2, 2, 1]
+    assert channel.sent[0] == ("First!", {})
+    content, kwargs = channel.sent[1]
+    assert content == "<@1> Nice!\n<@2> Ouch!\nSolid"
+    assert kwargs["allowed_mentions"].users is False
+    assert outbox.queue_depth() == 0
+
+
+def test_outbox_priority_and_pacing(fresh_outbox, monkeypatch):
+    """Test that interactive messages jump the queue and sends keep to the channel rate."""
+    monkeypatch.setattr(outbox, "CHANNEL_BURST", 1)
+    monkeypatch.setattr(outbox, "CHANNEL_RATE", 20)
+    channel = FakeChannel(delay=0.01)
+
+    async def run():
+        start = asyncio.get_running_loop().time()
+        first = asyncio.create_task(outbox.send(channel, "bulk 1", priority=outbox.BULK))
+        await asyncio.sleep(0)
+        await asyncio.gather(
+            first,
+            outbox.send(channel, "bulk 2", priority=outbox.BULK),
+            outbox.send(channel, "reply"),
+        )
+        return asyncio.get_running_loop().time() - start
+
+    elapsed = asyncio.run(run())
+    assert [content for content, _ in channel.sent] == ["bulk 1", "reply", "bulk 2"]
+    # One send right away, then one every 1/20 s
+    assert elapsed >= 0.09
+
+
+def test_outbox_send_errors(fresh_outbox):
+    """Test that a failed send is raised to the caller and doesn't stop the queue."""
+    failing = FakeChannel(error=RuntimeError("no permission"))
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await outbox.send(failing, "hello")
+        failing.error = None
+        return await outbox.send(failing, "again")
+
+    assert asyncio.run(run()) == 1
@@ -0,0 +1,79 @@
+import asyncio
+
+import replies
+
+
+class FakeMessage:
+    def __init__(self, channel, content):
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content):
+        self.channel.edits += 1
+        self.content = content
+
+
+class FakeChannel:
+    def __init__(self):
+        self.messages = []
+        self.edits = 0
+
+    async def send(self, content):
+        message = FakeMessage(self, content)
+        self.messages.append(message)
+        return message
+
+
+def test_split_message():
+    """Test that long text is split at clean breaks into Discord-sized parts."""
+    assert replies.split_message("") == [""]
+    assert replies.split_message("hello world") == ["hello world"]
+
+    paragraphs = "\n\n".join(["word " * 30] * 5)
+    parts = replies.split_message(paragraphs, limit=400)
+    assert all(len(part) + len(replies.STREAM_CURSOR) <= 400 for part in parts)
+    assert all(part.startswith("word") and part.endswith("word") for part in parts[:-1])
+    assert " ".join(" ".join(parts).split()) == " ".join(paragraphs.split())
+
+    # Text without any break is cut hard
+    assert [len(part) for part in replies.split_message("x" * 500, limit=200)] == [190, 190, 120]
+
+    # A code block cut by a split is closed and reopened
+    code = "Here:\n```\n" + "print(1)\n" * 60 + "```\nDone"
+    parts = replies.split_message(code, limit=300)
+    assert len(parts) > 1
+    assert all(part.count("```") % 2 == 0 for part in parts)
+    assert parts[1].startswith("```\nprint(1)")
+
+
+def test_stream_reply(monkeypatch):
+    """Test progressive edits, continuation messages and errors."""
+    monkeypatch.setattr(replies, "STREAM_EDIT_INTERVAL", 0)
+    monkeypatch.setattr(replies, "MESSAGE_LIMIT", 100)
+    closed = []
+
+    async def pieces(words, error=None):
+        try:
+            for word in words:
+                yield word + " "
+            if error:
+                raise error
+        finally:
+            closed.append(True)
+
+    async def run():
+        channel = FakeChannel()
+        text = await replies.stream_reply(channel, pieces(["hello"] * 30), str)
+        assert text == "hello " * 30
+        assert channel.edits > 1
+        assert [len(m.content) <= 100 for m in channel.messages] == [True, True]
+        assert " ".join(m.content for m in channel.messages).split() == ["hello"] * 30
+        assert not any(m.content.endswith(replies.STREAM_CURSOR) for m in channel.messages)
+
+        channel = FakeChannel()
+        text = await replies.stream_reply(channel, pieces([], RuntimeError("boom")), lambda e: f"Error: {e}")
+        assert text == "Error: boom"
+        assert [m.content for m in channel.messages] == ["Error: boom"]
+        assert closed == [True, True]
+
+    asyncio.run(run())
@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+import sharding
+
+
+def test_parse_shard_ids():
+    """Test shard id lists and ranges, and their validation."""
+    assert sharding.parse_shard_ids("0-3", 8) == [0, 1, 2, 3]
+    assert sharding.parse_shard_ids("6, 0,2-3,2", 8) == [0, 2, 3, 6]
+    assert sharding.parse_shard_ids("7", 8) == [7]
+
+    for spec in ("", "3-1", "0-8", "-1", "a-b"):
+        with pytest.raises(ValueError):
+            sharding.parse_shard_ids(spec, 8)
+
+
+def test_shard_settings(monkeypatch):
+    """Test the modes selected by SHARD_COUNT and SHARD_IDS."""
+    def settings(count, ids):
+        monkeypatch.setattr(sharding, "SHARD_COUNT", count)
+        monkeypatch.setattr(sharding, "SHARD_IDS", ids)
+        return sharding._shard_settings()
+
+    assert settings("", "") == (False, None, None)
+    assert settings("auto", "") == (True, None, None)
+    assert settings("4", "") == (True, 4, None)
+    assert settings("4", "2-3") == (True, 4, [2, 3])
+    for count, ids in (("", "0"), ("auto", "0"), ("0", ""), ("4", "4")):
+        with pytest.raises(ValueError):
+            settings(count, ids)
+
+
+def test_shard_health(monkeypatch):
+    """Test that connects, disconnects and latencies are tracked per shard."""
+    monkeypatch.setattr(sharding, "_shards", {})
+
+    class FakeBot:
+        latency = 0.05
+
+    sharding.record_connect(0)
+    sharding.record_disconnect(0)
+    sharding.record_disconnect(0)
+    sharding.record_connect(0)
+    [status] = sharding.shard_health(FakeBot())
+    assert (status.shard_id, status.connected, status.disconnects, status.latency) == (0, True, 1, 0.05)
+    assert sharding.shard_latencies(FakeBot()) == {"0": 0.05}
+
+    # No heartbeat yet
+    FakeBot.latency = math.inf
+    assert sharding.shard_health(FakeBot())[0].latency is None
+    assert sharding.shard_latencies(FakeBot()) == {}